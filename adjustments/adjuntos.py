@@ -0,0 +1,218 @@
+"""
+Carga y descarga de los archivos adjuntos.
+
+Carga: HashUploadHandler se instala antes de los manejadores de Django y
+calcula el SHA-256 de cada archivo a medida que llegan sus bloques, sin
+modificarlos: el archivo se sigue guardando en memoria o en un temporal según
+FILE_UPLOAD_MAX_MEMORY_SIZE. Con el hash ya calculado, BlobAdjunto.referenciar
+decide si el contenido existe antes de copiarlo al almacenamiento.
+
+Descarga: respuesta_descarga entrega el archivo según ATTACHMENT_SENDFILE:
+
+- 'x-accel-redirect' (nginx): responde solo cabeceras con X-Accel-Redirect
+  hacia ATTACHMENT_ACCEL_PREFIX (una location `internal`); nginx envía el
+  archivo y atiende los Range.
+- 'x-sendfile' (Apache mod_xsendfile, lighttpd): X-Sendfile con la ruta
+  absoluta del archivo.
+- '' (por defecto): FileResponse sobre el archivo abierto, que el servidor
+  WSGI envía con sendfile (wsgi.file_wrapper); Range de un solo tramo se
+  responde con 206.
+"""
+
+import hashlib
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+# Range de un solo tramo: bytes=inicio-fin, bytes=inicio- o bytes=-sufijo
+PATRON_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Atributo de la petición con {campo: sha256} de los archivos recibidos
+ATRIBUTO_HASHES = 'sha256_archivos'
+
+
+class HashUploadHandler(FileUploadHandler):
+    """Calcula el SHA-256 de cada archivo mientras se recibe"""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hash.update(raw_data)
+        # Los datos siguen hacia el siguiente manejador sin cambios
+        return raw_data
+
+    def file_complete(self, file_size):
+        hashes = getattr(self.request, ATRIBUTO_HASHES, None)
+        if hashes is None:
+            hashes = {}
+            setattr(self.request, ATRIBUTO_HASHES, hashes)
+        hashes[self.field_name] = self.hash.hexdigest()
+        # El archivo lo construye el siguiente manejador
+        return None
+
+
+def instalar_hash(request):
+    """Agregar HashUploadHandler a la petición antes de leer su cuerpo"""
+    request.upload_handlers.insert(0, HashUploadHandler(request))
+
+
+def calcular_sha256(archivo):
+    """SHA-256 de un archivo leído por bloques (sin cargarlo completo en memoria)"""
+    digest = hashlib.sha256()
+    archivo.seek(0)
+    for bloque in archivo.chunks():
+        digest.update(bloque)
+    archivo.seek(0)
+    return digest.hexdigest()
+
+
+def sha256_subido(request, campo, archivo):
+    """Hash calculado durante la carga, o calculado ahora si no se instaló el manejador"""
+    hashes = getattr(request, ATRIBUTO_HASHES, None) or {}
+    return hashes.get(campo) or calcular_sha256(archivo)
+
+
+class RangoInsatisfacible(Exception):
+    """El Range pedido empieza después del final del archivo"""
+
+
+def interpretar_rango(cabecera, tamano):
+    """
+    Interpretar una cabecera Range de un solo tramo.
+
+    Args:
+        cabecera (str): Valor de la cabecera Range
+        tamano (int): Tamaño del archivo en bytes
+
+    Returns:
+        tuple: (inicio, fin) inclusivos, o None si se debe enviar el archivo
+            completo (cabecera inválida o de varios tramos)
+
+    Raises:
+        RangoInsatisfacible: Si el tramo no se puede satisfacer
+    """
+    coincidencia = PATRON_RANGO.match(cabecera.strip())
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        return None
+
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        # Los últimos `fin` bytes
+        sufijo = int(fin)
+        if sufijo == 0 or tamano == 0:
+            raise RangoInsatisfacible
+        return max(tamano - sufijo, 0), tamano - 1
+
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano:
+        raise RangoInsatisfacible
+    if fin < inicio:
+        return None
+    return inicio, fin
+
+
+class _Tramo:
+    """Lectura de `longitud` bytes desde la posición actual de un archivo"""
+
+    def __init__(self, archivo, longitud):
+        self.archivo = archivo
+        self.restante = longitud
+
+    def read(self, size=-1):
+        if self.restante <= 0:
+            return b''
+        if size < 0 or size > self.restante:
+            size = self.restante
+        datos = self.archivo.read(size)
+        self.restante -= len(datos)
+        return datos
+
+    def close(self):
+        self.archivo.close()
+
+
+def respuesta_descarga(request, adjunto):
+    """
+    Respuesta con el contenido de un ArchivoAdjunto (ver el docstring del módulo).
+
+    El ETag es el SHA-256 del blob (los adjuntos sin blob solo usan
+    Last-Modified), de modo que If-None-Match e If-Range funcionan entre
+    adjuntos con el mismo contenido.
+
+    Raises:
+        FileNotFoundError: Si el archivo no está en el almacenamiento
+    """
+    config = getattr(settings, 'ADJUSTMENTS_SETTINGS', {})
+    modo = config.get('ATTACHMENT_SENDFILE', '')
+    nombre = adjunto.archivo.name
+    storage = adjunto.archivo.storage
+
+    etag = quote_etag(adjunto.blob.sha256) if adjunto.blob_id else None
+    # Segundos enteros, como If-Modified-Since (ver adjustments.conditional)
+    ultima_modificacion = int(adjunto.fecha_subida.timestamp())
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+    if no_modificado is not None:
+        return no_modificado
+
+    if modo in ('x-accel-redirect', 'x-sendfile'):
+        respuesta = HttpResponse(content_type=adjunto.tipo_contenido or 'application/octet-stream')
+        if modo == 'x-accel-redirect':
+            prefijo = config.get('ATTACHMENT_ACCEL_PREFIX', '/protected-media/')
+            respuesta['X-Accel-Redirect'] = f"{prefijo.rstrip('/')}/{quote(nombre)}"
+        else:
+            respuesta['X-Sendfile'] = storage.path(nombre)
+    else:
+        respuesta = _respuesta_archivo(
+            request, adjunto, etag, http_date(ultima_modificacion), storage.open(nombre, 'rb')
+        )
+
+    respuesta['Content-Disposition'] = content_disposition_header(True, adjunto.nombre)
+    respuesta['Last-Modified'] = http_date(ultima_modificacion)
+    if etag:
+        respuesta['ETag'] = etag
+    return respuesta
+
+
+def _respuesta_archivo(request, adjunto, etag, fecha_http, archivo):
+    """FileResponse completo (200) o de un tramo (206)"""
+    tipo = adjunto.tipo_contenido or 'application/octet-stream'
+    tamano = archivo.size
+
+    rango = None
+    cabecera = request.headers.get('Range')
+    si_rango = request.headers.get('If-Range')
+    # If-Range con un validador distinto: el archivo cambió, se envía completo
+    if cabecera and (not si_rango or si_rango in (etag, fecha_http)):
+        try:
+            rango = interpretar_rango(cabecera, tamano)
+        except RangoInsatisfacible:
+            archivo.close()
+            respuesta = HttpResponse(status=416)
+            respuesta['Content-Range'] = f'bytes */{tamano}'
+            return respuesta
+
+    if rango is None:
+        respuesta = FileResponse(archivo, content_type=tipo)
+    else:
+        inicio, fin = rango
+        archivo.seek(inicio)
+        if fin == tamano - 1:
+            # Hasta el final (p. ej. reanudar una descarga): el archivo se
+            # entrega tal cual y el servidor puede seguir usando sendfile
+            respuesta = FileResponse(archivo, content_type=tipo)
+        else:
+            respuesta = FileResponse(_Tramo(archivo, fin - inicio + 1), content_type=tipo)
+        respuesta.status_code = 206
+        respuesta['Content-Length'] = fin - inicio + 1
+        respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+
+    respuesta['Accept-Ranges'] = 'bytes'
+    return respuesta
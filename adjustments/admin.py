@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     TipoAjuste, CuentaContable, AjusteFinanciero,
-    HistorialAjuste, ArchivoAdjunto, ComentarioAjuste
+    HistorialAjuste, ArchivoAdjunto, BlobAdjunto, ComentarioAjuste
 )
 
 @admin.register(TipoAjuste)
@@ -83,9 +83,17 @@ class ArchivoAdjuntoAdmin(admin.ModelAdmin):
     list_display = ['nombre', 'ajuste', 'usuario_subida', 'tamaño', 'fecha_subida']
     list_filter = ['tipo_contenido', 'fecha_subida']
     search_fields = ['nombre', 'descripcion', 'ajuste__numero_ajuste']
-    readonly_fields = ['tamaño', 'tipo_contenido', 'fecha_subida']
+    readonly_fields = ['tamaño', 'tipo_contenido', 'blob', 'fecha_subida']
     ordering = ['-fecha_subida']
 
+@admin.register(BlobAdjunto)
+class BlobAdjuntoAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'tamaño', 'referencias', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'archivo', 'tamaño', 'referencias', 'created_at']
+    ordering = ['-created_at']
+
 @admin.register(ComentarioAjuste)
 class ComentarioAjusteAdmin(admin.ModelAdmin):
     list_display = ['ajuste', 'usuario', 'es_interno', 'fecha_comentario']
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdjustmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'adjustments'
+    
+    def ready(self):
+        # Registrar señales y verificaciones de sistema
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,146 @@
+"""
+Campos dispersos (?fields= / ?omit=) para los listados de la API.
+
+El cliente elige qué campos quiere en la respuesta:
+
+    GET /api/ajustes/?fields=id,numero_ajuste,monto,estado
+    GET /api/registros/?omit=justificacion
+
+La selección se aplica también a la consulta: solo se leen de la base de
+datos las columnas que necesitan los campos pedidos (only()/values()), por
+lo que una grilla angosta no transfiere los TextField largos.
+"""
+
+from rest_framework.exceptions import ValidationError
+
+PARAM_CAMPOS = 'fields'
+PARAM_OMITIR = 'omit'
+
+
+def _separar(valor):
+    return [campo.strip() for campo in valor.split(',') if campo.strip()]
+
+
+def parsear_campos(query_params, disponibles):
+    """
+    Obtener los campos de salida pedidos con ?fields= y ?omit=.
+
+    Args:
+        query_params (QueryDict): Parámetros de la petición
+        disponibles (list): Campos que puede producir la respuesta, en orden
+
+    Returns:
+        list: Campos pedidos en el orden de `disponibles`, o None si el
+            cliente no restringió la respuesta
+
+    Raises:
+        ValidationError: Si se piden campos inexistentes o ninguno queda
+    """
+    incluir = _separar(query_params.get(PARAM_CAMPOS, ''))
+    omitir = _separar(query_params.get(PARAM_OMITIR, ''))
+    if not incluir and not omitir:
+        return None
+
+    desconocidos = [campo for campo in incluir + omitir if campo not in disponibles]
+    if desconocidos:
+        raise ValidationError({
+            PARAM_CAMPOS: f"Campos desconocidos: {', '.join(desconocidos)}"
+        })
+
+    campos = [
+        campo for campo in disponibles
+        if (not incluir or campo in incluir) and campo not in omitir
+    ]
+    if not campos:
+        raise ValidationError({PARAM_CAMPOS: 'Debe quedar al menos un campo en la respuesta'})
+    return campos
+
+
+class CamposDinamicosMixin:
+    """
+    Mixin para ModelSerializer que acepta `campos` y sabe proyectar su queryset.
+
+    Attributes:
+        columnas_por_campo (dict): Campo de salida -> rutas para only()
+            (por defecto el mismo nombre del campo)
+        relaciones_por_campo (dict): Campo de salida -> relación para select_related()
+    """
+
+    columnas_por_campo = {}
+    relaciones_por_campo = {}
+
+    def __init__(self, *args, **kwargs):
+        campos = kwargs.pop('campos', None)
+        super().__init__(*args, **kwargs)
+
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
+    @classmethod
+    def proyectar(cls, queryset, campos=None):
+        """
+        Limitar el queryset a las columnas y relaciones que usan los campos.
+
+        Args:
+            queryset (QuerySet): Queryset del listado
+            campos (list): Campos de salida (por defecto todos los del serializer)
+
+        Returns:
+            QuerySet: Queryset con only() y select_related() ajustados; los
+                prefetch del queryset base se descartan (el listado no los usa)
+        """
+        columnas = ['pk']
+        relaciones = []
+        for campo in campos or cls.Meta.fields:
+            columnas.extend(cls.columnas_por_campo.get(campo, [campo]))
+            if campo in cls.relaciones_por_campo:
+                relaciones.append(cls.relaciones_por_campo[campo])
+
+        return (
+            queryset
+            .select_related(None).select_related(*relaciones)
+            .prefetch_related(None)
+            .only(*columnas)
+        )
+
+
+class CamposDispersosMixin:
+    """
+    Mixin para ViewSets cuyo serializer usa CamposDinamicosMixin.
+
+    En las acciones indicadas pasa los campos pedidos al serializer y
+    proyecta el queryset para leer solo las columnas necesarias.
+
+    Attributes:
+        acciones_campos_dispersos (tuple): Acciones que aceptan ?fields=/?omit=
+    """
+
+    acciones_campos_dispersos = ('list',)
+
+    def usa_campos_dispersos(self):
+        return (
+            getattr(self, 'action', None) in self.acciones_campos_dispersos
+            and issubclass(self.get_serializer_class(), CamposDinamicosMixin)
+        )
+
+    def get_campos_respuesta(self):
+        """Campos pedidos por el cliente (None si no restringió la respuesta)"""
+        if not hasattr(self, '_campos_respuesta'):
+            self._campos_respuesta = None
+            if self.usa_campos_dispersos():
+                disponibles = list(self.get_serializer_class().Meta.fields)
+                self._campos_respuesta = parsear_campos(self.request.query_params, disponibles)
+        return self._campos_respuesta
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.usa_campos_dispersos():
+            queryset = self.get_serializer_class().proyectar(queryset, self.get_campos_respuesta())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        campos = self.get_campos_respuesta()
+        if campos is not None:
+            kwargs['campos'] = campos
+        return super().get_serializer(*args, **kwargs)
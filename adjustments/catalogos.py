@@ -0,0 +1,117 @@
+"""
+Caché en memoria de los catálogos TipoAjuste y CuentaContable.
+
+Cada proceso (worker) guarda los catálogos completos en diccionarios por id,
+junto con la versión con la que los cargó. La versión vigente es la fila
+NOMBRE_VERSION de VersionCatalogo, visible para todos los workers sin
+importar el backend de caché: las señales de guardado y borrado de los
+catálogos la incrementan al confirmar la transacción y cada worker recarga
+el catálogo la siguiente vez que nota el cambio. Para no leer la versión en
+cada acceso, se verifica como máximo cada CATALOG_CACHE_CHECK_SECONDS
+segundos; el proceso que hizo el cambio recarga de inmediato.
+
+Las operaciones masivas sobre los catálogos (update, bulk_create) no emiten
+señales y deben llamar a invalidar().
+"""
+
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+# Fila de VersionCatalogo compartida por los catálogos
+NOMBRE_VERSION = 'catalogos'
+
+
+def _versiones():
+    return apps.get_model('adjustments', 'VersionCatalogo').objects
+
+
+def version_compartida():
+    """Versión vigente de los catálogos (0 si nunca se han modificado)"""
+    version = _versiones().filter(nombre=NOMBRE_VERSION).values_list('version', flat=True).first()
+    return version or 0
+
+
+class Catalogo:
+    """
+    Catálogo de un modelo cargado completo en memoria.
+
+    Attributes:
+        nombre_modelo (str): Modelo de la app adjustments
+    """
+
+    def __init__(self, nombre_modelo):
+        self.nombre_modelo = nombre_modelo
+        self._lock = threading.Lock()
+        self._version = None
+        self._verificado = 0.0
+        self._instancias = {}
+        self._representaciones = {}
+
+    def __deepcopy__(self, memo):
+        # Los serializers copian los argumentos de sus campos; el catálogo es único
+        return self
+
+    @property
+    def modelo(self):
+        return apps.get_model('adjustments', self.nombre_modelo)
+
+    def _vigente(self):
+        """Recargar el catálogo si la versión compartida cambió"""
+        intervalo = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('CATALOG_CACHE_CHECK_SECONDS', 5)
+        ahora = time.monotonic()
+        if self._version is not None and ahora - self._verificado < intervalo:
+            return
+
+        version = version_compartida()
+        with self._lock:
+            if version != self._version:
+                # La versión se lee antes que las filas: un cambio intermedio
+                # solo provoca una recarga más
+                self._instancias = {instancia.pk: instancia for instancia in self.modelo.objects.all()}
+                self._representaciones = {}
+                self._version = version
+                logger.debug(f"Catálogo {self.nombre_modelo} recargado ({len(self._instancias)} filas)")
+            self._verificado = ahora
+
+    def obtener(self, pk):
+        """
+        Instancia con id `pk` (None si no existe).
+
+        Las instancias se comparten entre peticiones: no deben modificarse.
+        """
+        self._vigente()
+        return self._instancias.get(pk)
+
+    def representacion(self, pk, serializer_class):
+        """Salida de serializer_class para la fila `pk`, calculada una vez por versión"""
+        self._vigente()
+        representaciones = self._representaciones.setdefault(serializer_class, {})
+        if pk not in representaciones:
+            instancia = self._instancias.get(pk)
+            representaciones[pk] = serializer_class(instancia).data if instancia is not None else None
+        return representaciones[pk]
+
+    def olvidar(self):
+        """Forzar la recarga en el siguiente acceso"""
+        self._version = None
+
+
+tipos_ajuste = Catalogo('TipoAjuste')
+cuentas_contables = Catalogo('CuentaContable')
+
+
+def invalidar():
+    """Incrementar la versión compartida para que todos los workers recarguen"""
+    if not _versiones().filter(nombre=NOMBRE_VERSION).update(version=F('version') + 1):
+        # Primer cambio: la fila aún no existe
+        _versiones().get_or_create(nombre=NOMBRE_VERSION, defaults={'version': 1})
+
+    for catalogo in (tipos_ajuste, cuentas_contables):
+        catalogo.olvidar()
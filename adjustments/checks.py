@@ -0,0 +1,27 @@
+"""
+Verificaciones de sistema (python manage.py check) de la app adjustments.
+"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def cache_compartida(app_configs, **kwargs):
+    """
+    Advertir (check --deploy) si la caché por defecto es LocMemCache.
+
+    LocMemCache vive dentro de cada proceso: con varios workers de gunicorn
+    cada uno tiene sus propios contadores de throttling y su propia copia de
+    lo que se guarde en caché.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if not backend.endswith('LocMemCache'):
+        return []
+    return [
+        Warning(
+            "La caché por defecto es LocMemCache: no se comparte entre los workers.",
+            hint="Configure REDIS_URL (u otra caché compartida) en producción.",
+            id='adjustments.W001',
+        )
+    ]
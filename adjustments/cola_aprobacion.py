@@ -0,0 +1,105 @@
+"""
+=============================================================================
+COLA DE APROBACIÓN DE AJUSTES
+=============================================================================
+
+Reparte los ajustes PENDIENTE entre los aprobadores para que dos personas
+no revisen el mismo ajuste. Cada aprobador reclama los siguientes N ajustes,
+por prioridad (URGENTE primero) y antigüedad, y los conserva durante
+APPROVAL_LEASE_MINUTES; si no los resuelve en ese tiempo vuelven a la cola.
+
+- PostgreSQL: SELECT ... FOR UPDATE SKIP LOCKED. Los aprobadores que
+  reclaman al mismo tiempo se saltan las filas que otro está tomando, en
+  lugar de esperar por ellas.
+- Otros motores (SQLite en desarrollo): sin SKIP LOCKED; los candidatos se
+  leen sin bloqueo y se toman con un UPDATE condicionado a que sigan libres,
+  de modo que una carrera entrega menos ajustes pero nunca el mismo a dos
+  aprobadores.
+
+Las consultas usan el índice parcial ajuste_cola_pendiente_idx (solo filas
+PENDIENTE, en el orden de la cola).
+=============================================================================
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AjusteFinanciero, rango_prioridad
+
+logger = logging.getLogger(__name__)
+
+
+def duracion_reserva():
+    minutos = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('APPROVAL_LEASE_MINUTES', 15)
+    return timedelta(minutes=minutos)
+
+
+def _disponibles(queryset, usuario, ahora):
+    """Pendientes sin reserva vigente de otro aprobador, en orden de atención"""
+    return queryset.filter(estado='PENDIENTE').filter(
+        Q(reclamado_hasta__isnull=True) | Q(reclamado_hasta__lt=ahora) | Q(reclamado_por=usuario)
+    ).order_by(rango_prioridad(), 'created_at')
+
+
+def reclamar(usuario, cantidad, queryset=None):
+    """
+    Reservar para `usuario` los siguientes `cantidad` ajustes pendientes.
+
+    Las reservas vigentes del mismo usuario se incluyen (y se renuevan) antes
+    que los ajustes libres, porque ocupan su lugar en el orden de la cola.
+
+    Args:
+        usuario (User): Aprobador
+        cantidad (int): Máximo de ajustes a reservar
+        queryset (QuerySet): Ajustes visibles para el usuario (todos por defecto)
+
+    Returns:
+        tuple: (ids reservados en orden de atención, fin de la reserva)
+    """
+    if queryset is None:
+        queryset = AjusteFinanciero.objects.all()
+
+    ahora = timezone.now()
+    hasta = ahora + duracion_reserva()
+    disponibles = _disponibles(queryset, usuario, ahora)
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            ids = list(
+                disponibles.select_for_update(skip_locked=True, of=('self',))
+                .values_list('id', flat=True)[:cantidad]
+            )
+            AjusteFinanciero.objects.filter(id__in=ids).update(reclamado_por=usuario, reclamado_hasta=hasta)
+        else:
+            candidatos = list(disponibles.values_list('id', flat=True)[:cantidad])
+            # El UPDATE repite la condición: solo toma las filas que siguen libres
+            _disponibles(AjusteFinanciero.objects.filter(id__in=candidatos), usuario, ahora).update(
+                reclamado_por=usuario, reclamado_hasta=hasta
+            )
+            tomados = set(
+                AjusteFinanciero.objects.filter(
+                    id__in=candidatos, reclamado_por=usuario, reclamado_hasta=hasta
+                ).values_list('id', flat=True)
+            )
+            ids = [pk for pk in candidatos if pk in tomados]
+
+    logger.info(f"Cola de aprobación: {usuario.username} reservó {len(ids)} ajustes hasta {hasta:%H:%M}")
+    return ids, hasta
+
+
+def liberar(usuario, ajuste_ids=None):
+    """
+    Devolver a la cola las reservas de `usuario` (todas o las de ajuste_ids).
+
+    Returns:
+        int: Ajustes liberados
+    """
+    reservas = AjusteFinanciero.objects.filter(reclamado_por=usuario, estado='PENDIENTE')
+    if ajuste_ids is not None:
+        reservas = reservas.filter(id__in=ajuste_ids)
+    return reservas.update(reclamado_por=None, reclamado_hasta=None)
@@ -0,0 +1,96 @@
+"""
+GET condicional (ETag / Last-Modified) para los listados de la API.
+
+El validador de un listado se calcula con una sola consulta agregada
+(Max(updated_at) y Count) sobre el queryset ya filtrado. Si el cliente envía
+un If-None-Match (o If-Modified-Since) que coincide, se responde 304 sin
+ejecutar la consulta del listado ni serializar.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Mixin para ViewSets que agrega soporte de GET condicional.
+
+    Los ViewSets que personalizan `list` u otras acciones de lectura usan
+    `respuesta_condicional` directamente; el `list` por defecto ya lo aplica.
+
+    Attributes:
+        campo_modificacion (str): Campo con la fecha de última modificación
+    """
+
+    campo_modificacion = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.respuesta_condicional(
+            request, queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def get_componentes_validador(self):
+        """
+        Valores adicionales que invalidan la respuesta aunque los datos no cambien.
+
+        Returns:
+            list: Valores incluidos en el ETag
+        """
+        return []
+
+    def calcular_validador(self, request, queryset):
+        """
+        Calcular ETag y Last-Modified de un queryset filtrado.
+
+        Args:
+            request (Request): Petición actual (la URL completa forma parte del ETag)
+            queryset (QuerySet): Queryset filtrado que respalda la respuesta
+
+        Returns:
+            tuple: (etag, last_modified) donde last_modified es un timestamp o None
+        """
+        resumen = queryset.order_by().aggregate(
+            ultima_modificacion=Max(self.campo_modificacion),
+            total=Count('pk'),
+        )
+        ultima = resumen['ultima_modificacion']
+
+        componentes = [
+            request.build_absolute_uri(),
+            ultima.isoformat() if ultima else '',
+            resumen['total'],
+            *self.get_componentes_validador(),
+        ]
+        etag = hashlib.sha1('|'.join(str(c) for c in componentes).encode('utf-8')).hexdigest()
+
+        return quote_etag(etag), int(ultima.timestamp()) if ultima else None
+
+    def respuesta_condicional(self, request, queryset, construir_respuesta):
+        """
+        Responder 304 si el cliente ya tiene la versión actual.
+
+        Args:
+            request (Request): Petición actual
+            queryset (QuerySet): Queryset filtrado que respalda la respuesta
+            construir_respuesta (callable): Genera la respuesta completa
+
+        Returns:
+            Response: 304/412 condicional o la respuesta completa con validadores
+        """
+        etag, last_modified = self.calcular_validador(request, queryset)
+
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = construir_respuesta()
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
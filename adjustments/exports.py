@@ -0,0 +1,126 @@
+"""
+Utilidades de exportación en streaming.
+
+Generadores que convierten filas de la base de datos (tuplas obtenidas con
+values_list().iterator()) en bloques de texto para StreamingHttpResponse o
+en archivos temporales, de modo que la memoria por worker se mantiene
+constante sin importar el tamaño del resultado.
+"""
+
+import csv
+import tempfile
+
+import openpyxl
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Filas leídas por viaje al cursor del servidor
+CHUNK_SIZE = 2000
+
+# Filas agrupadas en cada bloque enviado al cliente
+FILAS_POR_BLOQUE = 500
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class Echo:
+    """Buffer de solo escritura que devuelve lo escrito (para csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def generar_csv(encabezados, filas, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Generar un CSV por bloques.
+
+    Args:
+        encabezados (list): Fila de encabezados
+        filas (iterable): Tuplas de valores ya formateados
+        filas_por_bloque (int): Filas por cada bloque emitido
+
+    Yields:
+        str: Bloques de texto CSV
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(encabezados)
+
+    bloque = []
+    for fila in filas:
+        bloque.append(writer.writerow(fila))
+        if len(bloque) >= filas_por_bloque:
+            yield ''.join(bloque)
+            bloque = []
+
+    if bloque:
+        yield ''.join(bloque)
+
+
+def escribir_csv(encabezados, filas):
+    """
+    Escribir un CSV completo en un archivo temporal (se elimina al cerrarlo).
+    
+    Args:
+        encabezados (list): Fila de encabezados
+        filas (iterable): Tuplas de valores ya formateados
+        
+    Returns:
+        file: Archivo temporal binario (UTF-8) posicionado al inicio
+    """
+    archivo = tempfile.TemporaryFile()
+    for bloque in generar_csv(encabezados, filas):
+        archivo.write(bloque.encode('utf-8'))
+    archivo.seek(0)
+    return archivo
+
+
+def generar_ndjson(campos, filas, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Generar JSON delimitado por líneas (un objeto por fila) por bloques.
+
+    Args:
+        campos (list): Nombres de las claves de cada objeto
+        filas (iterable): Tuplas de valores en el orden de `campos`
+        filas_por_bloque (int): Filas por cada bloque emitido
+
+    Yields:
+        str: Bloques de líneas JSON
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    bloque = []
+    for fila in filas:
+        bloque.append(encoder.encode(dict(zip(campos, fila))) + '\n')
+        if len(bloque) >= filas_por_bloque:
+            yield ''.join(bloque)
+            bloque = []
+
+    if bloque:
+        yield ''.join(bloque)
+
+
+def escribir_xlsx(encabezados, filas, titulo='Hoja1'):
+    """
+    Escribir un libro de Excel en modo de solo escritura.
+    
+    Cada fila se agrega como tupla y se vuelca al disco, por lo que la
+    memoria no depende del número de filas. El resultado queda en un archivo
+    temporal (se elimina al cerrarlo) listo para FileResponse.
+    
+    Args:
+        encabezados (list): Fila de encabezados
+        filas (iterable): Tuplas de valores (datetimes sin zona horaria)
+        titulo (str): Nombre de la hoja
+        
+    Returns:
+        file: Archivo temporal posicionado al inicio
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet(titulo)
+    worksheet.append(encabezados)
+    for fila in filas:
+        worksheet.append(fila)
+    
+    archivo = tempfile.TemporaryFile()
+    workbook.save(archivo)
+    archivo.seek(0)
+    return archivo
@@ -151,6 +151,7 @@ class RegistroAjuste(models.Model):
             models.Index(fields=['fecha_ajuste'], name='idx_fecha_ajuste'),
             models.Index(fields=['asesor_que_ajusto'], name='idx_asesor'),
             models.Index(fields=['created_at'], name='idx_created_at'),
+            models.Index(fields=['updated_at'], name='idx_updated_at'),
             models.Index(fields=['valor_ajustado'], name='idx_valor'),
             # Índice compuesto para búsquedas por cuenta y fecha
             models.Index(fields=['id_cuenta', 'fecha_ajuste'], name='idx_cuenta_fecha'),
@@ -299,4 +300,218 @@ class RegistroAjuste(models.Model):
             asesor_que_ajusto__icontains=asesor
         ).order_by('-fecha_ajuste')
         """Formatear el valor para mostrar"""
-        return f"${self.valor_ajustado:,.2f}"
\ No newline at end of file
+        return f"${self.valor_ajustado:,.2f}"
+
+class DimensionRegistro(models.Model):
+    """
+    Base abstracta para las tablas de dimensión de RegistroAjuste.
+    
+    Cada fila resume un valor distinto de una columna de RegistroAjuste
+    (asesor o cuenta) con su número de registros y la última fecha de ajuste.
+    Se mantienen incrementalmente desde las señales del modelo y desde las
+    cargas masivas, para que los selectores del frontend no ejecuten
+    SELECT DISTINCT sobre toda la tabla de registros.
+    
+    Las altas solo pueden adelantar ultima_fecha_ajuste (Greatest); cuando un
+    registro se elimina, cambia de clave o su fecha retrocede, las señales la
+    recalculan con recalcular_fechas.
+    
+    Attributes:
+        total_registros (int): Registros que tienen este valor
+        ultima_fecha_ajuste (date): Fecha de ajuste más reciente de sus registros
+        updated_at (datetime): Última modificación de la fila
+    """
+    
+    # Nombre del campo clave en la dimensión y en RegistroAjuste
+    CAMPO_CLAVE = None
+    CAMPO_REGISTRO = None
+    
+    total_registros = models.IntegerField(
+        default=0,
+        verbose_name="Total de Registros"
+    )
+    
+    ultima_fecha_ajuste = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Última Fecha de Ajuste"
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Fecha de Actualización"
+    )
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def ajustar(cls, cambios):
+        """
+        Aplicar variaciones de conteo a la dimensión.
+        
+        Args:
+            cambios (dict): {clave: (delta, fecha_ajuste)}; la fecha puede ser
+                None cuando solo se descuenta un registro
+        """
+        from django.db import IntegrityError, transaction
+        from django.db.models import F, Value
+        from django.db.models.functions import Coalesce, Greatest
+        from django.utils import timezone
+        
+        ahora = timezone.now()
+        
+        for clave, (delta, fecha) in cambios.items():
+            if not clave:
+                continue
+            
+            valores = {
+                'total_registros': F('total_registros') + delta,
+                'updated_at': ahora,
+            }
+            if fecha:
+                valores['ultima_fecha_ajuste'] = Greatest(
+                    Coalesce('ultima_fecha_ajuste', Value(fecha)), Value(fecha)
+                )
+            
+            filtro = cls.objects.filter(**{cls.CAMPO_CLAVE: clave})
+            if filtro.update(**valores) or delta <= 0:
+                continue
+            
+            try:
+                with transaction.atomic():
+                    cls.objects.create(**{
+                        cls.CAMPO_CLAVE: clave,
+                        'total_registros': delta,
+                        'ultima_fecha_ajuste': fecha,
+                    })
+            except IntegrityError:
+                # Otro proceso creó la fila entre el UPDATE y el INSERT
+                filtro.update(**valores)
+        
+        # Los valores sin registros dejan de aparecer en los selectores
+        claves = [clave for clave, (delta, fecha) in cambios.items() if clave and delta < 0]
+        if claves:
+            cls.objects.filter(**{
+                f'{cls.CAMPO_CLAVE}__in': claves,
+                'total_registros__lte': 0,
+            }).delete()
+    
+    @classmethod
+    def recalcular_fechas(cls, claves):
+        """
+        Recalcular ultima_fecha_ajuste de las claves a partir de los registros.
+        
+        Usa el índice de la columna clave de RegistroAjuste (una subconsulta
+        MAX por clave, en un solo UPDATE).
+        
+        Args:
+            claves (iterable): Valores de CAMPO_CLAVE a recalcular
+        """
+        from django.db.models import Max, OuterRef, Subquery
+        
+        claves = [clave for clave in claves if clave]
+        if not claves:
+            return
+        
+        ultima = (
+            RegistroAjuste.objects.filter(**{cls.CAMPO_REGISTRO: OuterRef(cls.CAMPO_CLAVE)})
+            .order_by()
+            .values(cls.CAMPO_REGISTRO)
+            .annotate(ultima=Max('fecha_ajuste'))
+            .values('ultima')
+        )
+        cls.objects.filter(**{f'{cls.CAMPO_CLAVE}__in': claves}).update(
+            ultima_fecha_ajuste=Subquery(ultima)
+        )
+    
+    @classmethod
+    def cambios_desde_registros(cls, registros, signo=1):
+        """
+        Agrupar una colección de registros en cambios para `ajustar`.
+        
+        Args:
+            registros (iterable): Instancias de RegistroAjuste
+            signo (int): 1 para altas, -1 para bajas
+            
+        Returns:
+            dict: {clave: (delta, fecha_ajuste)}
+        """
+        cambios = {}
+        for registro in registros:
+            clave = getattr(registro, cls.CAMPO_REGISTRO)
+            delta, fecha = cambios.get(clave, (0, None))
+            if signo > 0 and (fecha is None or registro.fecha_ajuste > fecha):
+                fecha = registro.fecha_ajuste
+            cambios[clave] = (delta + signo, fecha)
+        return cambios
+    
+    @classmethod
+    def reconstruir(cls, registros_queryset):
+        """
+        Recalcular la dimensión completa a partir de los registros.
+        
+        Args:
+            registros_queryset (QuerySet): Queryset base de RegistroAjuste
+        """
+        from django.db.models import Count, Max
+        
+        filas = registros_queryset.order_by().values(cls.CAMPO_REGISTRO).annotate(
+            total=Count('id'),
+            ultima=Max('fecha_ajuste'),
+        )
+        
+        cls.objects.all().delete()
+        cls.objects.bulk_create(
+            [
+                cls(**{
+                    cls.CAMPO_CLAVE: fila[cls.CAMPO_REGISTRO],
+                    'total_registros': fila['total'],
+                    'ultima_fecha_ajuste': fila['ultima'],
+                })
+                for fila in filas.iterator(chunk_size=2000)
+            ],
+            batch_size=1000
+        )
+
+
+class DimensionAsesor(DimensionRegistro):
+    """Asesores distintos que aparecen en los registros de ajustes."""
+    
+    CAMPO_CLAVE = 'nombre'
+    CAMPO_REGISTRO = 'asesor_que_ajusto'
+    
+    nombre = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Asesor"
+    )
+    
+    class Meta:
+        verbose_name = "Dimensión de Asesor"
+        verbose_name_plural = "Dimensión de Asesores"
+        ordering = ['nombre']
+    
+    def __str__(self):
+        return f"{self.nombre} ({self.total_registros})"
+
+
+class DimensionCuenta(DimensionRegistro):
+    """Cuentas distintas que aparecen en los registros de ajustes."""
+    
+    CAMPO_CLAVE = 'id_cuenta'
+    CAMPO_REGISTRO = 'id_cuenta'
+    
+    id_cuenta = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name="ID de Cuenta"
+    )
+    
+    class Meta:
+        verbose_name = "Dimensión de Cuenta"
+        verbose_name_plural = "Dimensión de Cuentas"
+        ordering = ['id_cuenta']
+    
+    def __str__(self):
+        return f"{self.id_cuenta} ({self.total_registros})"
@@ -21,6 +21,9 @@ import logging
 
 # Importar modelos locales
 from .frontend_models import RegistroAjuste
+from .validacion import (
+    regla_fecha_registro, regla_justificacion, regla_justificacion_alto_valor, regla_valor_registro
+)
 
 # Configurar logging para este módulo
 logger = logging.getLogger(__name__)
@@ -82,6 +85,10 @@ class RegistroAjusteSerializer(serializers.ModelSerializer):
         # Configuración adicional para optimización
         extra_kwargs = {
             'valor_ajustado': {
+                # Los límites del modelo los aplica regla_valor_registro
+                # (validate_valor_ajustado), con los mismos mensajes que la importación
+                'max_value': None,
+                'min_value': None,
                 'error_messages': {
                     'invalid': 'El valor debe ser un número válido.'
                 }
@@ -137,10 +144,9 @@ class RegistroAjusteSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: Si la fecha es futura
         """
-        if value > date.today():
-            raise serializers.ValidationError(
-                "La fecha del ajuste no puede ser futura."
-            )
+        mensaje = regla_fecha_registro(value, date.today())
+        if mensaje:
+            raise serializers.ValidationError(mensaje)
         return value
     
     def validate_valor_ajustado(self, value):
@@ -156,21 +162,15 @@ class RegistroAjusteSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: Si el valor no cumple las reglas
         """
-        if value >= 0:
-            raise serializers.ValidationError(
-                "El valor del ajuste debe ser negativo (representa una deducción)."
-            )
-        
-        # Validar límite máximo desde configuración (usando valor absoluto)
+        # Límite máximo desde configuración (usando valor absoluto)
         from django.conf import settings
         max_value = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get(
             'MAX_ADJUSTMENT_VALUE', 10000000
         )
         
-        if abs(value) > max_value:
-            raise serializers.ValidationError(
-                f"El valor absoluto del ajuste no puede exceder ${max_value:,.2f}"
-            )
+        mensaje = regla_valor_registro(value, max_value)
+        if mensaje:
+            raise serializers.ValidationError(mensaje)
         
         return value
     
@@ -187,17 +187,9 @@ class RegistroAjusteSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: Si la justificación no es válida
         """
-        if not value or len(value.strip()) < 10:
-            raise serializers.ValidationError(
-                "La justificación debe tener al menos 10 caracteres."
-            )
-        
-        # Validar palabras prohibidas o patrones no deseados
-        palabras_prohibidas = ['test', 'prueba', 'xxxx', 'aaaa']
-        if any(palabra in value.lower() for palabra in palabras_prohibidas):
-            raise serializers.ValidationError(
-                "La justificación no puede contener texto de prueba."
-            )
+        mensaje = regla_justificacion(value or '')
+        if mensaje:
+            raise serializers.ValidationError(mensaje)
         
         return value.strip()
     
@@ -219,11 +211,9 @@ class RegistroAjusteSerializer(serializers.ModelSerializer):
         justificacion = attrs.get('justificacion', '')
         
         # Ajustes de alto valor requieren justificación más detallada (usar valor absoluto)
-        if valor_ajustado and abs(valor_ajustado) >= 100000:
-            if len(justificacion.strip()) < 50:
-                raise serializers.ValidationError({
-                    'justificacion': 'Ajustes de alto valor requieren justificación detallada (mínimo 50 caracteres).'
-                })
+        mensaje = regla_justificacion_alto_valor(valor_ajustado, justificacion)
+        if mensaje:
+            raise serializers.ValidationError({'justificacion': mensaje})
         
         return attrs
     
@@ -302,6 +292,158 @@ class RegistroAjusteSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class RegistroAjusteLecturaRapida:
+    """
+    Serialización de solo lectura para list/retrieve de RegistroAjuste.
+    
+    Trabaja sobre filas obtenidas con values() (diccionarios, sin instanciar
+    modelos) y produce exactamente la misma estructura que
+    RegistroAjusteSerializer, por lo que el JSON resultante es idéntico byte a
+    byte. La configuración y la fecha actual se calculan una vez por página en
+    lugar de una vez por fila.
+    
+    Con `campos` (?fields= / ?omit=) solo se producen esos campos y
+    `columnas_para` indica las columnas mínimas a consultar.
+    
+    Usage:
+        filas = queryset.values(*RegistroAjusteLecturaRapida.CAMPOS)
+        data = RegistroAjusteLecturaRapida().serializar_muchos(filas)
+    """
+    
+    # Columnas que deben consultarse con values()
+    CAMPOS = [
+        'id',
+        'id_cuenta',
+        'id_acuerdo_servicio',
+        'id_cargo_facturable',
+        'fecha_ajuste',
+        'asesor_que_ajusto',
+        'valor_ajustado',
+        'justificacion',
+        'created_at',
+        'updated_at',
+    ]
+    
+    # Campos de salida, en el orden de RegistroAjusteSerializer
+    CAMPOS_SALIDA = CAMPOS + [
+        'valor_ajustado_display',
+        'es_ajuste_alto_valor',
+        'edad_registro',
+        '_metadata',
+    ]
+    
+    # Columnas que necesitan los campos calculados
+    COLUMNAS_POR_CAMPO = {
+        'valor_ajustado_display': ['valor_ajustado'],
+        'es_ajuste_alto_valor': ['valor_ajustado'],
+        'edad_registro': ['created_at'],
+        '_metadata': ['updated_at', 'valor_ajustado'],
+    }
+    
+    CENTAVOS = Decimal('0.01')
+    VERSION_METADATA = '1.0.0'
+    
+    def __init__(self, campos=None):
+        from django.conf import settings
+        from django.utils import timezone
+        
+        self.limite_alto_valor = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get(
+            'REQUIRE_APPROVAL_ABOVE', 100000
+        )
+        self.hoy = timezone.now().date()
+        self.campos = campos
+        if campos is not None:
+            formatos = self._formatos()
+            self._formatos_campos = [(campo, formatos[campo]) for campo in campos]
+    
+    @classmethod
+    def columnas_para(cls, campos=None):
+        """
+        Columnas mínimas para values() que producen los campos dados.
+        
+        Siempre incluye id y created_at (búsqueda por pk y cursor de paginación).
+        """
+        if campos is None:
+            return list(cls.CAMPOS)
+        
+        columnas = ['id', 'created_at']
+        for campo in campos:
+            for columna in cls.COLUMNAS_POR_CAMPO.get(campo, [campo]):
+                if columna not in columnas:
+                    columnas.append(columna)
+        return columnas
+    
+    def _formatos(self):
+        """Funciones que producen cada campo de salida a partir de una fila"""
+        def alto_valor(fila):
+            return abs(fila['valor_ajustado']) >= self.limite_alto_valor
+        
+        return {
+            'id': lambda fila: fila['id'],
+            'id_cuenta': lambda fila: fila['id_cuenta'],
+            'id_acuerdo_servicio': lambda fila: fila['id_acuerdo_servicio'],
+            'id_cargo_facturable': lambda fila: fila['id_cargo_facturable'],
+            'fecha_ajuste': lambda fila: fila['fecha_ajuste'].isoformat(),
+            'asesor_que_ajusto': lambda fila: fila['asesor_que_ajusto'],
+            'valor_ajustado': lambda fila: '{:f}'.format(fila['valor_ajustado'].quantize(self.CENTAVOS)),
+            'justificacion': lambda fila: fila['justificacion'],
+            'created_at': lambda fila: fila['created_at'].isoformat(),
+            'updated_at': lambda fila: fila['updated_at'].isoformat(),
+            'valor_ajustado_display': lambda fila: f"${fila['valor_ajustado']:,.2f}",
+            'es_ajuste_alto_valor': alto_valor,
+            'edad_registro': lambda fila: (self.hoy - fila['created_at'].date()).days,
+            '_metadata': lambda fila: {
+                'version': self.VERSION_METADATA,
+                'last_updated': fila['updated_at'].isoformat(),
+                'requires_approval': alto_valor(fila),
+            },
+        }
+    
+    def serializar(self, fila):
+        """
+        Serializar una fila obtenida con values().
+        
+        Args:
+            fila (dict): Valores de las columnas en CAMPOS (o columnas_para(campos))
+            
+        Returns:
+            dict: Misma salida que RegistroAjusteSerializer
+        """
+        if self.campos is not None:
+            return {campo: formato(fila) for campo, formato in self._formatos_campos}
+        
+        valor = fila['valor_ajustado']
+        created_at = fila['created_at']
+        updated_at = fila['updated_at'].isoformat()
+        alto_valor = abs(valor) >= self.limite_alto_valor
+        
+        return {
+            'id': fila['id'],
+            'id_cuenta': fila['id_cuenta'],
+            'id_acuerdo_servicio': fila['id_acuerdo_servicio'],
+            'id_cargo_facturable': fila['id_cargo_facturable'],
+            'fecha_ajuste': fila['fecha_ajuste'].isoformat(),
+            'asesor_que_ajusto': fila['asesor_que_ajusto'],
+            'valor_ajustado': '{:f}'.format(valor.quantize(self.CENTAVOS)),
+            'justificacion': fila['justificacion'],
+            'created_at': created_at.isoformat(),
+            'updated_at': updated_at,
+            'valor_ajustado_display': f"${valor:,.2f}",
+            'es_ajuste_alto_valor': alto_valor,
+            'edad_registro': (self.hoy - created_at.date()).days,
+            '_metadata': {
+                'version': self.VERSION_METADATA,
+                'last_updated': updated_at,
+                'requires_approval': alto_valor,
+            },
+        }
+    
+    def serializar_muchos(self, filas):
+        """Serializar una página de filas"""
+        serializar = self.serializar
+        return [serializar(fila) for fila in filas]
+
+
 class UserSimpleSerializer(serializers.ModelSerializer):
     """
     Serializer simplificado para usuarios según la estructura esperada por el frontend.
@@ -364,6 +506,22 @@ class UserSimpleSerializer(serializers.ModelSerializer):
             return 'user'
 
 
+class DesgloseAsesorSerializer(serializers.Serializer):
+    """Totales de registros agrupados por asesor."""
+    
+    asesor = serializers.CharField(source='asesor_que_ajusto')
+    total_registros = serializers.IntegerField()
+    total_valor = serializers.DecimalField(max_digits=20, decimal_places=2, coerce_to_string=False)
+
+
+class DesgloseDiarioSerializer(serializers.Serializer):
+    """Totales de registros agrupados por fecha de ajuste."""
+    
+    fecha = serializers.DateField(source='fecha_ajuste')
+    total_registros = serializers.IntegerField()
+    total_valor = serializers.DecimalField(max_digits=20, decimal_places=2, coerce_to_string=False)
+
+
 class EstadisticasSerializer(serializers.Serializer):
     """
     Serializer para estadísticas agregadas del sistema.
@@ -378,12 +536,14 @@ class EstadisticasSerializer(serializers.Serializer):
     total_valor = serializers.DecimalField(
         max_digits=20,
         decimal_places=2,
+        coerce_to_string=False,
         help_text="Suma total de todos los valores ajustados"
     )
     
     promedio_valor = serializers.DecimalField(
         max_digits=15,
         decimal_places=2,
+        coerce_to_string=False,
         help_text="Promedio de valores ajustados"
     )
     
@@ -395,4 +555,34 @@ class EstadisticasSerializer(serializers.Serializer):
     asesores_activos = serializers.IntegerField(
         required=False,
         help_text="Número de asesores que han realizado ajustes"
+    )
+    
+    valor_minimo = serializers.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        coerce_to_string=False,
+        required=False,
+        allow_null=True,
+        help_text="Menor valor ajustado"
+    )
+    
+    valor_maximo = serializers.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        coerce_to_string=False,
+        required=False,
+        allow_null=True,
+        help_text="Mayor valor ajustado"
+    )
+    
+    por_asesor = DesgloseAsesorSerializer(
+        many=True,
+        required=False,
+        help_text="Totales agrupados por asesor"
+    )
+    
+    por_dia = DesgloseDiarioSerializer(
+        many=True,
+        required=False,
+        help_text="Totales agrupados por fecha de ajuste"
     )
\ No newline at end of file
@@ -1,12 +1,35 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q
-from django.utils.dateparse import parse_date
-from .frontend_models import RegistroAjuste
-from .frontend_serializers import RegistroAjusteSerializer, UserSimpleSerializer
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.db import connections, transaction
+from django.db.models import Q, Count, Sum, Avg, Min, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
+import base64
+import json
+import logging
+from .frontend_models import RegistroAjuste, DimensionAsesor, DimensionCuenta
+from .search import buscar
+from .conditional import ConditionalGetMixin
+from .campos import parsear_campos
+from .exports import CHUNK_SIZE, generar_csv, generar_ndjson
+from .importacion import ImportadorRegistros
+from .frontend_serializers import (
+    RegistroAjusteSerializer, RegistroAjusteLecturaRapida,
+    UserSimpleSerializer, EstadisticasSerializer
+)
+
+logger = logging.getLogger(__name__)
 
 class StandardResultsSetPagination(PageNumberPagination):
     """Paginación estándar que retorna el formato esperado por el frontend"""
@@ -25,26 +48,191 @@ class StandardResultsSetPagination(PageNumberPagination):
             'total_pages': self.page.paginator.num_pages
         })
 
-class RegistroAjusteViewSet(viewsets.ModelViewSet):
+def estimar_total(queryset):
+    """
+    Estimar el número de filas de un queryset con las estadísticas del planificador.
+    
+    Solo PostgreSQL expone una estimación barata (EXPLAIN sin ejecutar la consulta);
+    en otros motores retorna None.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+class KeysetResultsSetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (created_at, id).
+    
+    Cada página es un rango del índice idx_created_at a partir de la última
+    fila vista, por lo que no ejecuta COUNT(*) ni OFFSET y el costo de una
+    página profunda es el mismo que el de la primera. Los cursores son opacos
+    para el cliente y se mantiene el formato 'registros' del frontend.
+    
+    El total solo se calcula a pedido: ?total=aproximado (estimación del
+    planificador en PostgreSQL, COUNT(*) en otros motores) o ?total=exacto.
+    total_aproximado indica si el total enviado es una estimación.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'total'
+    invalid_cursor_message = 'Cursor inválido'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        
+        if self.cursor is None:
+            reverso = False
+            filas = queryset.order_by('-created_at', '-id')
+        else:
+            created_at, pk, reverso = self.cursor
+            if reverso:
+                filas = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                ).order_by('created_at', 'id')
+            else:
+                filas = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                ).order_by('-created_at', '-id')
+        
+        # Se pide una fila extra para saber si existe otra página
+        resultados = list(filas[:self.page_size + 1])
+        hay_mas = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        
+        if reverso:
+            resultados.reverse()
+            self.has_next = True
+            self.has_previous = hay_mas
+        else:
+            self.has_next = hay_mas
+            self.has_previous = self.cursor is not None
+        
+        self.page = resultados
+        self.total = None
+        self.total_aproximado = False
+        modo_total = request.query_params.get(self.total_query_param)
+        if modo_total == 'aproximado':
+            self.total = estimar_total(queryset)
+            self.total_aproximado = self.total is not None
+        if modo_total == 'exacto' or (modo_total == 'aproximado' and self.total is None):
+            # Sin estimación del planificador (motores distintos de PostgreSQL) se cuenta
+            self.total = queryset.count()
+        
+        return resultados
+    
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+    
+    def decode_cursor(self, request):
+        """Decodificar el cursor opaco a (created_at, id, reverso)"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            created_at = parse_datetime(data['c'])
+            pk = int(data['i'])
+            reverso = bool(data.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk, reverso
+    
+    def encode_cursor(self, fila, reverso):
+        """Construir la URL con el cursor posicionado en la fila dada"""
+        posicion = {
+            'c': self._valor(fila, 'created_at').isoformat(),
+            'i': self._valor(fila, 'id'),
+        }
+        if reverso:
+            posicion['r'] = 1
+        
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(posicion, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+    
+    def _valor(self, fila, campo):
+        if isinstance(fila, dict):
+            return fila[campo]
+        return getattr(fila, campo)
+    
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverso=False)
+    
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverso=True)
+    
+    def get_paginated_response(self, data):
+        respuesta = {
+            'registros': data,
+            'total': self.total,
+            'count': self.total,
+        }
+        if self.total is not None:
+            respuesta['total_aproximado'] = self.total_aproximado
+        respuesta.update({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+        })
+        return Response(respuesta)
+
+class RegistroAjusteViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet para los registros de ajustes compatible con el frontend Svelte"""
     queryset = RegistroAjuste.objects.all()
     serializer_class = RegistroAjusteSerializer
     permission_classes = [permissions.AllowAny]  # Permitir acceso sin autenticación para pruebas
     pagination_class = StandardResultsSetPagination
     
+    @property
+    def paginator(self):
+        """
+        Usar paginación por cursor cuando el cliente la solicita.
+        
+        Se activa con ?paginacion=cursor o al enviar un ?cursor=; sin ellos se
+        conserva la paginación por número de página.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params if self.request else {}
+            if params.get('paginacion') == 'cursor' or 'cursor' in params:
+                self._paginator = KeysetResultsSetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+    
     def get_queryset(self):
         """Filtrar registros según parámetros de consulta"""
         queryset = RegistroAjuste.objects.all()
         
-        # Filtros de búsqueda
+        # Búsqueda de texto completo (índice tsvector/FTS5)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(id_cuenta__icontains=search) |
-                Q(id_acuerdo_servicio__icontains=search) |
-                Q(asesor_que_ajusto__icontains=search) |
-                Q(justificacion__icontains=search)
-            )
+            queryset = buscar(queryset, search)
         
         # Filtro por fecha
         fecha_desde = self.request.query_params.get('fecha_desde', None)
@@ -70,40 +258,281 @@ class RegistroAjusteViewSet(viewsets.ModelViewSet):
         if cuenta:
             queryset = queryset.filter(id_cuenta__icontains=cuenta)
         
+        # Con búsqueda, los resultados más relevantes primero
+        if search and 'relevancia' in queryset.query.annotations:
+            return queryset.order_by('-relevancia', '-created_at')
+        
         return queryset.order_by('-created_at')
     
+    def list(self, request, *args, **kwargs):
+        """
+        Listar registros con la serialización rápida de solo lectura.
+        
+        Las filas se leen con values() y se formatean con
+        RegistroAjusteLecturaRapida; la salida es idéntica a la de
+        RegistroAjusteSerializer. Con ?fields= / ?omit= solo se consultan las
+        columnas necesarias. Soporta GET condicional (ETag/Last-Modified).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        campos = self.get_campos_respuesta()
+        
+        def construir_respuesta():
+            filas = queryset.values(*RegistroAjusteLecturaRapida.columnas_para(campos))
+            serializador = RegistroAjusteLecturaRapida(campos)
+            
+            page = self.paginate_queryset(filas)
+            if page is not None:
+                return self.get_paginated_response(serializador.serializar_muchos(page))
+            
+            return Response(serializador.serializar_muchos(filas))
+        
+        return self.respuesta_condicional(request, queryset, construir_respuesta)
+    
+    def get_componentes_validador(self):
+        """edad_registro depende de la fecha actual"""
+        return [timezone.now().date()]
+    
+    def get_campos_respuesta(self):
+        """Campos pedidos con ?fields= / ?omit= (None si se piden todos)"""
+        return parsear_campos(self.request.query_params, RegistroAjusteLecturaRapida.CAMPOS_SALIDA)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Obtener un registro con la serialización rápida de solo lectura"""
+        campos = self.get_campos_respuesta()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        fila = get_object_or_404(
+            self.filter_queryset(self.get_queryset()).values(
+                *RegistroAjusteLecturaRapida.columnas_para(campos)
+            ),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, fila)
+        
+        return Response(RegistroAjusteLecturaRapida(campos).serializar(fila))
+    
     def perform_create(self, serializer):
         """Asignar el usuario que crea el registro"""
         serializer.save(created_by=self.request.user)
     
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Crear registros en lote.
+        
+        Acepta una lista de registros (o {"registros": [...]}) de hasta
+        MAX_BATCH_SIZE elementos. Todos se validan en una sola pasada con el
+        mismo serializer y los válidos se insertan con bulk_create en una
+        transacción, sin el full_clean ni el log por registro de save().
+        Con "atomico": true no se inserta nada si algún elemento es inválido.
+        """
+        if isinstance(request.data, list):
+            items, atomico = request.data, False
+        else:
+            items = request.data.get('registros')
+            atomico = str(request.data.get('atomico', '')).lower() in ('true', '1')
+        
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Debe proporcionar una lista de registros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_lote = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('MAX_BATCH_SIZE', 1000)
+        if len(items) > max_lote:
+            return Response(
+                {'error': f'El lote no puede superar {max_lote} registros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Validación en una sola pasada con una única instancia del serializer
+        serializer = self.get_serializer()
+        validos, errores = [], []
+        for indice, item in enumerate(items):
+            try:
+                validos.append(serializer.run_validation(item))
+            except ValidationError as e:
+                errores.append({'indice': indice, 'errores': e.detail})
+        
+        if not validos or (atomico and errores):
+            return Response({
+                'creados': 0,
+                'ids': [],
+                'errores': errores,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        usuario = request.user if request.user.is_authenticated else None
+        registros = [RegistroAjuste(**datos, created_by=usuario) for datos in validos]
+        
+        with transaction.atomic():
+            creados = RegistroAjuste.objects.bulk_create(registros, batch_size=500)
+            for dimension in (DimensionAsesor, DimensionCuenta):
+                dimension.ajustar(dimension.cambios_desde_registros(creados))
+        
+        logger.info(f"Lote de registros de ajuste: {len(creados)} creados, {len(errores)} rechazados")
+        
+        return Response({
+            'creados': len(creados),
+            'ids': [registro.pk for registro in creados],
+            'errores': errores,
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def importar(self, request):
+        """
+        Importar registros desde un archivo CSV o Excel (campo "archivo").
+        
+        Las filas se validan por bloques con las reglas de
+        RegistroAjusteSerializer (en IMPORT_PROCESSES procesos) y las válidas
+        se insertan por lotes; las inválidas se reportan por número de fila.
+        """
+        archivo = request.FILES.get('archivo')
+        if not archivo or not archivo.name.endswith(('.csv', '.xlsx')):
+            return Response(
+                {'error': 'Debe proporcionar un archivo CSV o Excel'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            resultado = ImportadorRegistros(request.user).importar_archivo(archivo, archivo.name)
+        except Exception as e:
+            return Response(
+                {'error': f'Error al procesar archivo: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(resultado)
+    
+    # Columnas incluidas en la exportación de registros
+    CAMPOS_EXPORTACION = [
+        'id', 'id_cuenta', 'id_acuerdo_servicio', 'id_cargo_facturable',
+        'fecha_ajuste', 'asesor_que_ajusto', 'valor_ajustado', 'justificacion',
+        'created_at', 'updated_at',
+    ]
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exportar los registros filtrados en CSV o NDJSON (?formato=csv|ndjson).
+        
+        Usa los mismos filtros que el listado. Las filas se leen con un cursor
+        del servidor (iterator) y se envían en streaming, por lo que la memoria
+        del worker no crece con el tamaño del resultado.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in ('csv', 'ndjson'):
+            return Response(
+                {'error': 'Formato no soportado. Use csv o ndjson'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        filas = self.get_queryset().values_list(*self.CAMPOS_EXPORTACION).iterator(
+            chunk_size=CHUNK_SIZE
+        )
+        
+        if formato == 'csv':
+            contenido = generar_csv(self.CAMPOS_EXPORTACION, filas)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            contenido = generar_ndjson(self.CAMPOS_EXPORTACION, filas)
+            content_type = 'application/x-ndjson; charset=utf-8'
+        
+        response = StreamingHttpResponse(contenido, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="registros_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{formato}"'
+        )
+        return response
+    
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Obtener estadísticas de los registros"""
-        queryset = self.get_queryset()
-        total_registros = queryset.count()
-        total_valor = sum(registro.valor_ajustado for registro in queryset)
+        """
+        Obtener estadísticas de los registros.
         
-        return Response({
-            'total_registros': total_registros,
-            'total_valor': total_valor,
-            'promedio_valor': total_valor / total_registros if total_registros > 0 else 0
-        })
+        Todas las métricas se calculan con agregados en la base de datos sobre
+        los mismos filtros de get_queryset; ninguna fila se carga en memoria.
+        Los desgloses por asesor y por día se limitan con ?limite= (por defecto 50).
+        """
+        queryset = self.get_queryset().order_by()
+        limite = self._get_limite_desglose(request)
+        hace_un_mes = timezone.now() - timedelta(days=30)
+        
+        resumen = queryset.aggregate(
+            total_registros=Count('id'),
+            total_valor=Sum('valor_ajustado'),
+            promedio_valor=Avg('valor_ajustado'),
+            valor_minimo=Min('valor_ajustado'),
+            valor_maximo=Max('valor_ajustado'),
+            registros_ultimo_mes=Count('id', filter=Q(created_at__gte=hace_un_mes)),
+            asesores_activos=Count('asesor_que_ajusto', distinct=True),
+        )
+        resumen['total_valor'] = resumen['total_valor'] or Decimal('0.00')
+        resumen['promedio_valor'] = resumen['promedio_valor'] or Decimal('0.00')
+        
+        resumen['por_asesor'] = queryset.values('asesor_que_ajusto').annotate(
+            total_registros=Count('id'),
+            total_valor=Sum('valor_ajustado'),
+        ).order_by('-total_registros', 'asesor_que_ajusto')[:limite]
+        
+        resumen['por_dia'] = queryset.values('fecha_ajuste').annotate(
+            total_registros=Count('id'),
+            total_valor=Sum('valor_ajustado'),
+        ).order_by('-fecha_ajuste')[:limite]
+        
+        return Response(EstadisticasSerializer(resumen).data)
+    
+    def _get_limite_desglose(self, request, default=50, maximo=500):
+        """Obtener el número máximo de filas para los desgloses de stats"""
+        try:
+            limite = int(request.query_params.get('limite', default))
+        except ValueError:
+            return default
+        return max(1, min(limite, maximo))
     
     @action(detail=False, methods=['get'])
     def asesores(self, request):
         """Obtener lista de asesores únicos"""
-        asesores = RegistroAjuste.objects.values_list('asesor_que_ajusto', flat=True).distinct()
-        return Response({
-            'asesores': list(asesores)
-        })
+        return self._listar_dimension(request, DimensionAsesor, 'asesores')
         
     @action(detail=False, methods=['get'])
     def cuentas(self, request):
         """Obtener lista de cuentas únicas"""
-        cuentas = RegistroAjuste.objects.values_list('id_cuenta', flat=True).distinct()
-        return Response({
-            'cuentas': list(cuentas)
-        })
+        return self._listar_dimension(request, DimensionCuenta, 'cuentas')
+    
+    def _listar_dimension(self, request, modelo, clave_respuesta):
+        """
+        Listar valores de una tabla de dimensión con filtro por prefijo y paginación.
+        
+        Las dimensiones se mantienen al crear, modificar y eliminar registros,
+        por lo que la consulta no depende del tamaño de la tabla de registros.
+        Parámetros: ?prefijo=, ?page=, ?page_size= (por defecto 100, máximo 1000).
+        Soporta GET condicional (ETag/Last-Modified).
+        """
+        campo = modelo.CAMPO_CLAVE
+        queryset = modelo.objects.order_by(campo)
+        
+        prefijo = request.query_params.get('prefijo', '').strip()
+        if prefijo:
+            queryset = queryset.filter(**{f'{campo}__istartswith': prefijo})
+        
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = int(request.query_params.get('page_size', 100))
+        except ValueError:
+            page, page_size = 1, 100
+        page_size = max(1, min(page_size, 1000))
+        
+        def construir_respuesta():
+            inicio = (page - 1) * page_size
+            filas = list(queryset.values(campo, 'total_registros', 'ultima_fecha_ajuste')[inicio:inicio + page_size])
+            
+            return Response({
+                clave_respuesta: [fila[campo] for fila in filas],
+                'detalle': filas,
+                'total': queryset.count(),
+                'page': page,
+                'page_size': page_size,
+            })
+        
+        return self.respuesta_condicional(request, queryset, construir_respuesta)
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet para usuarios compatible con el frontend"""
@@ -0,0 +1,342 @@
+"""
+Importación masiva de ajustes financieros y registros de ajustes desde CSV o Excel.
+
+El archivo se lee en streaming (csv.reader o openpyxl en modo read_only) y
+sus filas se validan por bloques con las reglas puras de
+adjustments.validacion, contra catálogos precargados en diccionarios (sin
+consultas por fila). Con más de un proceso (IMPORT_PROCESSES, por defecto el
+número de CPU) y más de un bloque, los bloques se validan en un
+ProcessPoolExecutor mientras el proceso principal sigue leyendo; el proceso
+principal reúne los resultados en orden y hace los bulk_create por lotes.
+Las filas inválidas no detienen la importación: se reportan con su número de
+fila en el archivo.
+
+Columnas de ajustes financieros (los encabezados no distinguen mayúsculas ni
+tildes, p. ej. "Cuenta Débito" equivale a cuenta_debito):
+
+    fecha_ajuste, fecha_valor, tipo_ajuste, cuenta_debito, cuenta_credito,
+    monto, concepto, descripcion, justificacion                (obligatorias)
+    moneda, prioridad, observaciones, fecha_vencimiento,
+    numero_documento_origen, referencia_externa, centro_costo  (opcionales)
+
+tipo_ajuste se identifica por su código (DEBITO) o su nombre (Débito) y las
+cuentas por su código.
+
+Columnas de registros de ajustes: id_cuenta, id_acuerdo_servicio,
+id_cargo_facturable, fecha_ajuste, asesor_que_ajusto, valor_ajustado y
+justificacion.
+"""
+
+import csv
+import io
+import logging
+import multiprocessing
+import os
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import chain, islice
+
+import openpyxl
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import validacion
+from .frontend_models import RegistroAjuste, DimensionAsesor, DimensionCuenta
+from .models import AjusteFinanciero, CuentaContable, ParticipanteAjuste, TipoAjuste
+from .numeracion import asignador_ajustes
+
+logger = logging.getLogger(__name__)
+
+# Filas por bloque enviado a validar
+TAMANO_BLOQUE = 2000
+
+
+def normalizar_encabezado(encabezado):
+    """'Cuenta Débito ' -> 'cuenta_debito'"""
+    texto = unicodedata.normalize('NFKD', str(encabezado or '')).encode('ascii', 'ignore').decode()
+    return '_'.join(texto.lower().split())
+
+
+def validar_encabezados(encabezados, obligatorias):
+    """
+    Verificar que estén todas las columnas obligatorias.
+
+    Raises:
+        ValueError: Con las columnas faltantes
+    """
+    faltantes = [columna for columna in obligatorias if columna not in encabezados]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+
+
+def leer_csv(archivo, obligatorias):
+    """
+    Iterar las filas de un CSV (UTF-8, con o sin BOM) como diccionarios.
+
+    Args:
+        archivo: Archivo binario (p. ej. UploadedFile)
+        obligatorias (tuple): Columnas que debe tener el encabezado
+
+    Yields:
+        dict: Columna normalizada -> texto (None para las filas vacías)
+    """
+    lector = csv.reader(io.TextIOWrapper(archivo, encoding='utf-8-sig', newline=''))
+    encabezados = [normalizar_encabezado(columna) for columna in next(lector, [])]
+    validar_encabezados(encabezados, obligatorias)
+
+    for fila in lector:
+        if any(valor.strip() for valor in fila):
+            yield dict(zip(encabezados, fila))
+        else:
+            yield None
+
+
+def leer_xlsx(archivo, obligatorias):
+    """
+    Iterar las filas de la hoja activa de un libro de Excel en modo read_only.
+
+    Yields:
+        dict: Columna normalizada -> valor, con fechas y números ya tipados
+            (None para las filas vacías)
+    """
+    workbook = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = workbook.active.iter_rows(values_only=True)
+        encabezados = [normalizar_encabezado(columna) for columna in next(filas, ())]
+        validar_encabezados(encabezados, obligatorias)
+
+        for fila in filas:
+            if any(valor not in (None, '') for valor in fila):
+                yield dict(zip(encabezados, fila))
+            else:
+                yield None
+    finally:
+        workbook.close()
+
+
+def _bloques(filas, tamano):
+    """Agrupar las filas no vacías en listas de (número de fila, fila)"""
+    bloque = []
+    # La fila 1 del archivo son los encabezados
+    for numero, fila in enumerate(filas, start=2):
+        if fila is None:
+            continue
+        bloque.append((numero, fila))
+        if len(bloque) >= tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _longitudes(modelo, campos):
+    return {campo: modelo._meta.get_field(campo).max_length for campo in campos}
+
+
+class Importador:
+    """
+    Base de los importadores: valida por bloques y agrega en lotes.
+
+    Las subclases definen las columnas, la regla de validación pura, su
+    contexto y la inserción de un lote.
+
+    Attributes:
+        usuario (User): Usuario que importa (creador de las filas)
+        tamano_lote (int): Filas por bulk_create (y por transacción)
+        max_errores (int): Errores de fila incluidos en el reporte
+        procesos (int): Procesos de validación (1 valida en el proceso actual)
+    """
+
+    COLUMNAS_OBLIGATORIAS = ()
+    validar = None
+
+    def __init__(self, usuario, tamano_lote=None, max_errores=None, procesos=None):
+        config = getattr(settings, 'ADJUSTMENTS_SETTINGS', {})
+        self.usuario = usuario
+        self.tamano_lote = tamano_lote or config.get('IMPORT_BATCH_SIZE', 2000)
+        self.max_errores = max_errores or config.get('IMPORT_MAX_ERRORS', 1000)
+        self.procesos = procesos or config.get('IMPORT_PROCESSES') or os.cpu_count() or 1
+        self.creados = 0
+        self.total_errores = 0
+        self.errores = []
+
+    def contexto(self):
+        """Datos (picklables) que necesita la regla de validación"""
+        raise NotImplementedError
+
+    def insertar(self, lote):
+        """Crear en la base de datos un lote de filas validadas y retornar cuántas"""
+        raise NotImplementedError
+
+    def importar_archivo(self, archivo, nombre):
+        """Importar un archivo .csv o .xlsx según su extensión"""
+        lector = leer_csv if nombre.endswith('.csv') else leer_xlsx
+        return self.importar(lector(archivo, self.COLUMNAS_OBLIGATORIAS))
+
+    def importar(self, filas):
+        """
+        Importar las filas de leer_csv/leer_xlsx.
+
+        Cada lote se confirma en su propia transacción, de modo que una
+        importación interrumpida conserva los lotes anteriores.
+
+        Returns:
+            dict: Reporte con totales, errores por fila y rendimiento
+        """
+        inicio = time.perf_counter()
+
+        total = 0
+        pendientes = []
+        for resultado in self.validar_por_bloques(filas, self.contexto()):
+            for numero, datos, errores in resultado:
+                total += 1
+                if errores:
+                    self._registrar_error(numero, errores)
+                    continue
+
+                pendientes.append(datos)
+                if len(pendientes) >= self.tamano_lote:
+                    self._insertar(pendientes)
+                    pendientes = []
+
+        if pendientes:
+            self._insertar(pendientes)
+
+        segundos = time.perf_counter() - inicio
+        logger.info(
+            f"Importación {self.__class__.__name__}: {self.creados} creados, "
+            f"{self.total_errores} rechazados en {segundos:.1f} s ({self.procesos} procesos)"
+        )
+
+        return {
+            'total_filas': total,
+            'creados': self.creados,
+            'rechazados': self.total_errores,
+            'errores': self.errores,
+            'errores_omitidos': self.total_errores - len(self.errores),
+            'procesos': self.procesos,
+            'segundos': round(segundos, 3),
+            'filas_por_segundo': round(total / segundos, 1) if segundos else None,
+        }
+
+    def validar_por_bloques(self, filas, contexto):
+        """
+        Validar las filas por bloques de TAMANO_BLOQUE.
+
+        Yields:
+            list: Tuplas (número de fila, datos, errores) de cada bloque, en orden
+        """
+        bloques = _bloques(filas, TAMANO_BLOQUE)
+        if self.procesos > 1:
+            # Un archivo de un solo bloque no compensa crear los procesos
+            iniciales = list(islice(bloques, 2))
+            bloques = chain(iniciales, bloques)
+            if len(iniciales) > 1:
+                yield from self._validar_en_paralelo(bloques, contexto)
+                return
+        for bloque in bloques:
+            yield validacion.validar_filas(self.validar, bloque, contexto)
+
+    def _validar_en_paralelo(self, bloques, contexto):
+        """
+        Validar los bloques en procesos hijos, conservando el orden.
+
+        Se mantienen como máximo dos bloques en vuelo por proceso para que la
+        memoria no dependa del tamaño del archivo. Los procesos se crean con
+        spawn: no heredan conexiones ni hilos del worker.
+        """
+        with ProcessPoolExecutor(
+            max_workers=self.procesos,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=validacion.iniciar_proceso,
+            initargs=(self.validar, contexto),
+        ) as pool:
+            en_vuelo = deque()
+            for bloque in bloques:
+                en_vuelo.append(pool.submit(validacion.validar_en_proceso, bloque))
+                if len(en_vuelo) >= self.procesos * 2:
+                    yield en_vuelo.popleft().result()
+            while en_vuelo:
+                yield en_vuelo.popleft().result()
+
+    def _registrar_error(self, numero, errores):
+        self.total_errores += 1
+        if len(self.errores) < self.max_errores:
+            self.errores.append({'fila': numero, 'errores': errores})
+
+    def _insertar(self, lote):
+        with transaction.atomic():
+            self.creados += self.insertar(lote)
+
+
+class ImportadorAjustes(Importador):
+    """Importa AjusteFinanciero con números de ajuste reservados en bloque"""
+
+    COLUMNAS_OBLIGATORIAS = validacion.COLUMNAS_AJUSTE
+    validar = staticmethod(validacion.validar_ajuste)
+
+    def contexto(self):
+        tipos = {}
+        etiquetas = dict(TipoAjuste.TIPO_CHOICES)
+        for pk, nombre, activo in TipoAjuste.objects.values_list('pk', 'nombre', 'activo'):
+            tipos[nombre.upper()] = (pk, activo)
+            tipos[etiquetas.get(nombre, nombre).upper()] = (pk, activo)
+
+        prioridades = {}
+        for codigo, etiqueta in AjusteFinanciero.PRIORIDAD_CHOICES:
+            prioridades[codigo] = prioridades[etiqueta.upper()] = codigo
+
+        return {
+            'tipos': tipos,
+            'cuentas': {
+                codigo: (pk, activo)
+                for pk, codigo, activo in CuentaContable.objects.values_list('pk', 'codigo', 'activo')
+            },
+            'prioridades': prioridades,
+            'longitudes': _longitudes(
+                AjusteFinanciero,
+                ('moneda', 'concepto', 'numero_documento_origen', 'referencia_externa', 'centro_costo')
+            ),
+            'zona': timezone.get_current_timezone(),
+        }
+
+    def insertar(self, lote):
+        numeros = asignador_ajustes.reservar(len(lote))
+        ajustes = [
+            AjusteFinanciero(numero_ajuste=numero, usuario_creador=self.usuario, **datos)
+            for numero, datos in zip(numeros, lote)
+        ]
+        creados = AjusteFinanciero.objects.bulk_create(ajustes)
+        ParticipanteAjuste.sincronizar(creados, nuevos=True)
+        return len(creados)
+
+
+class ImportadorRegistros(Importador):
+    """Importa RegistroAjuste y actualiza sus dimensiones por lote"""
+
+    COLUMNAS_OBLIGATORIAS = validacion.COLUMNAS_REGISTRO
+    validar = staticmethod(validacion.validar_registro)
+
+    def contexto(self):
+        return {
+            'hoy': date.today(),
+            'valor_maximo': getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('MAX_ADJUSTMENT_VALUE', 10000000),
+            'longitudes': _longitudes(
+                RegistroAjuste,
+                ('id_cuenta', 'id_acuerdo_servicio', 'id_cargo_facturable', 'asesor_que_ajusto', 'justificacion')
+            ),
+        }
+
+    def insertar(self, lote):
+        usuario = self.usuario if self.usuario and self.usuario.is_authenticated else None
+        creados = RegistroAjuste.objects.bulk_create(
+            [RegistroAjuste(**datos, created_by=usuario) for datos in lote],
+            batch_size=500
+        )
+        for dimension in (DimensionAsesor, DimensionCuenta):
+            dimension.ajustar(dimension.cambios_desde_registros(creados))
+        return len(creados)
@@ -0,0 +1,122 @@
+"""
+Benchmark de la exportación a Excel de ajustes.
+
+Compara el libro de solo escritura (escribir_xlsx, usado por
+ExportAjustesView) con el libro tradicional (worksheet.cell() por celda y
+BytesIO) sobre filas sintéticas en memoria, midiendo tiempo, memoria máxima
+(RSS) y tamaño del archivo. Cada medición corre en un proceso hijo para que
+la memoria de una no afecte a la siguiente.
+
+El libro tradicional solo se mide hasta --comparar-hasta filas, porque por
+encima de eso agota la memoria del worker.
+
+Uso:
+    python manage.py benchmark_exportacion_excel --filas 100000 500000 1000000
+"""
+
+import multiprocessing
+import resource
+import time
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+import openpyxl
+from django.core.management.base import BaseCommand
+
+from adjustments.exports import escribir_xlsx
+from adjustments.views import ExportAjustesView
+
+
+class Command(BaseCommand):
+    help = 'Mide la exportación a Excel en modo de solo escritura frente al libro tradicional'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas', type=int, nargs='+', default=[100000, 500000, 1000000],
+            help='Tamaños de exportación a medir'
+        )
+        parser.add_argument(
+            '--comparar-hasta', type=int, default=100000,
+            help='Máximo de filas para medir también el libro tradicional'
+        )
+
+    def handle(self, *args, **options):
+        encabezados = ExportAjustesView.ENCABEZADOS
+
+        for filas in options['filas']:
+            duracion, pico, tamano = self._medir(
+                lambda: self._solo_escritura(encabezados, filas)
+            )
+            self._reportar('Solo escritura', filas, duracion, pico, tamano)
+
+            if filas <= options['comparar_hasta']:
+                duracion, pico, tamano = self._medir(
+                    lambda: self._tradicional(encabezados, filas)
+                )
+                self._reportar('Tradicional', filas, duracion, pico, tamano)
+
+    def _reportar(self, nombre, filas, duracion, pico, tamano):
+        self.stdout.write(
+            f'{nombre:<15} {filas:>10,} filas | {duracion:7.1f} s | '
+            f'RSS máx. {pico / 1024:8.1f} MB | archivo {tamano / 1024 / 1024:6.1f} MB'
+        )
+
+    def _medir(self, funcion):
+        """Retornar (segundos, RSS máximo en KB, tamaño del archivo) medidos en un proceso hijo"""
+        contexto = multiprocessing.get_context('fork')
+        lectura, escritura = contexto.Pipe(duplex=False)
+
+        def ejecutar():
+            inicio = time.perf_counter()
+            tamano = funcion()
+            duracion = time.perf_counter() - inicio
+            escritura.send((duracion, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, tamano))
+
+        proceso = contexto.Process(target=ejecutar)
+        proceso.start()
+        resultado = lectura.recv()
+        proceso.join()
+        return resultado
+
+    def _filas(self, cantidad):
+        """Filas sintéticas con los mismos tipos que produce la vista"""
+        inicio = datetime(2025, 1, 1, 8, 0)
+        for i in range(cantidad):
+            yield (
+                f'AJ{i + 1:08d}',
+                inicio + timedelta(minutes=i),
+                date(2025, 1, 1) + timedelta(days=i % 365),
+                'Corrección',
+                '110505 - Caja general',
+                '220505 - Proveedores nacionales',
+                -1500.25 - (i % 1000),
+                'COP',
+                f'Ajuste por diferencia en facturación {i % 97}',
+                'Aprobado',
+                'Media',
+                f'Usuario {i % 50}',
+            )
+
+    def _solo_escritura(self, encabezados, cantidad):
+        archivo = escribir_xlsx(encabezados, self._filas(cantidad), titulo='Ajustes Financieros')
+        archivo.seek(0, 2)
+        tamano = archivo.tell()
+        archivo.close()
+        return tamano
+
+    def _tradicional(self, encabezados, cantidad):
+        """Implementación anterior: una llamada a cell() por celda y BytesIO"""
+        output = BytesIO()
+        workbook = openpyxl.Workbook()
+        worksheet = workbook.active
+        worksheet.title = 'Ajustes Financieros'
+
+        for col, header in enumerate(encabezados, 1):
+            worksheet.cell(row=1, column=col, value=header)
+
+        for row, fila in enumerate(self._filas(cantidad), 2):
+            for col, valor in enumerate(fila, 1):
+                worksheet.cell(row=row, column=col, value=valor)
+
+        workbook.save(output)
+        return len(output.getvalue())
@@ -0,0 +1,94 @@
+"""
+Microbenchmark de la serialización de listados de RegistroAjuste.
+
+Compara RegistroAjusteSerializer (instancias de modelo) con
+RegistroAjusteLecturaRapida (filas values()) sobre datos en memoria y
+verifica que ambos produzcan el mismo JSON byte a byte.
+
+Uso:
+    python manage.py benchmark_serializacion --filas 1000 --repeticiones 20
+"""
+
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from adjustments.frontend_models import RegistroAjuste
+from adjustments.frontend_serializers import RegistroAjusteSerializer, RegistroAjusteLecturaRapida
+
+
+class Command(BaseCommand):
+    help = 'Compara la serialización estándar y la rápida de RegistroAjuste'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1000, help='Filas por página simulada')
+        parser.add_argument('--repeticiones', type=int, default=20, help='Repeticiones por variante')
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+        repeticiones = options['repeticiones']
+
+        instancias = self._crear_instancias(filas)
+        diccionarios = [
+            {campo: getattr(instancia, campo) for campo in RegistroAjusteLecturaRapida.CAMPOS}
+            for instancia in instancias
+        ]
+        renderer = JSONRenderer()
+
+        def estandar():
+            return renderer.render(RegistroAjusteSerializer(instancias, many=True).data)
+
+        def rapida():
+            return renderer.render(RegistroAjusteLecturaRapida().serializar_muchos(diccionarios))
+
+        if estandar() != rapida():
+            raise CommandError('La serialización rápida no produce el mismo JSON')
+
+        tiempo_estandar = self._medir(estandar, repeticiones)
+        tiempo_rapido = self._medir(rapida, repeticiones)
+
+        self.stdout.write(f'Filas por página: {filas} | repeticiones: {repeticiones}')
+        self.stdout.write(
+            f'RegistroAjusteSerializer:    {tiempo_estandar * 1000:8.2f} ms/página '
+            f'({filas / tiempo_estandar:,.0f} filas/s)'
+        )
+        self.stdout.write(
+            f'RegistroAjusteLecturaRapida: {tiempo_rapido * 1000:8.2f} ms/página '
+            f'({filas / tiempo_rapido:,.0f} filas/s)'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'JSON idéntico; aceleración x{tiempo_estandar / tiempo_rapido:.1f}'
+        ))
+
+    def _medir(self, funcion, repeticiones):
+        """Retornar el mejor tiempo (segundos) entre las repeticiones"""
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor
+
+    def _crear_instancias(self, filas):
+        """Crear registros en memoria con valores variados (sin base de datos)"""
+        ahora = timezone.now()
+        instancias = []
+        for i in range(filas):
+            instancias.append(RegistroAjuste(
+                id=i + 1,
+                id_cuenta=f'CTA-{i % 500:03d}-2025',
+                id_acuerdo_servicio=f'AS-{i:06d}',
+                id_cargo_facturable=f'CF-{i % 97:03d}',
+                fecha_ajuste=date.today() - timedelta(days=i % 365),
+                asesor_que_ajusto=f'Asesor {i % 40}',
+                valor_ajustado=Decimal('-1500.25') * (i % 200 + 1),
+                justificacion='Diferencia detectada en la facturación del periodo anterior',
+                created_at=ahora - timedelta(hours=i),
+                updated_at=ahora - timedelta(minutes=i),
+            ))
+        return instancias
@@ -0,0 +1,86 @@
+"""
+Benchmark de la etapa de validación de la importación masiva.
+
+Valida filas sintéticas de ajustes financieros (o de registros) con distintos
+números de procesos y reporta filas por segundo. Solo mide la validación: no
+inserta nada en la base de datos, aunque usa los catálogos reales (crea un
+tipo y dos cuentas de prueba si no existen).
+
+Uso:
+    python manage.py benchmark_validacion --filas 300000 --procesos 1 2 4 8
+"""
+
+import time
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from adjustments.importacion import ImportadorAjustes, ImportadorRegistros
+from adjustments.models import CuentaContable, TipoAjuste
+
+
+class Command(BaseCommand):
+    help = 'Mide la validación de importaciones con distintos números de procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=300000, help='Filas sintéticas a validar')
+        parser.add_argument('--procesos', type=int, nargs='+', default=[1, 2, 4], help='Procesos a medir')
+        parser.add_argument('--modelo', choices=['ajustes', 'registros'], default='ajustes')
+
+    def handle(self, *args, **options):
+        if options['modelo'] == 'ajustes':
+            clase, filas = ImportadorAjustes, self._filas_ajustes
+            TipoAjuste.objects.get_or_create(nombre='CORRECCION')
+            CuentaContable.objects.get_or_create(
+                codigo='BENCH-D', defaults={'nombre': 'Benchmark débito', 'tipo_cuenta': 'ACTIVO'}
+            )
+            CuentaContable.objects.get_or_create(
+                codigo='BENCH-C', defaults={'nombre': 'Benchmark crédito', 'tipo_cuenta': 'PASIVO'}
+            )
+        else:
+            clase, filas = ImportadorRegistros, self._filas_registros
+
+        usuario = User.objects.filter(is_superuser=True).first()
+        base = None
+        for procesos in options['procesos']:
+            importador = clase(usuario, procesos=procesos)
+            resultados = importador.validar_por_bloques(filas(options['filas']), importador.contexto())
+
+            inicio = time.perf_counter()
+            validas = sum(1 for resultado in resultados for _, datos, _ in resultado if datos)
+            duracion = time.perf_counter() - inicio
+
+            base = base or duracion
+            self.stdout.write(
+                f'{procesos:>3} procesos | {duracion:7.2f} s | {options["filas"] / duracion:10,.0f} filas/s | '
+                f'x{base / duracion:4.1f} | válidas {validas:,}'
+            )
+
+    def _filas_ajustes(self, cantidad):
+        inicio = datetime(2025, 9, 1, 8, 0)
+        for i in range(cantidad):
+            yield {
+                'fecha_ajuste': (inicio + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'),
+                'fecha_valor': '2025-09-30',
+                'tipo_ajuste': 'CORRECCION',
+                'cuenta_debito': 'BENCH-D',
+                'cuenta_credito': 'BENCH-C',
+                'monto': f'-{1500 + i % 1000}.25',
+                'concepto': f'Ajuste por diferencia en facturación {i % 97}',
+                'descripcion': 'Generado por benchmark_validacion',
+                'justificacion': 'Diferencia detectada en el cierre de mes',
+                'prioridad': 'Media',
+            }
+
+    def _filas_registros(self, cantidad):
+        for i in range(cantidad):
+            yield {
+                'id_cuenta': f'CTA-{i % 5000:05d}',
+                'id_acuerdo_servicio': f'AS-{i:07d}',
+                'id_cargo_facturable': 'CF-1',
+                'fecha_ajuste': (date(2025, 1, 1) + timedelta(days=i % 270)).isoformat(),
+                'asesor_que_ajusto': f'Asesor {i % 50}',
+                'valor_ajustado': f'-{100 + i % 1000}.50',
+                'justificacion': 'Diferencia detectada en la facturación del cliente',
+            }
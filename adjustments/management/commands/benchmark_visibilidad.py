@@ -0,0 +1,151 @@
+"""
+Benchmark del filtro de visibilidad de ajustes para usuarios no administradores.
+
+Compara el filtro original (OR sobre usuario_creador, usuario_aprobador y
+usuario_procesador) con la subconsulta sobre el índice de participantes,
+midiendo el COUNT y la primera página para una muestra de usuarios.
+
+Con --generar se crean ajustes sintéticos (y sus participantes) en la base
+de datos configurada; úselo solo en una base de pruebas.
+
+Uso:
+    python manage.py benchmark_visibilidad --generar 1000000 --usuarios 500
+    python manage.py benchmark_visibilidad --muestras 20 --explain
+"""
+
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from adjustments.models import AjusteFinanciero, CuentaContable, ParticipanteAjuste, TipoAjuste
+from adjustments.numeracion import asignador_ajustes
+
+PREFIJO_USUARIO = 'bench_visibilidad_'
+
+
+class Command(BaseCommand):
+    help = 'Compara el filtro OR de visibilidad con el índice de participantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--generar', type=int, default=0, help='Ajustes sintéticos a crear antes de medir')
+        parser.add_argument('--usuarios', type=int, default=200, help='Usuarios sintéticos entre los que se reparten')
+        parser.add_argument('--lote', type=int, default=5000, help='Ajustes por bulk_create al generar')
+        parser.add_argument('--muestras', type=int, default=10, help='Usuarios medidos')
+        parser.add_argument('--page-size', type=int, default=20, help='Filas de la primera página')
+        parser.add_argument('--explain', action='store_true', help='Mostrar el plan de ambas consultas')
+
+    def handle(self, *args, **options):
+        if options['generar']:
+            self._generar(options['generar'], options['usuarios'], options['lote'])
+
+        usuarios = list(User.objects.filter(is_superuser=False, participaciones__isnull=False).distinct()[:1000])
+        if not usuarios:
+            raise CommandError('No hay usuarios con ajustes; use --generar')
+        muestra = random.sample(usuarios, min(options['muestras'], len(usuarios)))
+
+        total = AjusteFinanciero.objects.count()
+        self.stdout.write(f'Ajustes: {total:,} | usuarios medidos: {len(muestra)}')
+
+        variantes = [
+            ('OR de tres columnas', self._filtro_or),
+            ('Índice de participantes', self._filtro_participantes),
+        ]
+        for nombre, filtro in variantes:
+            conteo, pagina = self._medir(filtro, muestra, options['page_size'])
+            self.stdout.write(
+                f'{nombre:<25} COUNT: {conteo * 1000:8.2f} ms | primera página: {pagina * 1000:8.2f} ms'
+            )
+
+        for usuario in muestra[:1]:
+            esperados = set(self._filtro_or(usuario).values_list('id', flat=True))
+            obtenidos = set(self._filtro_participantes(usuario).values_list('id', flat=True))
+            if esperados != obtenidos:
+                raise CommandError(f'Resultados distintos para {usuario.username}; ejecute la sincronización')
+
+        if options['explain']:
+            usuario = muestra[0]
+            for nombre, filtro in variantes:
+                self.stdout.write(f'\n{nombre}:\n{self._pagina(filtro(usuario), options["page_size"]).explain()}')
+
+        self.stdout.write(self.style.SUCCESS('Ambos filtros retornan los mismos ajustes'))
+
+    def _filtro_or(self, usuario):
+        return AjusteFinanciero.objects.filter(
+            Q(usuario_creador=usuario) |
+            Q(usuario_aprobador=usuario) |
+            Q(usuario_procesador=usuario)
+        )
+
+    def _filtro_participantes(self, usuario):
+        return AjusteFinanciero.objects.filter(id__in=ParticipanteAjuste.ajustes_visibles(usuario))
+
+    def _pagina(self, queryset, page_size):
+        return queryset.order_by('-fecha_ajuste', '-numero_ajuste')[:page_size]
+
+    def _medir(self, filtro, usuarios, page_size):
+        """Retornar el tiempo promedio (segundos) de COUNT y de la primera página"""
+        conteo = pagina = 0.0
+        for usuario in usuarios:
+            inicio = time.perf_counter()
+            filtro(usuario).count()
+            conteo += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            list(self._pagina(filtro(usuario), page_size))
+            pagina += time.perf_counter() - inicio
+        return conteo / len(usuarios), pagina / len(usuarios)
+
+    def _generar(self, cantidad, num_usuarios, lote):
+        """Crear ajustes sintéticos repartidos entre usuarios de prueba"""
+        existentes = set(
+            User.objects.filter(username__startswith=PREFIJO_USUARIO).values_list('username', flat=True)
+        )
+        User.objects.bulk_create([
+            User(username=f'{PREFIJO_USUARIO}{i}')
+            for i in range(num_usuarios)
+            if f'{PREFIJO_USUARIO}{i}' not in existentes
+        ])
+        usuarios = list(User.objects.filter(username__startswith=PREFIJO_USUARIO).values_list('id', flat=True))
+
+        tipo, _ = TipoAjuste.objects.get_or_create(nombre='CORRECCION')
+        debito, _ = CuentaContable.objects.get_or_create(
+            codigo='BENCH-D', defaults={'nombre': 'Benchmark débito', 'tipo_cuenta': 'ACTIVO'}
+        )
+        credito, _ = CuentaContable.objects.get_or_create(
+            codigo='BENCH-C', defaults={'nombre': 'Benchmark crédito', 'tipo_cuenta': 'PASIVO'}
+        )
+
+        ahora = timezone.now()
+        creados = 0
+        while creados < cantidad:
+            tamano = min(lote, cantidad - creados)
+            numeros = asignador_ajustes.reservar(tamano)
+            ajustes = []
+            for i, numero in enumerate(numeros):
+                estado = random.choice(['BORRADOR', 'PENDIENTE', 'APROBADO', 'PROCESADO'])
+                ajustes.append(AjusteFinanciero(
+                    numero_ajuste=numero,
+                    fecha_ajuste=ahora - timedelta(minutes=creados + i),
+                    fecha_valor=date.today(),
+                    tipo_ajuste=tipo,
+                    cuenta_debito=debito,
+                    cuenta_credito=credito,
+                    monto=Decimal('-100.00'),
+                    concepto='Ajuste sintético',
+                    descripcion='Generado por benchmark_visibilidad',
+                    justificacion='Generado por benchmark_visibilidad',
+                    estado=estado,
+                    usuario_creador_id=random.choice(usuarios),
+                    usuario_aprobador_id=random.choice(usuarios) if estado in ('APROBADO', 'PROCESADO') else None,
+                    usuario_procesador_id=random.choice(usuarios) if estado == 'PROCESADO' else None,
+                ))
+            ajustes = AjusteFinanciero.objects.bulk_create(ajustes)
+            ParticipanteAjuste.sincronizar(ajustes, nuevos=True)
+            creados += tamano
+            self.stdout.write(f'Generados {creados:,}/{cantidad:,}')
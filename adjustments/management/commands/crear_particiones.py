@@ -0,0 +1,51 @@
+"""
+Crear las particiones mensuales futuras de RegistroAjuste.
+
+Pensado para ejecutarse periódicamente (cron), p. ej. una vez al mes:
+    python manage.py crear_particiones --meses 3
+"""
+
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from adjustments.partitioning import crear_particiones, soporta_particiones
+
+
+class Command(BaseCommand):
+    help = 'Crea las particiones mensuales de registros de ajustes (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int,
+            default=getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('PARTITION_MONTHS_AHEAD', 3),
+            help='Meses a crear después del mes inicial'
+        )
+        parser.add_argument('--desde', help='Mes inicial en formato YYYY-MM (por defecto el actual)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not soporta_particiones(connection):
+            self.stdout.write(self.style.WARNING(
+                f'{connection.vendor}: el particionamiento solo aplica a PostgreSQL; nada que hacer'
+            ))
+            return
+
+        desde = None
+        if options['desde']:
+            try:
+                desde = datetime.strptime(options['desde'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--desde debe tener el formato YYYY-MM')
+
+        try:
+            creadas = crear_particiones(connection, desde=desde, meses=options['meses'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for nombre in creadas:
+            self.stdout.write(f'Creada: {nombre}')
+        self.stdout.write(self.style.SUCCESS(f'{len(creadas)} particiones creadas'))
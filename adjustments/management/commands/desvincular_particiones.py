@@ -0,0 +1,42 @@
+"""
+Desvincular (o eliminar) las particiones antiguas de RegistroAjuste.
+
+Uso:
+    python manage.py desvincular_particiones --antes-de 2024-01
+    python manage.py desvincular_particiones --antes-de 2024-01 --eliminar
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from adjustments.partitioning import desvincular_particiones, soporta_particiones
+
+
+class Command(BaseCommand):
+    help = 'Desvincula las particiones mensuales anteriores a un mes (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--antes-de', required=True, help='Mes límite en formato YYYY-MM (no incluido)')
+        parser.add_argument('--eliminar', action='store_true', help='Eliminar las tablas desvinculadas')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not soporta_particiones(connection):
+            self.stdout.write(self.style.WARNING(
+                f'{connection.vendor}: el particionamiento solo aplica a PostgreSQL; nada que hacer'
+            ))
+            return
+
+        try:
+            antes_de = datetime.strptime(options['antes_de'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError('--antes-de debe tener el formato YYYY-MM')
+
+        desvinculadas = desvincular_particiones(connection, antes_de, eliminar=options['eliminar'])
+
+        for nombre in desvinculadas:
+            self.stdout.write(f"{'Eliminada' if options['eliminar'] else 'Desvinculada'}: {nombre}")
+        self.stdout.write(self.style.SUCCESS(f'{len(desvinculadas)} particiones procesadas'))
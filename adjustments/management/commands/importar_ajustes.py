@@ -0,0 +1,68 @@
+"""
+Importar ajustes financieros o registros de ajustes desde un archivo CSV o Excel.
+
+Usa el mismo motor que POST /api/adjustments/import/ (o /api/registros/importar/
+con --modelo registros), sin el límite de tiempo de la petición; pensado para
+los archivos de cierre de mes:
+    python manage.py importar_ajustes cierre_2025_09.xlsx --usuario contabilidad --procesos 4
+"""
+
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from adjustments.importacion import ImportadorAjustes, ImportadorRegistros
+
+IMPORTADORES = {
+    'ajustes': ImportadorAjustes,
+    'registros': ImportadorRegistros,
+}
+
+
+class Command(BaseCommand):
+    help = 'Importa ajustes financieros o registros de ajustes desde un archivo CSV o Excel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument('--usuario', required=True, help='Username del usuario creador')
+        parser.add_argument('--modelo', choices=sorted(IMPORTADORES), default='ajustes', help='Tipo de filas del archivo')
+        parser.add_argument('--lote', type=int, help='Filas por bulk_create (por defecto IMPORT_BATCH_SIZE)')
+        parser.add_argument('--procesos', type=int, help='Procesos de validación (por defecto IMPORT_PROCESSES)')
+        parser.add_argument('--reporte', help='Ruta donde guardar el reporte completo en JSON')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        if not ruta.endswith(('.csv', '.xlsx')):
+            raise CommandError('Solo se permiten archivos CSV o Excel')
+
+        try:
+            usuario = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f"El usuario {options['usuario']} no existe")
+
+        # En línea de comandos el reporte incluye todos los errores
+        importador = IMPORTADORES[options['modelo']](
+            usuario, tamano_lote=options['lote'], max_errores=float('inf'), procesos=options['procesos']
+        )
+
+        try:
+            with open(ruta, 'rb') as archivo:
+                resultado = importador.importar_archivo(archivo, ruta)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in resultado['errores'][:20]:
+            self.stdout.write(self.style.WARNING(f"Fila {error['fila']}: {error['errores']}"))
+        if resultado['rechazados'] > 20:
+            self.stdout.write(f"... y {resultado['rechazados'] - 20} filas rechazadas más")
+
+        if options['reporte']:
+            with open(options['reporte'], 'w', encoding='utf-8') as salida:
+                json.dump(resultado, salida, ensure_ascii=False, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['creados']:,} de {resultado['total_filas']:,} filas importadas "
+            f"en {resultado['segundos']:.1f} s ({resultado['filas_por_segundo'] or 0:,.0f} filas/s, "
+            f"{resultado['procesos']} procesos)"
+        ))
@@ -0,0 +1,135 @@
+"""
+Eliminar los blobs de adjuntos que ya no tienen referencias.
+
+Cada blob sin referencias (y sin ArchivoAdjunto que apunte a él) se bloquea
+y se elimina su fila en una transacción por blob; su archivo se borra cuando
+la transacción confirma, de modo que un error no deja filas sin archivo. Una
+carga simultánea del mismo contenido espera el bloqueo y crea un blob nuevo.
+
+Con --huerfanos también se eliminan los archivos del directorio de blobs sin
+fila en la base de datos (cargas interrumpidas) más antiguos que --horas.
+
+Con --vincular, los adjuntos anteriores a la deduplicación (sin blob) se
+leen, se enlazan con el blob de su contenido y su archivo original se
+elimina; así los duplicados existentes también se comparten y se recolectan.
+
+Uso:
+    python manage.py limpiar_blobs_adjuntos --dry-run
+    python manage.py limpiar_blobs_adjuntos --vincular
+    python manage.py limpiar_blobs_adjuntos --huerfanos --horas 24
+"""
+
+from datetime import timedelta
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from adjustments.adjuntos import calcular_sha256
+from adjustments.models import ArchivoAdjunto, BlobAdjunto
+
+
+class Command(BaseCommand):
+    help = 'Elimina los blobs de adjuntos sin referencias y sus archivos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se eliminaría')
+        parser.add_argument('--huerfanos', action='store_true', help='Eliminar también archivos sin blob')
+        parser.add_argument('--horas', type=int, default=24, help='Antigüedad mínima de los archivos huérfanos')
+        parser.add_argument('--vincular', action='store_true', help='Enlazar con su blob los adjuntos sin blob')
+
+    def handle(self, *args, **options):
+        self.storage = BlobAdjunto._meta.get_field('archivo').storage
+        dry_run = options['dry_run']
+
+        if options['vincular']:
+            vinculados = self._vincular(dry_run)
+            self.stdout.write(self.style.SUCCESS(
+                f"{'Se vincularían' if dry_run else 'Vinculados'} {vinculados} adjuntos sin blob"
+            ))
+
+        eliminados, liberados = self._recolectar(dry_run)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Se eliminarían' if dry_run else 'Eliminados'} {eliminados} blobs "
+            f"({liberados / 1024 / 1024:.1f} MB)"
+        ))
+
+        if options['huerfanos']:
+            huerfanos = self._huerfanos(timezone.now() - timedelta(hours=options['horas']), dry_run)
+            self.stdout.write(self.style.SUCCESS(
+                f"{'Se eliminarían' if dry_run else 'Eliminados'} {huerfanos} archivos huérfanos"
+            ))
+
+    def _candidatos(self):
+        return BlobAdjunto.objects.filter(referencias=0, adjuntos__isnull=True)
+
+    def _recolectar(self, dry_run):
+        eliminados = liberados = 0
+        for pk in list(self._candidatos().values_list('pk', flat=True)):
+            with transaction.atomic():
+                blob = self._candidatos().select_for_update(of=('self',)).filter(pk=pk).first()
+                if blob is None:
+                    # Se volvió a referenciar
+                    continue
+                if not dry_run:
+                    blob.delete()
+                    transaction.on_commit(partial(self.storage.delete, blob.archivo.name))
+            eliminados += 1
+            liberados += blob.tamaño
+        return eliminados, liberados
+
+    def _vincular(self, dry_run):
+        """Enlazar con el blob de su contenido los adjuntos guardados sin blob"""
+        vinculados = 0
+        for pk in list(ArchivoAdjunto.objects.filter(blob__isnull=True).values_list('pk', flat=True)):
+            adjunto = ArchivoAdjunto.objects.only('archivo').filter(pk=pk).first()
+            if adjunto is None:
+                continue
+            anterior = adjunto.archivo.name
+            try:
+                with adjunto.archivo.open('rb') as archivo:
+                    sha256 = calcular_sha256(archivo)
+                    if dry_run:
+                        vinculados += 1
+                        continue
+                    with transaction.atomic():
+                        blob = BlobAdjunto.referenciar(archivo, sha256)
+                        if not ArchivoAdjunto.objects.filter(pk=adjunto.pk, blob__isnull=True).update(
+                            blob=blob, archivo=blob.archivo.name
+                        ):
+                            # Vinculado por otra ejecución mientras se leía
+                            transaction.set_rollback(True)
+                            continue
+                        if anterior != blob.archivo.name and not ArchivoAdjunto.objects.filter(
+                            archivo=anterior
+                        ).exists():
+                            transaction.on_commit(partial(adjunto.archivo.storage.delete, anterior))
+            except FileNotFoundError:
+                self.stderr.write(self.style.WARNING(f'Adjunto {adjunto.pk}: no existe {anterior}'))
+                continue
+            vinculados += 1
+        return vinculados
+
+    def _huerfanos(self, limite, dry_run):
+        """Archivos de ajustes/blobs/xx/yy/ sin fila en BlobAdjunto"""
+        eliminados = 0
+        for nombre in self._archivos(BlobAdjunto.DIRECTORIO):
+            if BlobAdjunto.objects.filter(archivo=nombre).exists():
+                continue
+            if self.storage.get_modified_time(nombre) > limite:
+                # Puede ser una carga en curso
+                continue
+            if not dry_run:
+                self.storage.delete(nombre)
+            eliminados += 1
+        return eliminados
+
+    def _archivos(self, directorio):
+        if not self.storage.exists(directorio):
+            return
+        subdirectorios, archivos = self.storage.listdir(directorio)
+        for archivo in archivos:
+            yield f'{directorio}/{archivo}'
+        for subdirectorio in subdirectorios:
+            yield from self._archivos(f'{directorio}/{subdirectorio}')
@@ -0,0 +1,34 @@
+"""
+Convertir la tabla de RegistroAjuste en una tabla particionada por mes.
+
+Uso:
+    python manage.py particionar_registros --meses-futuros 3
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from adjustments.partitioning import convertir_a_particionada, soporta_particiones
+
+
+class Command(BaseCommand):
+    help = 'Convierte la tabla de registros de ajustes en particionada por mes (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses-futuros', type=int, default=3, help='Meses futuros a crear de antemano')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not soporta_particiones(connection):
+            self.stdout.write(self.style.WARNING(
+                f'{connection.vendor}: el particionamiento solo aplica a PostgreSQL; la tabla queda sin cambios'
+            ))
+            return
+
+        try:
+            creadas = convertir_a_particionada(connection, meses_futuros=options['meses_futuros'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'Tabla particionada con {creadas} particiones mensuales'))
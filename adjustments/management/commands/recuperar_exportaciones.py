@@ -0,0 +1,29 @@
+"""
+Marcar como ERROR las exportaciones en segundo plano que quedaron sin terminar.
+
+El pool de hilos de adjustments.tareas vive en cada worker de gunicorn; si el
+worker se recicla a mitad de una exportación, su ReportExecution queda en
+PROCESANDO. Pensado para ejecutarse periódicamente (cron) o después de un
+despliegue:
+    python manage.py recuperar_exportaciones --minutos 60
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from adjustments.tareas import recuperar_exportaciones
+
+
+class Command(BaseCommand):
+    help = 'Marca como ERROR las exportaciones de ajustes que no terminaron a tiempo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutos', type=int,
+            default=getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('EXPORT_TIMEOUT_MINUTES', 60),
+            help='Antigüedad mínima de las exportaciones sin terminar'
+        )
+
+    def handle(self, *args, **options):
+        recuperadas = recuperar_exportaciones(minutos=options['minutos'])
+        self.stdout.write(self.style.SUCCESS(f'{recuperadas} exportaciones marcadas como ERROR'))
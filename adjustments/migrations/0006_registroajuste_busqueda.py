@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def instalar_indice(apps, schema_editor):
+    from adjustments.search import instalar_indice
+    instalar_indice(schema_editor)
+
+
+def desinstalar_indice(apps, schema_editor):
+    from adjustments.search import desinstalar_indice
+    desinstalar_indice(schema_editor)
+
+
+class Migration(migrations.Migration):
+    """
+    Índice de texto completo para la búsqueda de registros.
+
+    PostgreSQL: columna tsvector + trigger + índice GIN.
+    SQLite: tabla virtual FTS5 con triggers de sincronización.
+    """
+
+    dependencies = [
+        ('adjustments', '0005_remove_obs_adicional'),
+    ]
+
+    operations = [
+        migrations.RunPython(instalar_indice, desinstalar_indice),
+    ]
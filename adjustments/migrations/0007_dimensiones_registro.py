@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-17 02:43
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def poblar_dimensiones(apps, schema_editor):
+    RegistroAjuste = apps.get_model('adjustments', 'RegistroAjuste')
+    DimensionAsesor = apps.get_model('adjustments', 'DimensionAsesor')
+    DimensionCuenta = apps.get_model('adjustments', 'DimensionCuenta')
+
+    for modelo, campo_clave, campo_registro in (
+        (DimensionAsesor, 'nombre', 'asesor_que_ajusto'),
+        (DimensionCuenta, 'id_cuenta', 'id_cuenta'),
+    ):
+        filas = RegistroAjuste.objects.order_by().values(campo_registro).annotate(
+            total=Count('id'), ultima=Max('fecha_ajuste')
+        )
+        modelo.objects.bulk_create(
+            [
+                modelo(**{
+                    campo_clave: fila[campo_registro],
+                    'total_registros': fila['total'],
+                    'ultima_fecha_ajuste': fila['ultima'],
+                })
+                for fila in filas.iterator(chunk_size=2000)
+            ],
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adjustments', '0006_registroajuste_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DimensionAsesor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_registros', models.IntegerField(default=0, verbose_name='Total de Registros')),
+                ('ultima_fecha_ajuste', models.DateField(blank=True, null=True, verbose_name='Última Fecha de Ajuste')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+                ('nombre', models.CharField(max_length=100, unique=True, verbose_name='Asesor')),
+            ],
+            options={
+                'verbose_name': 'Dimensión de Asesor',
+                'verbose_name_plural': 'Dimensión de Asesores',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DimensionCuenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_registros', models.IntegerField(default=0, verbose_name='Total de Registros')),
+                ('ultima_fecha_ajuste', models.DateField(blank=True, null=True, verbose_name='Última Fecha de Ajuste')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+                ('id_cuenta', models.CharField(max_length=50, unique=True, verbose_name='ID de Cuenta')),
+            ],
+            options={
+                'verbose_name': 'Dimensión de Cuenta',
+                'verbose_name_plural': 'Dimensión de Cuentas',
+                'ordering': ['id_cuenta'],
+            },
+        ),
+        migrations.RunPython(poblar_dimensiones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adjustments', '0007_dimensiones_registro'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registroajuste',
+            index=models.Index(fields=['updated_at'], name='idx_updated_at'),
+        ),
+    ]
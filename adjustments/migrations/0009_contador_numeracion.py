@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-17 02:51
+
+from django.db import migrations, models
+
+# Copias de adjustments.numeracion a la fecha de esta migración: la migración
+# no debe cambiar si el módulo cambia después
+SECUENCIA = 'adjustments_numero_ajuste_seq'
+CONTADOR = 'numero_ajuste'
+PREFIJO = 'AJ'
+
+
+def ultimo_valor_existente(AjusteFinanciero, alias):
+    """Mayor número asignado (ancho fijo: el máximo lexicográfico es el numérico)"""
+    numero = (
+        AjusteFinanciero.objects.using(alias)
+        .filter(numero_ajuste__startswith=PREFIJO)
+        .order_by('-numero_ajuste')
+        .values_list('numero_ajuste', flat=True)
+        .first()
+    )
+    if numero and numero[len(PREFIJO):].isdigit():
+        return int(numero[len(PREFIJO):])
+    return 0
+
+
+def inicializar_numeracion(apps, schema_editor):
+    """Continuar la numeración a partir del mayor numero_ajuste existente"""
+    AjusteFinanciero = apps.get_model('adjustments', 'AjusteFinanciero')
+    ContadorNumeracion = apps.get_model('adjustments', 'ContadorNumeracion')
+    alias = schema_editor.connection.alias
+    ultimo = ultimo_valor_existente(AjusteFinanciero, alias)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {SECUENCIA} START WITH {ultimo + 1}")
+    else:
+        ContadorNumeracion.objects.using(alias).create(nombre=CONTADOR, ultimo_valor=ultimo)
+
+
+def eliminar_secuencia(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {SECUENCIA}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adjustments', '0008_registroajuste_idx_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorNumeracion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('ultimo_valor', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de Numeración',
+                'verbose_name_plural': 'Contadores de Numeración',
+            },
+        ),
+        migrations.RunPython(inicializar_numeracion, eliminar_secuencia),
+    ]
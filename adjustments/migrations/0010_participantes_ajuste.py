@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-17 02:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def poblar_participantes(apps, schema_editor):
+    """Copiar los tres usuarios de cada ajuste con INSERT ... SELECT (sin cargar filas)"""
+    AjusteFinanciero = apps.get_model('adjustments', 'AjusteFinanciero')
+    ParticipanteAjuste = apps.get_model('adjustments', 'ParticipanteAjuste')
+    ajustes = AjusteFinanciero._meta.db_table
+    participantes = ParticipanteAjuste._meta.db_table
+
+    for rol, columna in (
+        ('CREADOR', 'usuario_creador_id'),
+        ('APROBADOR', 'usuario_aprobador_id'),
+        ('PROCESADOR', 'usuario_procesador_id'),
+    ):
+        schema_editor.execute(
+            f"INSERT INTO {participantes} (ajuste_id, usuario_id, rol) "
+            f"SELECT id, {columna}, %s FROM {ajustes} WHERE {columna} IS NOT NULL",
+            [rol]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adjustments', '0009_contador_numeracion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipanteAjuste',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rol', models.CharField(choices=[('CREADOR', 'Creador'), ('APROBADOR', 'Aprobador'), ('PROCESADOR', 'Procesador')], max_length=10)),
+                ('ajuste', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participantes', to='adjustments.ajustefinanciero')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participaciones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Participante de Ajuste',
+                'verbose_name_plural': 'Participantes de Ajustes',
+                'indexes': [models.Index(fields=['usuario', 'ajuste'], name='idx_participante_usuario')],
+                'constraints': [models.UniqueConstraint(fields=('ajuste', 'rol'), name='uniq_participante_ajuste_rol')],
+            },
+        ),
+        migrations.RunPython(poblar_participantes, migrations.RunPython.noop),
+    ]
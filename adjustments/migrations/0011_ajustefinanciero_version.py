@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adjustments', '0010_participantes_ajuste'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ajustefinanciero',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adjustments', '0011_ajustefinanciero_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ajustefinanciero',
+            name='reclamado_hasta',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ajustefinanciero',
+            name='reclamado_por',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ajustes_reclamados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='ajustefinanciero',
+            index=models.Index(models.Case(models.When(prioridad='URGENTE', then=models.Value(0)), models.When(prioridad='ALTA', then=models.Value(1)), models.When(prioridad='MEDIA', then=models.Value(2)), models.When(prioridad='BAJA', then=models.Value(3)), default=models.Value(4)), models.F('created_at'), condition=models.Q(('estado', 'PENDIENTE')), name='ajuste_cola_pendiente_idx'),
+        ),
+    ]
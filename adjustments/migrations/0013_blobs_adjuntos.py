@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-17 03:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adjustments', '0012_cola_aprobacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobAdjunto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('archivo', models.FileField(upload_to='')),
+                ('tamaño', models.PositiveBigIntegerField(help_text='Tamaño en bytes')),
+                ('referencias', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Blob de Adjunto',
+                'verbose_name_plural': 'Blobs de Adjuntos',
+                'indexes': [models.Index(condition=models.Q(('referencias', 0)), fields=['id'], name='blob_sin_referencias_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivoadjunto',
+            name='blob',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='adjuntos', to='adjustments.blobadjunto'),
+        ),
+    ]
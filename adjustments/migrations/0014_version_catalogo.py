@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-17 03:58
+
+from django.db import migrations, models
+
+# Fila que adjustments.catalogos usaba en ContadorNumeracion
+NOMBRE_VERSION = 'catalogos'
+
+
+def mover_version(apps, schema_editor):
+    """Llevar la versión de los catálogos de ContadorNumeracion a VersionCatalogo"""
+    ContadorNumeracion = apps.get_model('adjustments', 'ContadorNumeracion')
+    VersionCatalogo = apps.get_model('adjustments', 'VersionCatalogo')
+    alias = schema_editor.connection.alias
+    contador = ContadorNumeracion.objects.using(alias).filter(nombre=NOMBRE_VERSION).first()
+    if contador is not None:
+        VersionCatalogo.objects.using(alias).create(nombre=NOMBRE_VERSION, version=contador.ultimo_valor)
+        contador.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adjustments', '0013_blobs_adjuntos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versión de Catálogo',
+                'verbose_name_plural': 'Versiones de Catálogos',
+            },
+        ),
+        migrations.RunPython(mover_version, migrations.RunPython.noop),
+    ]
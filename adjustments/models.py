@@ -1,10 +1,11 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
 # Importar el nuevo modelo compatible con el frontend
-from .frontend_models import RegistroAjuste
+from .frontend_models import RegistroAjuste, DimensionAsesor, DimensionCuenta
 
 class TipoAjuste(models.Model):
     """Tipos de ajustes financieros disponibles"""
@@ -54,6 +55,16 @@ class CuentaContable(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
 
+def rango_prioridad():
+    """Expresión 0 (URGENTE) .. 3 (BAJA) para ordenar la cola de aprobación"""
+    return models.Case(
+        *(
+            models.When(prioridad=codigo, then=models.Value(rango))
+            for rango, codigo in enumerate(('URGENTE', 'ALTA', 'MEDIA', 'BAJA'))
+        ),
+        default=models.Value(4),
+    )
+
 class AjusteFinanciero(models.Model):
     """Modelo principal para registrar ajustes financieros"""
     ESTADO_CHOICES = [
@@ -72,6 +83,9 @@ class AjusteFinanciero(models.Model):
         ('URGENTE', 'Urgente'),
     ]
     
+    # Estados en los que el ajuste se puede editar o eliminar
+    ESTADOS_EDITABLES = ('BORRADOR', 'RECHAZADO')
+    
     # Información básica
     numero_ajuste = models.CharField(max_length=20, unique=True, editable=False)
     fecha_ajuste = models.DateTimeField()
@@ -141,11 +155,25 @@ class AjusteFinanciero(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Control de concurrencia optimista (ver guardar_con_version)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    
     # Campos adicionales para trazabilidad
     numero_documento_origen = models.CharField(max_length=50, blank=True)
     referencia_externa = models.CharField(max_length=100, blank=True)
     centro_costo = models.CharField(max_length=50, blank=True)
     
+    # Cola de aprobación: aprobador que tomó el ajuste y fin de su reserva
+    reclamado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='ajustes_reclamados',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    reclamado_hasta = models.DateTimeField(null=True, blank=True, editable=False)
+    
     class Meta:
         verbose_name = "Ajuste Financiero"
         verbose_name_plural = "Ajustes Financieros"
@@ -156,21 +184,64 @@ class AjusteFinanciero(models.Model):
             models.Index(fields=['estado']),
             models.Index(fields=['tipo_ajuste']),
             models.Index(fields=['usuario_creador']),
+            # Solo el conjunto pendiente, en el orden de la cola de aprobación
+            models.Index(
+                rango_prioridad(), 'created_at',
+                condition=models.Q(estado='PENDIENTE'),
+                name='ajuste_cola_pendiente_idx'
+            ),
         ]
     
     def save(self, *args, **kwargs):
         if not self.numero_ajuste:
-            # Generar número de ajuste automáticamente
-            ultimo_numero = AjusteFinanciero.objects.count() + 1
-            self.numero_ajuste = f"AJ{ultimo_numero:08d}"
+            # Generar número de ajuste desde el bloque reservado por el proceso
+            from .numeracion import asignador_ajustes
+            self.numero_ajuste = asignador_ajustes.siguiente(using=kwargs.get('using'))
+        if not self._state.adding:
+            # Toda escritura invalida la versión que tengan los clientes
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.numero_ajuste} - {self.concepto}"
     
+    def guardar_con_version(self, update_fields):
+        """
+        Guardar solo update_fields si nadie modificó el ajuste desde que se leyó.
+        
+        Ejecuta UPDATE ... WHERE id = ? AND version = ? (compare-and-swap) e
+        incrementa la versión, sin bloquear la fila mientras se valida. Como
+        update() no emite post_save, sincroniza los participantes si cambió
+        algún usuario.
+        
+        Args:
+            update_fields (list): Campos modificados en la instancia
+        
+        Returns:
+            bool: False si la versión cambió (conflicto) y no se guardó nada
+        """
+        self.updated_at = timezone.now()
+        campos = {campo: getattr(self, campo) for campo in update_fields}
+        campos['updated_at'] = self.updated_at
+        
+        actualizadas = type(self).objects.filter(pk=self.pk, version=self.version).update(
+            version=models.F('version') + 1, **campos
+        )
+        if not actualizadas:
+            return False
+        
+        self.version += 1
+        if any(campo in ParticipanteAjuste.CAMPOS_ROL.values() for campo in (
+            self._meta.get_field(nombre).attname for nombre in update_fields
+        )):
+            ParticipanteAjuste.sincronizar([self])
+        return True
+    
     @property
     def puede_ser_editado(self):
-        return self.estado in ['BORRADOR', 'RECHAZADO']
+        return self.estado in self.ESTADOS_EDITABLES
     
     @property
     def puede_ser_aprobado(self):
@@ -180,6 +251,121 @@ class AjusteFinanciero(models.Model):
     def puede_ser_procesado(self):
         return self.estado == 'APROBADO'
 
+class ContadorNumeracion(models.Model):
+    """Contador para reservar bloques de números (motores sin secuencias)"""
+    nombre = models.CharField(max_length=50, unique=True)
+    ultimo_valor = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Contador de Numeración"
+        verbose_name_plural = "Contadores de Numeración"
+    
+    def __str__(self):
+        return f"{self.nombre}: {self.ultimo_valor}"
+
+class VersionCatalogo(models.Model):
+    """
+    Versión compartida de un catálogo en memoria (ver adjustments.catalogos).
+
+    Cada cambio del catálogo la incrementa para que todos los workers lo
+    recarguen, sin depender del backend de caché.
+    """
+    nombre = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versión de Catálogo"
+        verbose_name_plural = "Versiones de Catálogos"
+
+    def __str__(self):
+        return f"{self.nombre}: v{self.version}"
+
+class ParticipanteAjuste(models.Model):
+    """
+    Usuarios involucrados en cada ajuste (índice de visibilidad).
+    
+    Replica usuario_creador, usuario_aprobador y usuario_procesador como filas
+    para que "ajustes donde participa el usuario" se resuelva con un único
+    índice (usuario, ajuste) en lugar de un OR sobre tres columnas. Se mantiene
+    con señales al guardar un ajuste; las operaciones masivas deben llamar a
+    `sincronizar` explícitamente.
+    """
+    ROL_CHOICES = [
+        ('CREADOR', 'Creador'),
+        ('APROBADOR', 'Aprobador'),
+        ('PROCESADOR', 'Procesador'),
+    ]
+    
+    # Rol -> campo de AjusteFinanciero que lo define
+    CAMPOS_ROL = {
+        'CREADOR': 'usuario_creador_id',
+        'APROBADOR': 'usuario_aprobador_id',
+        'PROCESADOR': 'usuario_procesador_id',
+    }
+    
+    ajuste = models.ForeignKey(AjusteFinanciero, on_delete=models.CASCADE, related_name='participantes')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='participaciones')
+    rol = models.CharField(max_length=10, choices=ROL_CHOICES)
+    
+    class Meta:
+        verbose_name = "Participante de Ajuste"
+        verbose_name_plural = "Participantes de Ajustes"
+        constraints = [
+            models.UniqueConstraint(fields=['ajuste', 'rol'], name='uniq_participante_ajuste_rol'),
+        ]
+        indexes = [
+            models.Index(fields=['usuario', 'ajuste'], name='idx_participante_usuario'),
+        ]
+    
+    def __str__(self):
+        return f"{self.ajuste_id} - {self.usuario_id} ({self.rol})"
+    
+    @classmethod
+    def ajustes_visibles(cls, usuario):
+        """Subconsulta con los ids de los ajustes donde participa el usuario"""
+        return cls.objects.filter(usuario=usuario).values('ajuste_id')
+    
+    @classmethod
+    def sincronizar(cls, ajustes, nuevos=False, lote=1000):
+        """
+        Alinear las filas de participantes con los usuarios de los ajustes.
+        
+        Args:
+            ajustes (iterable): Instancias de AjusteFinanciero ya guardadas
+            nuevos (bool): Los ajustes se acaban de crear (no hay filas previas)
+            lote (int): Ajustes procesados por consulta
+        """
+        ajustes = list(ajustes)
+        for inicio in range(0, len(ajustes), lote):
+            bloque = ajustes[inicio:inicio + lote]
+            
+            deseados = {}
+            for ajuste in bloque:
+                for rol, campo in cls.CAMPOS_ROL.items():
+                    usuario_id = getattr(ajuste, campo)
+                    if usuario_id:
+                        deseados[(ajuste.pk, rol)] = usuario_id
+            
+            eliminar = []
+            if not nuevos:
+                existentes = cls.objects.filter(
+                    ajuste_id__in=[ajuste.pk for ajuste in bloque]
+                ).values_list('pk', 'ajuste_id', 'rol', 'usuario_id')
+                
+                for pk, ajuste_id, rol, usuario_id in existentes:
+                    if deseados.get((ajuste_id, rol)) == usuario_id:
+                        del deseados[(ajuste_id, rol)]
+                    else:
+                        eliminar.append(pk)
+            
+            if eliminar:
+                cls.objects.filter(pk__in=eliminar).delete()
+            if deseados:
+                cls.objects.bulk_create([
+                    cls(ajuste_id=ajuste_id, rol=rol, usuario_id=usuario_id)
+                    for (ajuste_id, rol), usuario_id in deseados.items()
+                ])
+
 class HistorialAjuste(models.Model):
     """Historial de cambios de estado de los ajustes"""
     ajuste = models.ForeignKey(AjusteFinanciero, on_delete=models.CASCADE, related_name='historial')
@@ -197,11 +383,109 @@ class HistorialAjuste(models.Model):
     def __str__(self):
         return f"{self.ajuste.numero_ajuste} - {self.estado_anterior} → {self.estado_nuevo}"
 
+class BlobAdjunto(models.Model):
+    """
+    Contenido de los archivos adjuntos, guardado una sola vez por SHA-256.
+    
+    Varios ArchivoAdjunto pueden apuntar al mismo blob; `referencias` cuenta
+    cuántos. Los blobs sin referencias los elimina el comando
+    limpiar_blobs_adjuntos.
+    """
+    DIRECTORIO = 'ajustes/blobs'
+    
+    sha256 = models.CharField(max_length=64, unique=True)
+    archivo = models.FileField()
+    tamaño = models.PositiveBigIntegerField(help_text="Tamaño en bytes")
+    referencias = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Blob de Adjunto"
+        verbose_name_plural = "Blobs de Adjuntos"
+        indexes = [
+            # Candidatos a recolección
+            models.Index(fields=['id'], condition=models.Q(referencias=0), name='blob_sin_referencias_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.referencias} referencias)"
+    
+    @classmethod
+    def ruta(cls, sha256):
+        """ajustes/blobs/ab/cd/abcd... (dos niveles para no saturar un directorio)"""
+        return f"{cls.DIRECTORIO}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+    
+    @classmethod
+    def referenciar(cls, archivo, sha256):
+        """
+        Obtener el blob con el contenido de `archivo` y sumarle una referencia.
+        
+        Si el contenido ya existe no se vuelve a escribir. El UPDATE de la
+        referencia bloquea la fila, de modo que la recolección no puede
+        eliminar el blob mientras se referencia.
+        
+        Args:
+            archivo (File): Archivo subido (se copia por bloques)
+            sha256 (str): Hash hexadecimal del contenido
+        
+        Returns:
+            BlobAdjunto: Blob con la referencia ya contada
+        """
+        with transaction.atomic():
+            if cls.objects.filter(sha256=sha256).update(referencias=models.F('referencias') + 1):
+                return cls.objects.get(sha256=sha256)
+            
+            storage = cls._meta.get_field('archivo').storage
+            nombre = cls.ruta(sha256)
+            if not storage.exists(nombre):
+                archivo.seek(0)
+                nombre = storage.save(nombre, archivo)
+            
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(sha256=sha256, archivo=nombre, tamaño=archivo.size, referencias=1)
+            except IntegrityError:
+                # Otro proceso creó el mismo blob al mismo tiempo
+                cls.objects.filter(sha256=sha256).update(referencias=models.F('referencias') + 1)
+                return cls.objects.get(sha256=sha256)
+    
+    @classmethod
+    def descontar(cls, adjuntos):
+        """
+        Restar las referencias de un queryset de ArchivoAdjunto que se va a
+        eliminar sin señales (p. ej. con _raw_delete).
+        
+        Returns:
+            int: Blobs actualizados
+        """
+        por_cantidad = {}
+        conteos = (
+            adjuntos.filter(blob__isnull=False).order_by()
+            .values('blob').annotate(cantidad=models.Count('pk'))
+        )
+        for fila in conteos:
+            por_cantidad.setdefault(fila['cantidad'], []).append(fila['blob'])
+        
+        # Un UPDATE por cada cantidad distinta (casi siempre una sola)
+        return sum(
+            cls.objects.filter(pk__in=ids).update(referencias=models.F('referencias') - cantidad)
+            for cantidad, ids in por_cantidad.items()
+        )
+
 class ArchivoAdjunto(models.Model):
     """Archivos adjuntos a los ajustes"""
     ajuste = models.ForeignKey(AjusteFinanciero, on_delete=models.CASCADE, related_name='archivos')
     nombre = models.CharField(max_length=255)
+    # Para los adjuntos con blob, archivo apunta al mismo archivo del blob
     archivo = models.FileField(upload_to='ajustes/archivos/%Y/%m/')
+    blob = models.ForeignKey(
+        BlobAdjunto,
+        on_delete=models.PROTECT,
+        related_name='adjuntos',
+        null=True,
+        blank=True,
+        editable=False
+    )
     descripcion = models.TextField(blank=True)
     tamaño = models.PositiveIntegerField(help_text="Tamaño en bytes")
     tipo_contenido = models.CharField(max_length=100)
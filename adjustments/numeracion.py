@@ -0,0 +1,181 @@
+"""
+=============================================================================
+ASIGNACIÓN DE NÚMEROS DE AJUSTE
+=============================================================================
+
+Genera `numero_ajuste` sin COUNT(*) y sin duplicados bajo concurrencia.
+
+Cada proceso reserva bloques de números y los entrega desde memoria, por lo
+que la mayoría de las inserciones no requieren un viaje extra a la base de
+datos:
+
+- PostgreSQL: la reserva toma N valores de la secuencia
+  `adjustments_numero_ajuste_seq` en una sola consulta. nextval() no es
+  transaccional, así que dos workers nunca reciben el mismo número aunque
+  alguno haga rollback.
+- Otros motores (SQLite en desarrollo): contador en la tabla
+  ContadorNumeracion, incrementado con un UPDATE atómico. Dentro de una
+  transacción en curso se reserva un solo número sin guardarlo en memoria,
+  porque un rollback devolvería el contador a su valor anterior.
+
+Los números reservados y no usados (reinicio del proceso, rollback) dejan
+huecos en la numeración; nunca se repiten.
+=============================================================================
+"""
+
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction, DEFAULT_DB_ALIAS, IntegrityError
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+SECUENCIA = 'adjustments_numero_ajuste_seq'
+CONTADOR = 'numero_ajuste'
+PREFIJO = 'AJ'
+
+
+def formatear_numero(valor):
+    """Formato público del número de ajuste, p. ej. AJ00000042"""
+    return f'{PREFIJO}{valor:08d}'
+
+
+def extraer_valor(numero):
+    """Valor numérico de un numero_ajuste (None si no tiene el formato)"""
+    if numero and numero.startswith(PREFIJO) and numero[len(PREFIJO):].isdigit():
+        return int(numero[len(PREFIJO):])
+    return None
+
+
+def ultimo_valor_existente(modelo, using=DEFAULT_DB_ALIAS):
+    """
+    Mayor número asignado en la tabla de ajustes.
+
+    Los números tienen ancho fijo, por lo que el máximo lexicográfico es el
+    máximo numérico.
+    """
+    numero = (
+        modelo.objects.using(using)
+        .filter(numero_ajuste__startswith=PREFIJO)
+        .order_by('-numero_ajuste')
+        .values_list('numero_ajuste', flat=True)
+        .first()
+    )
+    return extraer_valor(numero) or 0
+
+
+class AsignadorNumeros:
+    """
+    Reserva bloques de números por proceso y los entrega desde memoria.
+
+    Es seguro entre hilos (lock) y entre procesos creados con fork: si el
+    PID cambia, el bloque heredado del proceso padre se descarta.
+
+    Attributes:
+        tamano_bloque (int): Números reservados por viaje a la base de datos
+    """
+
+    def __init__(self, tamano_bloque=None):
+        self._tamano_bloque = tamano_bloque
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._disponibles = {}
+
+    @property
+    def tamano_bloque(self):
+        if self._tamano_bloque is not None:
+            return self._tamano_bloque
+        return getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('NUMERO_AJUSTE_BLOQUE', 20)
+
+    def siguiente(self, using=None):
+        """
+        Obtener el siguiente número de ajuste formateado.
+
+        Args:
+            using (str): Alias de la base de datos
+
+        Returns:
+            str: Número de ajuste, p. ej. AJ00000042
+        """
+        return self.reservar(1, using=using)[0]
+
+    def reservar(self, cantidad, using=None):
+        """
+        Reservar `cantidad` números para inserciones en lote.
+
+        Args:
+            cantidad (int): Números requeridos
+            using (str): Alias de la base de datos
+
+        Returns:
+            list: Números de ajuste formateados, en orden ascendente
+        """
+        using = using or DEFAULT_DB_ALIAS
+        connection = connections[using]
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._disponibles = {}
+
+            disponibles = self._disponibles.setdefault(using, [])
+
+            if connection.vendor != 'postgresql' and connection.in_atomic_block:
+                # El contador se revertiría junto con la transacción: sin caché
+                valores = disponibles[:cantidad]
+                del disponibles[:cantidad]
+                faltantes = cantidad - len(valores)
+                if faltantes:
+                    valores.extend(self._reservar_contador(using, faltantes))
+                return [formatear_numero(valor) for valor in valores]
+
+            if len(disponibles) < cantidad:
+                faltantes = cantidad - len(disponibles) + self.tamano_bloque
+                disponibles.extend(self._reservar_bloque(connection, faltantes))
+
+            valores = disponibles[:cantidad]
+            del disponibles[:cantidad]
+
+        return [formatear_numero(valor) for valor in valores]
+
+    def _reservar_bloque(self, connection, cantidad):
+        if connection.vendor == 'postgresql':
+            return self._reservar_secuencia(connection, cantidad)
+        return self._reservar_contador(connection.alias, cantidad)
+
+    def _reservar_secuencia(self, connection, cantidad):
+        """Tomar `cantidad` valores de la secuencia en una sola consulta"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(%s) FROM generate_series(1, %s)', [SECUENCIA, cantidad]
+            )
+            return sorted(fila[0] for fila in cursor.fetchall())
+
+    def _reservar_contador(self, using, cantidad):
+        """Incrementar el contador con un UPDATE atómico y retornar el rango reservado"""
+        from .models import AjusteFinanciero, ContadorNumeracion
+
+        contadores = ContadorNumeracion.objects.using(using).filter(nombre=CONTADOR)
+
+        with transaction.atomic(using=using):
+            if not contadores.update(ultimo_valor=F('ultimo_valor') + cantidad):
+                try:
+                    with transaction.atomic(using=using):
+                        ContadorNumeracion.objects.using(using).create(
+                            nombre=CONTADOR,
+                            ultimo_valor=ultimo_valor_existente(AjusteFinanciero, using) + cantidad,
+                        )
+                except IntegrityError:
+                    # Otro proceso creó el contador al mismo tiempo
+                    contadores.update(ultimo_valor=F('ultimo_valor') + cantidad)
+
+            ultimo = contadores.values_list('ultimo_valor', flat=True).get()
+
+        return list(range(ultimo - cantidad + 1, ultimo + 1))
+
+
+# Asignador compartido por el proceso
+asignador_ajustes = AsignadorNumeros()
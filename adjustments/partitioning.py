@@ -0,0 +1,303 @@
+"""
+=============================================================================
+PARTICIONAMIENTO MENSUAL DE REGISTROS DE AJUSTES (POSTGRESQL)
+=============================================================================
+
+Convierte la tabla de RegistroAjuste en una tabla particionada por rango
+mensual de `fecha_ajuste` y administra sus particiones:
+
+- convertir_a_particionada: migra la tabla existente (una sola vez)
+- crear_particiones: crea las particiones de los meses siguientes
+- desvincular_particiones: separa (y opcionalmente elimina) meses antiguos
+
+Las consultas filtradas por fecha_ajuste (listado y stats) obtienen poda de
+particiones automáticamente. En PostgreSQL la llave primaria física pasa a
+ser (id, fecha_ajuste), requisito de las tablas particionadas; Django sigue
+usando `id` como pk y la secuencia garantiza su unicidad.
+
+Requiere PostgreSQL 13+ (triggers BEFORE por fila en tablas particionadas);
+convertir_a_particionada lo verifica antes de tocar la tabla. La columna
+identity de `id` se copia a la tabla padre con LIKE ... INCLUDING IDENTITY,
+de modo que los INSERT a través de la tabla padre (los de Django) siguen
+numerando con la misma secuencia.
+En SQLite (desarrollo) la tabla permanece sin particionar.
+=============================================================================
+"""
+
+import logging
+from datetime import date
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+TABLA = 'adjustments_registroajuste'
+# connection.pg_version de PostgreSQL 13
+VERSION_MINIMA = 130000
+PARTICION_DEFAULT = f'{TABLA}_default'
+
+
+def soporta_particiones(connection):
+    """Solo PostgreSQL soporta el particionamiento declarativo"""
+    return connection.vendor == 'postgresql'
+
+
+def inicio_de_mes(fecha):
+    return fecha.replace(day=1)
+
+
+def sumar_meses(fecha, meses):
+    """Primer día del mes desplazado `meses` desde `fecha`"""
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes, tabla=TABLA):
+    """Nombre de la partición mensual, p. ej. adjustments_registroajuste_p2025_10"""
+    return f'{tabla}_p{mes.year}_{mes.month:02d}'
+
+
+def es_particionada(cursor, tabla=TABLA):
+    cursor.execute(
+        "SELECT 1 FROM pg_class WHERE relname = %s AND relkind = 'p'", [tabla]
+    )
+    return cursor.fetchone() is not None
+
+
+def listar_particiones(cursor, tabla=TABLA):
+    """
+    Listar las particiones mensuales adjuntas a la tabla.
+
+    Returns:
+        list: Tuplas (nombre, primer día del mes) ordenadas por mes
+    """
+    cursor.execute(
+        """
+        SELECT hija.relname
+        FROM pg_inherits
+        JOIN pg_class padre ON padre.oid = pg_inherits.inhparent
+        JOIN pg_class hija ON hija.oid = pg_inherits.inhrelid
+        WHERE padre.relname = %s
+        """,
+        [tabla]
+    )
+    prefijo = f'{tabla}_p'
+    particiones = []
+    for (nombre,) in cursor.fetchall():
+        if not nombre.startswith(prefijo):
+            continue
+        try:
+            anio, mes = nombre[len(prefijo):].split('_')
+            particiones.append((nombre, date(int(anio), int(mes), 1)))
+        except ValueError:
+            continue
+    return sorted(particiones, key=lambda particion: particion[1])
+
+
+def _crear_particion(cursor, mes, tabla=TABLA):
+    """
+    Crear la partición de un mes, moviendo las filas que ya estén en la
+    partición por defecto (PostgreSQL no permite crearla si existen).
+    """
+    desde, hasta = mes, sumar_meses(mes, 1)
+    nombre = nombre_particion(mes, tabla)
+    default = f'{tabla}_default'
+
+    cursor.execute("SELECT 1 FROM pg_class WHERE relname = %s", [nombre])
+    if cursor.fetchone():
+        return False
+
+    cursor.execute("SELECT 1 FROM pg_class WHERE relname = %s", [default])
+    tiene_default = cursor.fetchone() is not None
+
+    filas_en_default = False
+    if tiene_default:
+        cursor.execute(
+            f"SELECT 1 FROM {default} WHERE fecha_ajuste >= %s AND fecha_ajuste < %s LIMIT 1",
+            [desde, hasta]
+        )
+        filas_en_default = cursor.fetchone() is not None
+
+    if filas_en_default:
+        cursor.execute(f"ALTER TABLE {tabla} DETACH PARTITION {default}")
+
+    cursor.execute(
+        f"CREATE TABLE {nombre} PARTITION OF {tabla} FOR VALUES FROM (%s) TO (%s)",
+        [desde, hasta]
+    )
+
+    if filas_en_default:
+        cursor.execute(
+            f"INSERT INTO {tabla} SELECT * FROM {default} WHERE fecha_ajuste >= %s AND fecha_ajuste < %s",
+            [desde, hasta]
+        )
+        cursor.execute(
+            f"DELETE FROM {default} WHERE fecha_ajuste >= %s AND fecha_ajuste < %s",
+            [desde, hasta]
+        )
+        cursor.execute(f"ALTER TABLE {tabla} ATTACH PARTITION {default} DEFAULT")
+
+    return True
+
+
+def crear_particiones(connection, desde=None, meses=3):
+    """
+    Crear las particiones mensuales desde el mes dado.
+
+    Args:
+        connection: Conexión de base de datos
+        desde (date): Mes inicial (por defecto el mes actual)
+        meses (int): Número de meses a partir de `desde`, incluido
+
+    Returns:
+        list: Nombres de las particiones creadas
+    """
+    if not soporta_particiones(connection):
+        return []
+
+    desde = inicio_de_mes(desde or date.today())
+    creadas = []
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if not es_particionada(cursor):
+            raise ValueError('La tabla de registros no está particionada; ejecute particionar_registros')
+
+        for desplazamiento in range(meses + 1):
+            mes = sumar_meses(desde, desplazamiento)
+            if _crear_particion(cursor, mes):
+                creadas.append(nombre_particion(mes))
+
+    for nombre in creadas:
+        logger.info(f"Partición creada: {nombre}")
+    return creadas
+
+
+def desvincular_particiones(connection, antes_de, eliminar=False):
+    """
+    Separar de la tabla las particiones de meses anteriores a `antes_de`.
+
+    Las filas desvinculadas dejan de verse en la API; las dimensiones de
+    asesores y cuentas se recalculan para reflejarlo.
+
+    Args:
+        connection: Conexión de base de datos
+        antes_de (date): Se desvinculan los meses anteriores al mes de esta fecha
+        eliminar (bool): Eliminar las tablas además de desvincularlas
+
+    Returns:
+        list: Nombres de las particiones desvinculadas
+    """
+    if not soporta_particiones(connection):
+        return []
+
+    limite = inicio_de_mes(antes_de)
+    desvinculadas = []
+
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            for nombre, mes in listar_particiones(cursor):
+                if mes >= limite:
+                    continue
+                cursor.execute(f"ALTER TABLE {TABLA} DETACH PARTITION {nombre}")
+                if eliminar:
+                    cursor.execute(f"DROP TABLE {nombre}")
+                desvinculadas.append(nombre)
+
+        if desvinculadas:
+            from .frontend_models import RegistroAjuste, DimensionAsesor, DimensionCuenta
+            for dimension in (DimensionAsesor, DimensionCuenta):
+                dimension.reconstruir(RegistroAjuste.objects.all())
+
+    for nombre in desvinculadas:
+        logger.info(f"Partición {'eliminada' if eliminar else 'desvinculada'}: {nombre}")
+    return desvinculadas
+
+
+def convertir_a_particionada(connection, meses_futuros=3):
+    """
+    Convertir la tabla de registros en una tabla particionada por mes.
+
+    Crea la tabla particionada con las mismas columnas, una partición por
+    cada mes con datos más `meses_futuros` y una partición por defecto,
+    copia las filas, y recrea índices, llave foránea y el índice de búsqueda.
+    Todo ocurre en una transacción; la tabla queda bloqueada mientras dura.
+
+    Args:
+        connection: Conexión PostgreSQL
+        meses_futuros (int): Meses posteriores al actual a crear de antemano
+
+    Returns:
+        int: Número de particiones mensuales creadas
+    """
+    from .frontend_models import RegistroAjuste
+    from .search import instalar_indice
+
+    if not soporta_particiones(connection):
+        raise ValueError('El particionamiento solo está disponible en PostgreSQL')
+    if connection.pg_version < VERSION_MINIMA:
+        raise ValueError('El particionamiento de registros requiere PostgreSQL 13 o posterior')
+
+    temporal = f'{TABLA}_particionada'
+
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            if es_particionada(cursor):
+                raise ValueError('La tabla de registros ya está particionada')
+
+            cursor.execute(f"LOCK TABLE {TABLA} IN ACCESS EXCLUSIVE MODE")
+
+            # Tablas creadas con Django < 4.1 usan serial en lugar de identity
+            cursor.execute(
+                "SELECT attidentity <> '', pg_get_serial_sequence(%s, 'id') "
+                "FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'",
+                [TABLA, TABLA]
+            )
+            es_identity, secuencia = cursor.fetchone()
+
+            cursor.execute(
+                f"CREATE TABLE {temporal} (LIKE {TABLA} INCLUDING DEFAULTS INCLUDING IDENTITY "
+                f"INCLUDING CONSTRAINTS) PARTITION BY RANGE (fecha_ajuste)"
+            )
+            cursor.execute(f"ALTER TABLE {temporal} ADD PRIMARY KEY (id, fecha_ajuste)")
+
+            cursor.execute(f"SELECT MIN(fecha_ajuste) FROM {TABLA}")
+            primera = cursor.fetchone()[0]
+            hoy = inicio_de_mes(date.today())
+            mes = inicio_de_mes(primera) if primera and primera < hoy else hoy
+            ultimo = sumar_meses(hoy, meses_futuros)
+
+            creadas = 0
+            while mes <= ultimo:
+                cursor.execute(
+                    f"CREATE TABLE {nombre_particion(mes)} PARTITION OF {temporal} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [mes, sumar_meses(mes, 1)]
+                )
+                creadas += 1
+                mes = sumar_meses(mes, 1)
+            cursor.execute(f"CREATE TABLE {PARTICION_DEFAULT} PARTITION OF {temporal} DEFAULT")
+
+            cursor.execute(f"INSERT INTO {temporal} SELECT * FROM {TABLA}")
+            if es_identity:
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1)) FROM {temporal}",
+                    [temporal]
+                )
+            elif secuencia:
+                # La secuencia se conserva; solo cambia de tabla propietaria
+                cursor.execute(f"ALTER SEQUENCE {secuencia} OWNED BY {temporal}.id")
+
+            cursor.execute(f"DROP TABLE {TABLA}")
+            cursor.execute(f"ALTER TABLE {temporal} RENAME TO {TABLA}")
+            cursor.execute(
+                f"ALTER TABLE {TABLA} ADD CONSTRAINT {TABLA}_created_by_id_fk "
+                f"FOREIGN KEY (created_by_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED"
+            )
+
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for sql in schema_editor._model_indexes_sql(RegistroAjuste):
+                schema_editor.execute(sql)
+            instalar_indice(schema_editor, poblar=False)
+
+    logger.info(f"Tabla {TABLA} particionada con {creadas} particiones mensuales")
+    return creadas
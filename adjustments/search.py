@@ -0,0 +1,286 @@
+"""
+=============================================================================
+BÚSQUEDA DE TEXTO COMPLETO - REGISTROS DE AJUSTES
+=============================================================================
+
+Índice de búsqueda para el parámetro `search` de /api/registros/.
+
+- PostgreSQL: columna `search_vector` (tsvector) mantenida por un trigger
+  e indexada con GIN. Los identificadores se indexan con la configuración
+  'simple' y la justificación con 'spanish'.
+- SQLite: tabla virtual FTS5 de contenido externo mantenida por triggers,
+  para desarrollo local.
+
+Si el índice no está instalado (otro motor o SQLite sin FTS5) la búsqueda
+vuelve a los filtros `icontains` originales. También se usan para los textos
+que el índice no puede resolver como subcadena (ver usar_subcadena): términos
+muy cortos e identificadores con separadores como 'TA-0', cuyos fragmentos
+no empiezan en un límite de palabra del índice.
+=============================================================================
+"""
+
+import logging
+import re
+
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+TABLA = 'adjustments_registroajuste'
+TABLA_FTS = 'adjustments_registroajuste_fts'
+INDICE_GIN = 'idx_registro_busqueda'
+
+# Campos cubiertos por el índice (mismos que los filtros icontains originales)
+CAMPOS_BUSQUEDA = ['id_cuenta', 'id_acuerdo_servicio', 'asesor_que_ajusto', 'justificacion']
+
+# Términos más cortos se buscan como subcadena (icontains)
+LONGITUD_MINIMA_TERMINO = 3
+
+# Fragmento de identificador: caracteres de palabra unidos por separadores (CTA-001, AS/12)
+PATRON_IDENTIFICADOR = re.compile(r'\w[^\w\s]+\w')
+
+
+# =============================================================================
+# SQL DE INSTALACIÓN - POSTGRESQL
+# =============================================================================
+
+_DOCUMENTO_POSTGRES = (
+    "setweight(to_tsvector('simple', coalesce({p}id_cuenta, '') || ' ' || coalesce({p}id_acuerdo_servicio, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({p}asesor_que_ajusto, '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce({p}justificacion, '')), 'C')"
+)
+
+POSTGRES_INSTALAR = [
+    f"ALTER TABLE {TABLA} ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""
+    CREATE OR REPLACE FUNCTION {TABLA}_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {_DOCUMENTO_POSTGRES.format(p='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS {TABLA}_search_vector_trg ON {TABLA}",
+    f"""
+    CREATE TRIGGER {TABLA}_search_vector_trg
+    BEFORE INSERT OR UPDATE OF {', '.join(CAMPOS_BUSQUEDA)} ON {TABLA}
+    FOR EACH ROW EXECUTE FUNCTION {TABLA}_search_vector()
+    """,
+]
+
+POSTGRES_POBLAR = f"UPDATE {TABLA} SET search_vector = {_DOCUMENTO_POSTGRES.format(p='')}"
+
+POSTGRES_INDICE = f"CREATE INDEX IF NOT EXISTS {INDICE_GIN} ON {TABLA} USING gin (search_vector)"
+
+POSTGRES_DESINSTALAR = [
+    f"DROP INDEX IF EXISTS {INDICE_GIN}",
+    f"DROP TRIGGER IF EXISTS {TABLA}_search_vector_trg ON {TABLA}",
+    f"DROP FUNCTION IF EXISTS {TABLA}_search_vector()",
+    f"ALTER TABLE {TABLA} DROP COLUMN IF EXISTS search_vector",
+]
+
+
+# =============================================================================
+# SQL DE INSTALACIÓN - SQLITE (FTS5)
+# =============================================================================
+
+_COLUMNAS = ', '.join(CAMPOS_BUSQUEDA)
+_NUEVOS = ', '.join(f'new.{campo}' for campo in CAMPOS_BUSQUEDA)
+_ANTERIORES = ', '.join(f'old.{campo}' for campo in CAMPOS_BUSQUEDA)
+
+SQLITE_INSTALAR = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+        {_COLUMNAS},
+        content='{TABLA}',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, {_COLUMNAS}) VALUES (new.id, {_NUEVOS});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, {_COLUMNAS}) VALUES ('delete', old.id, {_ANTERIORES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, {_COLUMNAS}) VALUES ('delete', old.id, {_ANTERIORES});
+        INSERT INTO {TABLA_FTS}(rowid, {_COLUMNAS}) VALUES (new.id, {_NUEVOS});
+    END
+    """,
+    f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')",
+]
+
+SQLITE_DESINSTALAR = [
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_au",
+    f"DROP TABLE IF EXISTS {TABLA_FTS}",
+]
+
+
+# Estado del índice por alias de conexión
+_indice_disponible = {}
+
+
+def _ejecutar(schema_editor, sentencias):
+    for sentencia in sentencias:
+        schema_editor.execute(sentencia)
+
+
+def instalar_indice(schema_editor, poblar=True):
+    """
+    Crear el índice de búsqueda en el motor de la conexión.
+
+    Args:
+        schema_editor: Editor de esquema de la migración o de un comando
+        poblar (bool): Recalcular search_vector de las filas existentes
+            (innecesario si la columna ya viene poblada, p. ej. al particionar)
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        _ejecutar(schema_editor, POSTGRES_INSTALAR)
+        if poblar:
+            schema_editor.execute(POSTGRES_POBLAR)
+        schema_editor.execute(POSTGRES_INDICE)
+    elif connection.vendor == 'sqlite':
+        try:
+            _ejecutar(schema_editor, SQLITE_INSTALAR)
+        except Exception as e:
+            # SQLite compilado sin FTS5: se conserva la búsqueda icontains
+            logger.warning(f"No se pudo crear el índice FTS5: {e}")
+    _indice_disponible.pop(connection.alias, None)
+
+
+def desinstalar_indice(schema_editor):
+    """Eliminar el índice de búsqueda del motor de la conexión."""
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        _ejecutar(schema_editor, POSTGRES_DESINSTALAR)
+    elif connection.vendor == 'sqlite':
+        _ejecutar(schema_editor, SQLITE_DESINSTALAR)
+    _indice_disponible.pop(connection.alias, None)
+
+
+def indice_disponible(connection):
+    """
+    Verificar (una vez por conexión) si el índice de búsqueda está instalado.
+
+    Returns:
+        bool: True si la búsqueda puede usar el índice
+    """
+    if connection.alias not in _indice_disponible:
+        disponible = False
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = %s AND column_name = 'search_vector'",
+                    [TABLA]
+                )
+                disponible = cursor.fetchone() is not None
+            elif connection.vendor == 'sqlite':
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [TABLA_FTS]
+                )
+                disponible = cursor.fetchone() is not None
+        _indice_disponible[connection.alias] = disponible
+    return _indice_disponible[connection.alias]
+
+
+def extraer_terminos(texto):
+    """
+    Separar el texto de búsqueda en términos seguros para el motor.
+
+    Se descartan los operadores de tsquery/FTS5 para que la entrada del
+    usuario nunca se interprete como sintaxis de consulta.
+    """
+    return re.findall(r'\w+', texto.lower())
+
+
+def usar_subcadena(texto, terminos):
+    """
+    Indicar si el texto debe buscarse con icontains en lugar del índice.
+
+    El índice solo encuentra prefijos de palabras completas: 'TA-0' se divide
+    en 'ta' y '0' y no coincide con 'CTA-001', aunque sí es una subcadena.
+    Los identificadores con separadores y los términos cortos conservan la
+    búsqueda por subcadena original (secuencial).
+    """
+    return bool(PATRON_IDENTIFICADOR.search(texto)) or any(
+        len(termino) < LONGITUD_MINIMA_TERMINO for termino in terminos
+    )
+
+
+def filtro_icontains(texto):
+    """Filtro de respaldo sin índice (secuencial)."""
+    return (
+        Q(id_cuenta__icontains=texto) |
+        Q(id_acuerdo_servicio__icontains=texto) |
+        Q(asesor_que_ajusto__icontains=texto) |
+        Q(justificacion__icontains=texto)
+    )
+
+
+def buscar(queryset, texto):
+    """
+    Filtrar un queryset de RegistroAjuste con el índice de texto completo.
+
+    Cada término se busca por prefijo y todos los términos deben coincidir;
+    el queryset resultante se anota con `relevancia` (mayor es más
+    relevante). Los identificadores con separadores ('CTA-00') y los
+    términos cortos se buscan como subcadena, sin índice ni relevancia.
+
+    Args:
+        queryset (QuerySet): Registros a filtrar
+        texto (str): Texto ingresado por el usuario
+
+    Returns:
+        QuerySet: Registros coincidentes anotados con relevancia
+    """
+    from django.db import connections
+
+    connection = connections[queryset.db]
+    terminos = extraer_terminos(texto)
+
+    if not terminos or usar_subcadena(texto, terminos) or not indice_disponible(connection):
+        return queryset.filter(filtro_icontains(texto))
+
+    if connection.vendor == 'postgresql':
+        # Prefijo en 'simple' (identificadores) o en 'spanish' (justificación con raíces)
+        consulta = ' && '.join(
+            ["(to_tsquery('simple', %s) || to_tsquery('spanish', %s))"] * len(terminos)
+        )
+        params = []
+        for termino in terminos:
+            params.extend([f'{termino}:*', f'{termino}:*'])
+
+        coincide = RawSQL(
+            f'{TABLA}.search_vector @@ ({consulta})', params,
+            output_field=BooleanField()
+        )
+        relevancia = RawSQL(
+            f'ts_rank({TABLA}.search_vector, {consulta})', params,
+            output_field=FloatField()
+        )
+    else:
+        consulta = ' '.join(f'"{termino}"*' for termino in terminos)
+        coincide = RawSQL(
+            f'{TABLA}.id IN (SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s)',
+            [consulta], output_field=BooleanField()
+        )
+        # bm25 es menor cuanto más relevante; se invierte para ordenar descendente
+        relevancia = RawSQL(
+            f'(SELECT -bm25({TABLA_FTS}, 10.0, 10.0, 5.0, 1.0) FROM {TABLA_FTS} '
+            f'WHERE {TABLA_FTS} MATCH %s AND rowid = {TABLA}.id)',
+            [consulta], output_field=FloatField()
+        )
+
+    return queryset.filter(coincide).annotate(relevancia=relevancia)
@@ -1,9 +1,24 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.db import transaction
 from django.contrib.auth.models import User
+from django.urls import reverse
 from .models import (
     TipoAjuste, CuentaContable, AjusteFinanciero, 
-    HistorialAjuste, ArchivoAdjunto, ComentarioAjuste
+    HistorialAjuste, ArchivoAdjunto, BlobAdjunto, ComentarioAjuste
 )
+from . import catalogos
+from .adjuntos import sha256_subido
+from .campos import CamposDinamicosMixin
+from .validacion import regla_clasificacion
+from analytics.models import ReportExecution
+
+class ConflictoVersion(Exception):
+    """El ajuste cambió desde que el usuario lo leyó (la vista responde 409)"""
+    
+    def __init__(self, ajuste):
+        super().__init__(ajuste.pk)
+        self.ajuste = ajuste
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer básico para User"""
@@ -34,6 +49,47 @@ class CuentaContableSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+class CatalogoRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField que resuelve el id en un catálogo en memoria (sin consultas)"""
+    
+    def __init__(self, catalogo, **kwargs):
+        self.catalogo = catalogo
+        super().__init__(**kwargs)
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        
+        instancia = self.catalogo.obtener(pk)
+        if instancia is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instancia
+
+class CatalogoField(serializers.Field):
+    """
+    Fila de catálogo representada desde la caché en memoria (sin join).
+    
+    Con serializer_class retorna su salida, calculada una vez por versión del
+    catálogo; con atributo, solo ese atributo de la fila.
+    """
+    
+    def __init__(self, catalogo, serializer_class=None, atributo=None, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.catalogo = catalogo
+        self.serializer_class = serializer_class
+        self.atributo = atributo
+    
+    def to_representation(self, pk):
+        if self.atributo:
+            instancia = self.catalogo.obtener(pk)
+            return getattr(instancia, self.atributo) if instancia is not None else None
+        return self.catalogo.representacion(pk, self.serializer_class)
+
 class HistorialAjusteSerializer(serializers.ModelSerializer):
     """Serializer para HistorialAjuste"""
     usuario = UserSerializer(read_only=True)
@@ -53,20 +109,28 @@ class ArchivoAdjuntoSerializer(serializers.ModelSerializer):
     class Meta:
         model = ArchivoAdjunto
         fields = '__all__'
-        read_only_fields = ['id', 'usuario_subida', 'fecha_subida', 'tamaño', 'tipo_contenido']
+        read_only_fields = ['id', 'ajuste', 'usuario_subida', 'fecha_subida', 'tamaño', 'tipo_contenido']
     
     def get_url(self, obj):
+        # Descarga autenticada (no la URL pública de MEDIA)
         if obj.archivo:
-            return obj.archivo.url
+            return reverse('ajuste-descargar-archivo', kwargs={'pk': obj.ajuste_id, 'archivo_id': obj.pk})
         return None
     
     def create(self, validated_data):
         # Obtener información del archivo
         archivo = validated_data['archivo']
+        request = self.context['request']
         validated_data['tamaño'] = archivo.size
         validated_data['tipo_contenido'] = archivo.content_type
-        validated_data['usuario_subida'] = self.context['request'].user
-        return super().create(validated_data)
+        validated_data['usuario_subida'] = request.user
+        
+        # Contenido deduplicado por SHA-256: el adjunto apunta al archivo del blob
+        with transaction.atomic():
+            blob = BlobAdjunto.referenciar(archivo, sha256_subido(request, 'archivo', archivo))
+            validated_data['blob'] = blob
+            validated_data['archivo'] = blob.archivo.name
+            return super().create(validated_data)
 
 class ComentarioAjusteSerializer(serializers.ModelSerializer):
     """Serializer para ComentarioAjuste"""
@@ -81,15 +145,19 @@ class ComentarioAjusteSerializer(serializers.ModelSerializer):
         validated_data['usuario'] = self.context['request'].user
         return super().create(validated_data)
 
-class AjusteFinancieroListSerializer(serializers.ModelSerializer):
-    """Serializer para listar ajustes financieros (vista resumida)"""
-    tipo_ajuste = TipoAjusteSerializer(read_only=True)
+def _columnas_usuario(relacion):
+    """Columnas de User que usa UserSerializer"""
+    return [f'{relacion}__{campo}' for campo in ('id', 'username', 'first_name', 'last_name', 'email')]
+
+class AjusteFinancieroListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Serializer para listar ajustes financieros (vista resumida, acepta ?fields=/?omit=)"""
+    tipo_ajuste = CatalogoField(catalogos.tipos_ajuste, TipoAjusteSerializer, source='tipo_ajuste_id')
     usuario_creador = UserSerializer(read_only=True)
     usuario_aprobador = UserSerializer(read_only=True)
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
     prioridad_display = serializers.CharField(source='get_prioridad_display', read_only=True)
-    cuenta_debito_nombre = serializers.CharField(source='cuenta_debito.nombre', read_only=True)
-    cuenta_credito_nombre = serializers.CharField(source='cuenta_credito.nombre', read_only=True)
+    cuenta_debito_nombre = CatalogoField(catalogos.cuentas_contables, atributo='nombre', source='cuenta_debito_id')
+    cuenta_credito_nombre = CatalogoField(catalogos.cuentas_contables, atributo='nombre', source='cuenta_credito_id')
     
     class Meta:
         model = AjusteFinanciero
@@ -99,12 +167,27 @@ class AjusteFinancieroListSerializer(serializers.ModelSerializer):
             'prioridad', 'prioridad_display', 'usuario_creador', 'usuario_aprobador',
             'cuenta_debito_nombre', 'cuenta_credito_nombre', 'created_at', 'updated_at'
         ]
+    
+    # Columnas y relaciones que necesita cada campo (para only()/select_related());
+    # los catálogos se resuelven en memoria y solo requieren la llave foránea
+    columnas_por_campo = {
+        'estado_display': ['estado'],
+        'prioridad_display': ['prioridad'],
+        'usuario_creador': _columnas_usuario('usuario_creador'),
+        'usuario_aprobador': _columnas_usuario('usuario_aprobador'),
+        'cuenta_debito_nombre': ['cuenta_debito'],
+        'cuenta_credito_nombre': ['cuenta_credito'],
+    }
+    relaciones_por_campo = {
+        'usuario_creador': 'usuario_creador',
+        'usuario_aprobador': 'usuario_aprobador',
+    }
 
 class AjusteFinancieroDetailSerializer(serializers.ModelSerializer):
     """Serializer detallado para ajustes financieros"""
-    tipo_ajuste = TipoAjusteSerializer(read_only=True)
-    cuenta_debito = CuentaContableSerializer(read_only=True)
-    cuenta_credito = CuentaContableSerializer(read_only=True)
+    tipo_ajuste = CatalogoField(catalogos.tipos_ajuste, TipoAjusteSerializer, source='tipo_ajuste_id')
+    cuenta_debito = CatalogoField(catalogos.cuentas_contables, CuentaContableSerializer, source='cuenta_debito_id')
+    cuenta_credito = CatalogoField(catalogos.cuentas_contables, CuentaContableSerializer, source='cuenta_credito_id')
     usuario_creador = UserSerializer(read_only=True)
     usuario_aprobador = UserSerializer(read_only=True)
     usuario_procesador = UserSerializer(read_only=True)
@@ -127,11 +210,20 @@ class AjusteFinancieroDetailSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id', 'numero_ajuste', 'usuario_creador', 'usuario_aprobador', 
             'usuario_procesador', 'fecha_aprobacion', 'fecha_procesamiento',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'version', 'reclamado_por', 'reclamado_hasta'
         ]
 
 class AjusteFinancieroCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer para crear y actualizar ajustes financieros"""
+    # Catálogos resueltos en memoria (sin una consulta por campo)
+    tipo_ajuste = CatalogoRelatedField(catalogos.tipos_ajuste, queryset=TipoAjuste.objects.all())
+    cuenta_debito = CatalogoRelatedField(catalogos.cuentas_contables, queryset=CuentaContable.objects.all())
+    cuenta_credito = CatalogoRelatedField(catalogos.cuentas_contables, queryset=CuentaContable.objects.all())
+    version = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text="Versión del ajuste que vio el usuario (409 si ya cambió)"
+    )
     
     class Meta:
         model = AjusteFinanciero
@@ -139,76 +231,132 @@ class AjusteFinancieroCreateUpdateSerializer(serializers.ModelSerializer):
             'fecha_ajuste', 'fecha_valor', 'tipo_ajuste', 'cuenta_debito', 
             'cuenta_credito', 'monto', 'moneda', 'concepto', 'descripcion', 
             'justificacion', 'observaciones', 'prioridad', 'fecha_vencimiento',
-            'numero_documento_origen', 'referencia_externa', 'centro_costo'
+            'numero_documento_origen', 'referencia_externa', 'centro_costo',
+            'version'
         ]
     
     def validate(self, data):
-        """Validaciones personalizadas"""
-        # Validar que las cuentas de débito y crédito sean diferentes
-        if data.get('cuenta_debito') == data.get('cuenta_credito'):
-            raise serializers.ValidationError(
-                "La cuenta de débito y crédito no pueden ser la misma."
-            )
-        
-        # Validar que ambas cuentas estén activas
-        if data.get('cuenta_debito') and not data['cuenta_debito'].activo:
-            raise serializers.ValidationError(
-                "La cuenta de débito seleccionada no está activa."
-            )
-        
-        if data.get('cuenta_credito') and not data['cuenta_credito'].activo:
-            raise serializers.ValidationError(
-                "La cuenta de crédito seleccionada no está activa."
-            )
-        
-        # Validar que el tipo de ajuste esté activo
-        if data.get('tipo_ajuste') and not data['tipo_ajuste'].activo:
-            raise serializers.ValidationError(
-                "El tipo de ajuste seleccionado no está activo."
-            )
+        """Validaciones personalizadas (reglas compartidas con la importación)"""
+        def clave(campo):
+            instancia = data.get(campo)
+            return (instancia.pk, instancia.activo) if instancia else None
+
+        errores = regla_clasificacion(clave('tipo_ajuste'), clave('cuenta_debito'), clave('cuenta_credito'))
+        if errores:
+            raise serializers.ValidationError(errores[0][1])
         
         return data
     
     def create(self, validated_data):
         # Asignar el usuario creador
+        validated_data.pop('version', None)
         validated_data['usuario_creador'] = self.context['request'].user
         return super().create(validated_data)
     
     def update(self, instance, validated_data):
+        """
+        Guardar solo los campos enviados con compare-and-swap sobre la versión.
+        
+        Raises:
+            ConflictoVersion: Si la "version" enviada no es la actual o si
+                otro usuario cambió el ajuste después de leerlo
+        """
         # Solo permitir actualización si el ajuste puede ser editado
         if not instance.puede_ser_editado:
             raise serializers.ValidationError(
                 "Este ajuste no puede ser editado en su estado actual."
             )
-        return super().update(instance, validated_data)
+        
+        if validated_data.pop('version', instance.version) != instance.version:
+            raise ConflictoVersion(instance)
+        
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        # El estado y la versión leídos no se escriben: si cambiaron, no se guarda nada
+        if not instance.guardar_con_version(list(validated_data)):
+            raise ConflictoVersion(instance)
+        return instance
 
 class CambiarEstadoAjusteSerializer(serializers.Serializer):
     """Serializer para cambiar el estado de un ajuste"""
     nuevo_estado = serializers.ChoiceField(choices=AjusteFinanciero.ESTADO_CHOICES)
     comentario = serializers.CharField(required=False, allow_blank=True)
+    version = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text="Versión del ajuste que vio el usuario (409 si ya cambió)"
+    )
+    
+    # Transiciones válidas: estado actual -> estados siguientes
+    TRANSICIONES_VALIDAS = {
+        'BORRADOR': ['PENDIENTE'],
+        'PENDIENTE': ['APROBADO', 'RECHAZADO'],
+        'APROBADO': ['PROCESADO', 'ANULADO'],
+        'RECHAZADO': ['PENDIENTE'],
+        'PROCESADO': ['ANULADO'],
+        'ANULADO': [],
+    }
+    
+    @classmethod
+    def estados_origen(cls, estado_nuevo):
+        """Estados desde los que se puede pasar a estado_nuevo"""
+        return [
+            estado for estado, siguientes in cls.TRANSICIONES_VALIDAS.items()
+            if estado_nuevo in siguientes
+        ]
     
     def validate_nuevo_estado(self, value):
         """Validar que el cambio de estado sea válido"""
         ajuste = self.context['ajuste']
         estado_actual = ajuste.estado
         
-        # Definir transiciones válidas
-        transiciones_validas = {
-            'BORRADOR': ['PENDIENTE'],
-            'PENDIENTE': ['APROBADO', 'RECHAZADO'],
-            'APROBADO': ['PROCESADO', 'ANULADO'],
-            'RECHAZADO': ['PENDIENTE'],
-            'PROCESADO': ['ANULADO'],
-            'ANULADO': [],
-        }
-        
-        if value not in transiciones_validas.get(estado_actual, []):
+        if value not in self.TRANSICIONES_VALIDAS.get(estado_actual, []):
             raise serializers.ValidationError(
                 f"No es posible cambiar de {estado_actual} a {value}."
             )
         
         return value
 
+class ReclamarPendientesSerializer(serializers.Serializer):
+    """Serializer para reservar ajustes de la cola de aprobación"""
+    cantidad = serializers.IntegerField(min_value=1, default=10)
+    
+    def validate_cantidad(self, value):
+        maximo = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('APPROVAL_CLAIM_MAX', 50)
+        if value > maximo:
+            raise serializers.ValidationError(f"No se pueden reservar más de {maximo} ajustes a la vez.")
+        return value
+
+class LiberarPendientesSerializer(serializers.Serializer):
+    """Serializer para devolver ajustes reservados a la cola (todos si no hay ids)"""
+    ajuste_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False
+    )
+
+class CambiarEstadoLoteSerializer(serializers.Serializer):
+    """Serializer para cambiar el estado de varios ajustes a la vez"""
+    ajuste_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False
+    )
+    nuevo_estado = serializers.ChoiceField(choices=AjusteFinanciero.ESTADO_CHOICES)
+    comentario = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_ajuste_ids(self, value):
+        max_lote = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('MAX_BATCH_SIZE', 1000)
+        if len(value) > max_lote:
+            raise serializers.ValidationError(f"El lote no puede superar {max_lote} ajustes.")
+        # Conservar el orden de la petición sin repetidos
+        return list(dict.fromkeys(value))
+    
+    def validate_nuevo_estado(self, value):
+        if not CambiarEstadoAjusteSerializer.estados_origen(value):
+            raise serializers.ValidationError(
+                f"Ningún ajuste puede cambiar a {value}."
+            )
+        return value
+
 class ExportarAjustesSerializer(serializers.Serializer):
     """Serializer para exportar ajustes"""
     formato = serializers.ChoiceField(choices=['excel', 'csv', 'pdf'])
@@ -223,11 +371,42 @@ class ExportarAjustesSerializer(serializers.Serializer):
         many=True,
         required=False
     )
+    asincrono = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Generar el archivo en segundo plano y responder 202"
+    )
     
     def validate(self, data):
+        if data.get('asincrono') and data['formato'] == 'pdf':
+            raise serializers.ValidationError(
+                "La exportación en segundo plano solo admite Excel y CSV."
+            )
         if data.get('fecha_inicio') and data.get('fecha_fin'):
             if data['fecha_inicio'] > data['fecha_fin']:
                 raise serializers.ValidationError(
                     "La fecha de inicio no puede ser mayor que la fecha de fin."
                 )
-        return data
\ No newline at end of file
+        return data
+
+class EjecucionExportacionSerializer(serializers.ModelSerializer):
+    """Serializer del estado de una exportación en segundo plano"""
+    url_estado = serializers.SerializerMethodField()
+    url_descarga = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ReportExecution
+        fields = [
+            'id', 'estado', 'formato', 'parametros', 'registros_procesados',
+            'tiempo_ejecucion', 'mensaje_error', 'fecha_solicitud',
+            'fecha_inicio', 'fecha_fin', 'url_estado', 'url_descarga'
+        ]
+        read_only_fields = fields
+    
+    def get_url_estado(self, obj):
+        return reverse('estado_exportacion', args=[obj.pk])
+    
+    def get_url_descarga(self, obj):
+        if obj.estado == 'COMPLETADO':
+            return reverse('descargar_exportacion', args=[obj.pk])
+        return None
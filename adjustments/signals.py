@@ -0,0 +1,113 @@
+"""
+Señales de la app adjustments.
+
+Mantienen las tablas derivadas sincronizadas con cada alta, modificación y
+baja individual:
+
+- Dimensiones de asesores y cuentas de RegistroAjuste
+- Participantes (índice de visibilidad) de AjusteFinanciero
+- Versión de la caché de catálogos (TipoAjuste y CuentaContable)
+- Referencias de los blobs de ArchivoAdjunto
+
+Las operaciones masivas (bulk_create, update, _raw_delete) no emiten señales
+y deben ajustar las dimensiones, sincronizar los participantes, invalidar
+los catálogos o descontar las referencias de los blobs explícitamente.
+"""
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+from . import catalogos
+
+from .frontend_models import RegistroAjuste, DimensionAsesor, DimensionCuenta
+from .models import (
+    AjusteFinanciero, ArchivoAdjunto, BlobAdjunto, CuentaContable, ParticipanteAjuste, TipoAjuste
+)
+
+DIMENSIONES = (DimensionAsesor, DimensionCuenta)
+
+
+@receiver(pre_save, sender=RegistroAjuste)
+def recordar_valores_dimension(sender, instance, raw=False, **kwargs):
+    """Guardar los valores previos de las claves antes de una actualización"""
+    instance._dimension_anterior = None
+    if raw or not instance.pk:
+        return
+    
+    instance._dimension_anterior = (
+        RegistroAjuste.objects.filter(pk=instance.pk)
+        .values('asesor_que_ajusto', 'id_cuenta', 'fecha_ajuste')
+        .first()
+    )
+
+
+@receiver(post_save, sender=RegistroAjuste)
+def actualizar_dimensiones(sender, instance, created, raw=False, **kwargs):
+    """Contar el registro en las dimensiones (o moverlo si cambió la clave)"""
+    if raw:
+        return
+    
+    anterior = getattr(instance, '_dimension_anterior', None)
+    
+    for dimension in DIMENSIONES:
+        clave = getattr(instance, dimension.CAMPO_REGISTRO)
+        
+        if created or anterior is None:
+            dimension.ajustar({clave: (1, instance.fecha_ajuste)})
+            continue
+        
+        clave_anterior = anterior[dimension.CAMPO_REGISTRO]
+        if clave_anterior == clave:
+            # Solo puede haber cambiado la fecha
+            if instance.fecha_ajuste < anterior['fecha_ajuste']:
+                # Retrocedió: la última fecha puede ser la de otro registro
+                dimension.recalcular_fechas([clave])
+            else:
+                dimension.ajustar({clave: (0, instance.fecha_ajuste)})
+        else:
+            dimension.ajustar({
+                clave_anterior: (-1, None),
+                clave: (1, instance.fecha_ajuste),
+            })
+            dimension.recalcular_fechas([clave_anterior])
+
+
+@receiver(post_delete, sender=RegistroAjuste)
+def descontar_dimensiones(sender, instance, **kwargs):
+    """Descontar el registro eliminado de las dimensiones"""
+    for dimension in DIMENSIONES:
+        clave = getattr(instance, dimension.CAMPO_REGISTRO)
+        dimension.ajustar({clave: (-1, None)})
+        dimension.recalcular_fechas([clave])
+
+
+@receiver(post_save, sender=AjusteFinanciero)
+def sincronizar_participantes(sender, instance, created, raw=False, **kwargs):
+    """Reflejar creador, aprobador y procesador en el índice de visibilidad"""
+    if raw:
+        return
+    
+    ParticipanteAjuste.sincronizar([instance], nuevos=created)
+
+
+@receiver(post_save, sender=TipoAjuste)
+@receiver(post_delete, sender=TipoAjuste)
+@receiver(post_save, sender=CuentaContable)
+@receiver(post_delete, sender=CuentaContable)
+def invalidar_catalogos(sender, raw=False, **kwargs):
+    """Publicar una nueva versión de los catálogos al confirmar el cambio"""
+    if raw:
+        return
+    
+    transaction.on_commit(catalogos.invalidar)
+
+
+@receiver(post_delete, sender=ArchivoAdjunto)
+def descontar_blob(sender, instance, **kwargs):
+    """Restar la referencia del adjunto eliminado a su blob"""
+    if instance.blob_id:
+        BlobAdjunto.objects.filter(pk=instance.blob_id, referencias__gt=0).update(
+            referencias=F('referencias') - 1
+        )
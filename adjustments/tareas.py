@@ -0,0 +1,169 @@
+"""
+Tareas en segundo plano de la app adjustments.
+
+Las exportaciones grandes no caben en el timeout de gunicorn. En modo
+asíncrono la vista registra un ReportExecution y lo encola en un pool de
+hilos propio del proceso; el hilo genera el archivo en reportes/%Y/%m/ y va
+actualizando el estado y registros_procesados, que el cliente consulta hasta
+poder descargarlo.
+
+El pool vive en cada worker de gunicorn: si el worker se recicla a mitad de
+una exportación (max_requests, timeout, despliegue), la ejecución queda en
+PROCESANDO. recuperar_exportaciones marca como ERROR las que llevan más de
+EXPORT_TIMEOUT_MINUTES sin terminar, para que el cliente deje de esperar y la
+solicite de nuevo; se aplica al consultar el estado de una exportación y con
+el comando recuperar_exportaciones. El tamaño del pool se configura con
+ADJUSTMENTS_SETTINGS['EXPORT_WORKERS'].
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from analytics.models import ReportExecution
+from .exports import escribir_csv, escribir_xlsx
+
+logger = logging.getLogger(__name__)
+
+# Plantilla de ReportTemplate a la que se asocian las exportaciones
+PLANTILLA_EXPORTACION = 'Exportación de ajustes'
+
+# Filas entre cada actualización de registros_procesados
+PROGRESO_CADA = 5000
+
+MENSAJE_INTERRUMPIDA = (
+    'La exportación se interrumpió antes de terminar (se reinició el proceso que la generaba). '
+    'Solicítela de nuevo.'
+)
+
+_lock = threading.Lock()
+_pool = None
+_pid = None
+
+
+def _obtener_pool():
+    """Retornar el pool del proceso actual (se recrea después de un fork)"""
+    global _pool, _pid
+    with _lock:
+        if _pool is None or _pid != os.getpid():
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('EXPORT_WORKERS', 2),
+                thread_name_prefix='adjustments-tarea',
+            )
+            _pid = os.getpid()
+        return _pool
+
+
+def encolar(tarea, *args):
+    """
+    Ejecutar una tarea en el pool cuando confirme la transacción actual.
+    
+    Esperar al commit garantiza que el hilo vea las filas recién creadas
+    (p. ej. el ReportExecution de la tarea).
+    """
+    transaction.on_commit(lambda: _obtener_pool().submit(_ejecutar, tarea, *args))
+
+
+def _ejecutar(tarea, *args):
+    """Correr la tarea con su propia conexión y cerrarla al terminar"""
+    close_old_connections()
+    try:
+        tarea(*args)
+    except Exception:
+        logger.exception("Error en la tarea %s%s", tarea.__name__, args)
+    finally:
+        connection.close()
+
+
+def _contar_progreso(ejecucion, filas):
+    """Pasar las filas y registrar el avance cada PROGRESO_CADA filas"""
+    procesadas = 0
+    for fila in filas:
+        yield fila
+        procesadas += 1
+        if procesadas % PROGRESO_CADA == 0:
+            ReportExecution.objects.filter(pk=ejecucion.pk).update(registros_procesados=procesadas)
+    ejecucion.registros_procesados = procesadas
+
+
+def exportar_ajustes(ejecucion_id):
+    """
+    Generar el archivo de una exportación de ajustes registrada.
+    
+    Args:
+        ejecucion_id (int): ReportExecution creado por ExportAjustesView
+    """
+    from .serializers import ExportarAjustesSerializer
+    from .views import ExportAjustesView
+    
+    ejecucion = ReportExecution.objects.get(pk=ejecucion_id)
+    ejecucion.marcar_inicio()
+    
+    try:
+        serializer = ExportarAjustesSerializer(data=ejecucion.parametros)
+        serializer.is_valid(raise_exception=True)
+        queryset = ExportAjustesView.construir_queryset(serializer.validated_data)
+        
+        if ejecucion.formato == 'CSV':
+            filas = _contar_progreso(ejecucion, ExportAjustesView.filas_csv(queryset))
+            archivo = escribir_csv(ExportAjustesView.ENCABEZADOS, filas)
+        else:
+            filas = _contar_progreso(ejecucion, ExportAjustesView.filas_excel(queryset))
+            archivo = escribir_xlsx(ExportAjustesView.ENCABEZADOS, filas, titulo="Ajustes Financieros")
+        
+        with archivo:
+            extension = 'csv' if ejecucion.formato == 'CSV' else 'xlsx'
+            ejecucion.archivo_resultado.save(
+                f'ajustes_{ejecucion.pk}_{timezone.localtime(ejecucion.fecha_solicitud):%Y%m%d_%H%M%S}.{extension}',
+                File(archivo),
+                save=False
+            )
+    except Exception as e:
+        logger.exception("Error generando la exportación %s", ejecucion.pk)
+        ejecucion.marcar_error(str(e))
+        return
+    
+    ejecucion.marcar_completado(registros=ejecucion.registros_procesados)
+    logger.info(
+        "Exportación %s completada: %s registros en %s",
+        ejecucion.pk, ejecucion.registros_procesados, ejecucion.tiempo_ejecucion
+    )
+
+
+def recuperar_exportaciones(ejecuciones=None, minutos=None):
+    """
+    Marcar como ERROR las exportaciones que no terminaron a tiempo.
+    
+    Una exportación PROCESANDO desde hace más de `minutos` (o PENDIENTE que
+    nunca empezó) quedó huérfana: el hilo que la generaba ya no existe.
+    
+    Args:
+        ejecuciones (QuerySet): ReportExecution a revisar (todas las
+            exportaciones por defecto)
+        minutos (int): Antigüedad máxima (EXPORT_TIMEOUT_MINUTES por defecto)
+    
+    Returns:
+        int: Ejecuciones marcadas como ERROR
+    """
+    if ejecuciones is None:
+        ejecuciones = ReportExecution.objects.filter(plantilla__nombre=PLANTILLA_EXPORTACION)
+    if minutos is None:
+        minutos = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('EXPORT_TIMEOUT_MINUTES', 60)
+    
+    ahora = timezone.now()
+    limite = ahora - timedelta(minutes=minutos)
+    recuperadas = ejecuciones.filter(
+        Q(estado='PROCESANDO', fecha_inicio__lt=limite) | Q(estado='PENDIENTE', fecha_solicitud__lt=limite)
+    ).update(estado='ERROR', fecha_fin=ahora, mensaje_error=MENSAJE_INTERRUMPIDA)
+    
+    if recuperadas:
+        logger.warning("%s exportaciones interrumpidas marcadas como ERROR", recuperadas)
+    return recuperadas
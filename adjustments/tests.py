@@ -1,3 +1,1622 @@
-from django.test import TestCase
+import csv
+import hashlib
+import importlib
+import json
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from functools import partial
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from openpyxl import Workbook, load_workbook
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from analytics.models import ReportExecution, ReportTemplate
+
+from . import catalogos, exports, partitioning, validacion
+from .frontend_models import DimensionAsesor, DimensionCuenta, RegistroAjuste
+from .frontend_serializers import RegistroAjusteSerializer
+from .frontend_views import RegistroAjusteViewSet
+from .importacion import ImportadorAjustes, ImportadorRegistros, leer_csv
+from .models import (
+    AjusteFinanciero, ArchivoAdjunto, BlobAdjunto, ComentarioAjuste, ContadorNumeracion, CuentaContable,
+    HistorialAjuste, ParticipanteAjuste, TipoAjuste, VersionCatalogo,
+)
+from .serializers import (
+    AjusteFinancieroCreateUpdateSerializer, AjusteFinancieroListSerializer, CambiarEstadoAjusteSerializer
+)
+from .tareas import MENSAJE_INTERRUMPIDA, PLANTILLA_EXPORTACION, exportar_ajustes
+
+
+class AjustesTestMixin:
+    """Catálogos, usuarios y ajustes compartidos por las pruebas de la API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tipo = TipoAjuste.objects.create(nombre='DEBITO')
+        cls.cuenta_debito = CuentaContable.objects.create(codigo='1105', nombre='Caja', tipo_cuenta='ACTIVO')
+        cls.cuenta_credito = CuentaContable.objects.create(codigo='2205', nombre='Proveedores', tipo_cuenta='PASIVO')
+        cls.creador = User.objects.create_user('creador', password='x')
+        cls.otro = User.objects.create_user('otro', password='x')
+
+    def setUp(self):
+        super().setUp()
+        # Las señales invalidan los catálogos al confirmar, y las pruebas no confirman
+        catalogos.invalidar()
+
+    @classmethod
+    def crear_ajuste(cls, usuario=None, **campos):
+        datos = {
+            'fecha_ajuste': timezone.now(),
+            'fecha_valor': date.today(),
+            'tipo_ajuste': cls.tipo,
+            'cuenta_debito': cls.cuenta_debito,
+            'cuenta_credito': cls.cuenta_credito,
+            'monto': Decimal('-10.00'),
+            'concepto': 'Ajuste de prueba',
+            'descripcion': 'Descripción',
+            'justificacion': 'Justificación',
+            'usuario_creador': usuario or cls.creador,
+        }
+        datos.update(campos)
+        return AjusteFinanciero.objects.create(**datos)
+
+    def cliente(self, usuario):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        return cliente
+
+
+class RegistrosTestMixin:
+    """Registros de ajustes para las pruebas de /api/registros/"""
+
+    ASESORES = ['María González', 'Juan Pérez', 'Ana Ruiz']
+
+    @classmethod
+    def crear_registros(cls, cantidad, **campos):
+        registros = []
+        for i in range(cantidad):
+            datos = {
+                'id_cuenta': f'CTA-{i % 7:03d}-2024',
+                'id_acuerdo_servicio': f'AS-{i:04d}',
+                'id_cargo_facturable': 'CF-1',
+                'fecha_ajuste': date.today() - timedelta(days=i % 40),
+                'asesor_que_ajusto': cls.ASESORES[i % 3],
+                'valor_ajustado': Decimal('-100.50') - i,
+                'justificacion': 'Diferencia detectada en la facturación del cliente',
+            }
+            datos.update(campos)
+            registros.append(RegistroAjuste.objects.create(**datos))
+        return registros
+
+
+class MediaTemporalMixin:
+    """MEDIA_ROOT en un directorio temporal por prueba"""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+
+    def subir(self, cliente, ajuste, contenido, nombre='soporte.pdf'):
+        return cliente.post(
+            f'/api/adjustments/{ajuste.pk}/subir_archivo/',
+            {'nombre': nombre, 'archivo': SimpleUploadedFile(nombre, contenido, 'application/pdf')},
+            format='multipart'
+        )
+
+
+class DescargaAdjuntosTests(AjustesTestMixin, MediaTemporalMixin, TestCase):
+    """Descarga autenticada de adjuntos (adjustments.adjuntos)"""
+
+    CONTENIDO = bytes(range(256)) * 40
+
+    def setUp(self):
+        super().setUp()
+        self.ajuste = self.crear_ajuste()
+        self.api = self.cliente(self.creador)
+        respuesta = self.subir(self.api, self.ajuste, self.CONTENIDO)
+        self.assertEqual(respuesta.status_code, 201)
+        self.url = respuesta.data['url']
+        self.adjunto = ArchivoAdjunto.objects.get(pk=respuesta.data['id'])
+
+    def test_descarga_completa(self):
+        respuesta = self.api.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO)
+        self.assertEqual(respuesta['Accept-Ranges'], 'bytes')
+        self.assertEqual(respuesta['ETag'], f'"{hashlib.sha256(self.CONTENIDO).hexdigest()}"')
+
+    def test_rango_parcial(self):
+        respuesta = self.api.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], f'bytes 100-199/{len(self.CONTENIDO)}')
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO[100:200])
+
+    def test_rango_sufijo_y_hasta_el_final(self):
+        respuesta = self.api.get(self.url, HTTP_RANGE='bytes=-24')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO[-24:])
+
+        respuesta = self.api.get(self.url, HTTP_RANGE='bytes=10000-')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO[10000:])
+
+    def test_rango_insatisfacible(self):
+        respuesta = self.api.get(self.url, HTTP_RANGE=f'bytes={len(self.CONTENIDO)}-')
+        self.assertEqual(respuesta.status_code, 416)
+        self.assertEqual(respuesta['Content-Range'], f'bytes */{len(self.CONTENIDO)}')
+
+    def test_if_range(self):
+        etag = self.api.get(self.url)['ETag']
+        self.assertEqual(self.api.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self.api.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"').status_code, 200)
+
+        fecha = http_date(int(self.adjunto.fecha_subida.timestamp()))
+        self.assertEqual(self.api.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=fecha).status_code, 206)
+
+    def test_no_modificado(self):
+        respuesta = self.api.get(self.url)
+        self.assertEqual(self.api.get(self.url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+        self.assertEqual(
+            self.api.get(self.url, HTTP_IF_MODIFIED_SINCE=respuesta['Last-Modified']).status_code, 304
+        )
+
+    def test_visibilidad(self):
+        self.assertEqual(self.cliente(self.otro).get(self.url).status_code, 404)
+        self.assertEqual(APIClient().get(self.url).status_code, 401)
+
+        # El adjunto debe pertenecer al ajuste de la URL
+        ajuste_otro = self.crear_ajuste()
+        url = f'/api/adjustments/{ajuste_otro.pk}/archivos/{self.adjunto.pk}/descargar/'
+        self.assertEqual(self.api.get(url).status_code, 404)
+
+    def test_archivo_sin_contenido(self):
+        self.adjunto.archivo.storage.delete(self.adjunto.archivo.name)
+        self.assertEqual(self.api.get(self.url).status_code, 404)
+
+    def test_sendfile(self):
+        with self.settings(ADJUSTMENTS_SETTINGS={'ATTACHMENT_SENDFILE': 'x-accel-redirect'}):
+            respuesta = self.api.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['X-Accel-Redirect'], f'/protected-media/{self.adjunto.archivo.name}')
+        self.assertEqual(respuesta.content, b'')
+
+
+class CatalogosApiTests(AjustesTestMixin, TestCase):
+    """Catálogos de solo lectura con GET condicional"""
+
+    def test_solo_lectura(self):
+        api = self.cliente(self.creador)
+        self.assertEqual(api.post('/api/adjustments/tipos/', {'nombre': 'CREDITO'}).status_code, 405)
+        self.assertEqual(api.delete(f'/api/adjustments/cuentas/{self.cuenta_debito.pk}/').status_code, 405)
+        self.assertEqual(api.patch(f'/api/adjustments/cuentas/{self.cuenta_debito.pk}/', {'nombre': 'X'}).status_code, 405)
+
+    def test_no_modificado(self):
+        api = self.cliente(self.creador)
+        respuesta = api.get('/api/adjustments/cuentas/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(api.get('/api/adjustments/cuentas/', HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+
+
+@override_settings(ADJUSTMENTS_SETTINGS={'CATALOG_CACHE_CHECK_SECONDS': 0})
+class CatalogosEnMemoriaTests(AjustesTestMixin, TestCase):
+    """La versión de los catálogos se comparte entre procesos a través de la base de datos"""
+
+    def test_otro_worker_recarga(self):
+        # Dos instancias del mismo catálogo simulan dos workers
+        worker = catalogos.Catalogo('TipoAjuste')
+        self.assertEqual(worker.obtener(self.tipo.pk).descripcion, self.tipo.descripcion)
+
+        TipoAjuste.objects.filter(pk=self.tipo.pk).update(descripcion='Nueva descripción')
+        self.assertNotEqual(worker.obtener(self.tipo.pk).descripcion, 'Nueva descripción')
+
+        catalogos.invalidar()
+        self.assertEqual(worker.obtener(self.tipo.pk).descripcion, 'Nueva descripción')
+
+    def test_sin_cambios_no_recarga(self):
+        worker = catalogos.Catalogo('CuentaContable')
+        worker.obtener(self.cuenta_debito.pk)
+        with self.assertNumQueries(1):
+            # Solo la lectura de la versión
+            self.assertEqual(worker.obtener(self.cuenta_debito.pk).codigo, '1105')
+
+    def test_version_separada_de_la_numeracion(self):
+        antes = catalogos.version_compartida()
+        contadores = list(ContadorNumeracion.objects.values_list('nombre', 'ultimo_valor'))
+
+        catalogos.invalidar()
+
+        self.assertEqual(catalogos.version_compartida(), antes + 1)
+        self.assertEqual(VersionCatalogo.objects.get(nombre=catalogos.NOMBRE_VERSION).version, antes + 1)
+        self.assertEqual(list(ContadorNumeracion.objects.values_list('nombre', 'ultimo_valor')), contadores)
+
+
+@override_settings(ADJUSTMENTS_SETTINGS={'CATALOG_CACHE_CHECK_SECONDS': 3600})
+class ConsultasPorAccionTests(AjustesTestMixin, TestCase):
+    """
+    Consultas SQL por acción de AjusteFinancieroViewSet.
+
+    Cada acción se mide con dos tamaños de página (o de relaciones
+    precargadas): si el número de consultas cambia, hay un N+1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.ajustes = [cls.crear_ajuste(estado='PENDIENTE') for _ in range(12)]
+        cls.con_pocas, cls.con_muchas = cls.ajustes[0], cls.ajustes[1]
+        for ajuste, cantidad in ((cls.con_pocas, 1), (cls.con_muchas, 6)):
+            for _ in range(cantidad):
+                HistorialAjuste.objects.create(
+                    ajuste=ajuste, estado_anterior='BORRADOR', estado_nuevo='PENDIENTE', usuario=cls.otro
+                )
+                ComentarioAjuste.objects.create(ajuste=ajuste, comentario='Revisado', usuario=cls.otro)
+
+    def assertConsultasPorPagina(self, usuario, url, consultas):
+        for tamano in (2, 10):
+            with self.subTest(tamano=tamano):
+                api = self.cliente(User.objects.get(pk=usuario.pk))
+                # Cargar los catálogos en memoria antes de medir
+                api.get(url)
+                with mock.patch.object(PageNumberPagination, 'page_size', tamano):
+                    with self.assertNumQueries(consultas):
+                        respuesta = api.get(url)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(len(respuesta.data['results']), tamano)
+
+    def assertConsultasPorAjuste(self, usuario, url, consultas):
+        for ajuste in (self.con_pocas, self.con_muchas):
+            with self.subTest(ajuste=ajuste.pk):
+                api = self.cliente(User.objects.get(pk=usuario.pk))
+                api.get(url.format(pk=ajuste.pk))
+                with self.assertNumQueries(consultas):
+                    respuesta = api.get(url.format(pk=ajuste.pk))
+                self.assertEqual(respuesta.status_code, 200)
+
+    def test_list(self):
+        # Conteo y página
+        self.assertConsultasPorPagina(self.creador, '/api/adjustments/', 2)
+        self.assertConsultasPorPagina(self.admin, '/api/adjustments/', 2)
+
+    def test_mis_ajustes(self):
+        # Conteo, página y tres precargas
+        self.assertConsultasPorPagina(self.creador, '/api/adjustments/mis_ajustes/', 5)
+
+    def test_pendientes_aprobacion(self):
+        self.assertConsultasPorPagina(self.admin, '/api/adjustments/pendientes_aprobacion/', 5)
+
+    def test_retrieve(self):
+        # Ajuste y tres precargas
+        self.assertConsultasPorAjuste(self.creador, '/api/adjustments/{pk}/', 4)
+
+    def test_historial(self):
+        # Ajuste e historial con su usuario
+        self.assertConsultasPorAjuste(self.creador, '/api/adjustments/{pk}/historial/', 2)
+
+
+class CamposDispersosAjustesTests(AjustesTestMixin, TestCase):
+    """?fields= y ?omit= en el listado de /api/adjustments/"""
+
+    url = '/api/adjustments/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.crear_ajuste()
+        cls.crear_ajuste()
+
+    def test_fields_recorta_la_respuesta(self):
+        respuesta = self.cliente(self.creador).get(self.url, {'fields': 'id,numero_ajuste,monto'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.data['results']), 2)
+        for fila in respuesta.data['results']:
+            self.assertEqual(set(fila), {'id', 'numero_ajuste', 'monto'})
+
+    def test_omit_quita_campos(self):
+        respuesta = self.cliente(self.creador).get(self.url, {'omit': 'usuario_creador,usuario_aprobador'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        campos = set(AjusteFinancieroListSerializer.Meta.fields) - {'usuario_creador', 'usuario_aprobador'}
+        for fila in respuesta.data['results']:
+            self.assertEqual(set(fila), campos)
+
+    def test_campo_desconocido(self):
+        api = self.cliente(self.creador)
+
+        for parametro in ('fields', 'omit'):
+            with self.subTest(parametro=parametro):
+                respuesta = api.get(self.url, {parametro: 'id,justificacion'})
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('justificacion', str(respuesta.data['fields']))
+
+    def test_consulta_solo_lee_las_columnas_pedidas(self):
+        api = self.cliente(self.creador)
+        api.get(self.url)
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = api.get(self.url, {'fields': 'id,monto,usuario_creador'})
+        self.assertEqual(respuesta.status_code, 200)
+        sql = consultas.captured_queries[-1]['sql']
+        self.assertIn('"monto"', sql)
+        self.assertIn('"username"', sql)
+        for columna in ('"descripcion"', '"justificacion"', '"concepto"'):
+            self.assertNotIn(columna, sql)
+
+    def test_proyectar_difiere_los_textos_largos(self):
+        queryset = AjusteFinancieroListSerializer.proyectar(AjusteFinanciero.objects.all(), ['id', 'monto'])
+
+        with self.assertNumQueries(1):
+            ajustes = list(queryset)
+        diferidos = ajustes[0].get_deferred_fields()
+        self.assertIn('descripcion', diferidos)
+        self.assertIn('justificacion', diferidos)
+        self.assertNotIn('monto', diferidos)
+
+
+class EliminacionLoteTests(AjustesTestMixin, TestCase):
+    """POST /api/adjustments/bulk-delete/"""
+
+    URL = '/api/adjustments/bulk-delete/'
+
+    def setUp(self):
+        super().setUp()
+        self.propios = [self.crear_ajuste() for _ in range(3)]
+        self.ajenos = [self.crear_ajuste(self.otro) for _ in range(2)]
+
+    def test_ids_ajenos_se_ignoran(self):
+        ids = [ajuste.pk for ajuste in self.propios + self.ajenos]
+        respuesta = self.cliente(self.creador).post(self.URL, {'ajuste_ids': ids}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['eliminados'], 3)
+        self.assertEqual(
+            set(AjusteFinanciero.objects.values_list('pk', flat=True)),
+            {ajuste.pk for ajuste in self.ajenos}
+        )
+
+    def test_filtro_limitado_a_visibles(self):
+        respuesta = self.cliente(self.otro).post(self.URL, {'filtro': {'estado': ['BORRADOR']}}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['eliminados'], 2)
+        self.assertEqual(AjusteFinanciero.objects.count(), 3)
+
+    def test_administrador_elimina_todos(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        respuesta = self.cliente(admin).post(self.URL, {'filtro': {'estado': ['BORRADOR']}}, format='json')
+        self.assertEqual(respuesta.data['eliminados'], 5)
+
+    def test_no_editables_detienen_todo(self):
+        AjusteFinanciero.objects.filter(pk=self.propios[0].pk).update(estado='APROBADO')
+        # Un ajeno no editable no cuenta: el usuario no lo ve
+        AjusteFinanciero.objects.filter(pk=self.ajenos[0].pk).update(estado='APROBADO')
+        respuesta = self.cliente(self.creador).post(
+            self.URL, {'ajuste_ids': [ajuste.pk for ajuste in self.propios + self.ajenos]}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual([fila['id'] for fila in respuesta.data['no_editables']], [self.propios[0].pk])
+        self.assertEqual(AjusteFinanciero.objects.count(), 5)
+
+    def test_lotes(self):
+        HistorialAjuste.objects.create(
+            ajuste=self.propios[0], estado_anterior='BORRADOR', estado_nuevo='RECHAZADO', usuario=self.creador
+        )
+        with self.settings(ADJUSTMENTS_SETTINGS={'BULK_DELETE_CHUNK': 2}):
+            respuesta = self.cliente(self.creador).post(self.URL, {'filtro': {'estado': ['BORRADOR']}}, format='json')
+        self.assertEqual(respuesta.data['eliminados'], 3)
+        self.assertFalse(HistorialAjuste.objects.exists())
+
+
+class RecuperarExportacionesTests(AjustesTestMixin, TestCase):
+    """Exportaciones en segundo plano que quedaron sin terminar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.plantilla = ReportTemplate.objects.create(
+            nombre=PLANTILLA_EXPORTACION, descripcion='Exportación', tipo_reporte='DETALLADO',
+            formato_default='EXCEL', usuario_creador=cls.creador,
+        )
+
+    def crear_ejecucion(self, minutos, estado='PROCESANDO'):
+        ejecucion = ReportExecution.objects.create(
+            plantilla=self.plantilla, usuario=self.creador, formato='CSV', estado=estado
+        )
+        inicio = timezone.now() - timedelta(minutes=minutos)
+        ReportExecution.objects.filter(pk=ejecucion.pk).update(fecha_solicitud=inicio, fecha_inicio=inicio)
+        return ejecucion
+
+    def test_estado_marca_huerfana(self):
+        huerfana = self.crear_ejecucion(90)
+        en_curso = self.crear_ejecucion(5)
+        api = self.cliente(self.creador)
+
+        respuesta = api.get(f'/api/adjustments/export/{huerfana.pk}/')
+        self.assertEqual(respuesta.data['estado'], 'ERROR')
+        self.assertEqual(respuesta.data['mensaje_error'], MENSAJE_INTERRUMPIDA)
+
+        respuesta = api.get(f'/api/adjustments/export/{en_curso.pk}/')
+        self.assertEqual(respuesta.data['estado'], 'PROCESANDO')
+
+    def test_comando(self):
+        procesando = self.crear_ejecucion(90)
+        pendiente = self.crear_ejecucion(90, estado='PENDIENTE')
+        reciente = self.crear_ejecucion(5)
+        completada = self.crear_ejecucion(90, estado='COMPLETADO')
+
+        salida = StringIO()
+        call_command('recuperar_exportaciones', stdout=salida)
+        self.assertIn('2 exportaciones', salida.getvalue())
+
+        estados = dict(ReportExecution.objects.values_list('pk', 'estado'))
+        self.assertEqual(estados[procesando.pk], 'ERROR')
+        self.assertEqual(estados[pendiente.pk], 'ERROR')
+        self.assertEqual(estados[reciente.pk], 'PROCESANDO')
+        self.assertEqual(estados[completada.pk], 'COMPLETADO')
+
+        call_command('recuperar_exportaciones', '--minutos', '1', stdout=salida)
+        self.assertEqual(ReportExecution.objects.get(pk=reciente.pk).estado, 'ERROR')
+
+
+class ExportacionAsincronaTests(AjustesTestMixin, MediaTemporalMixin, TestCase):
+    """POST /api/adjustments/export/ con asincrono=true y adjustments.tareas.exportar_ajustes"""
+
+    def setUp(self):
+        super().setUp()
+        for _ in range(3):
+            self.crear_ajuste()
+        self.crear_ajuste(estado='PENDIENTE')
+        self.api = self.cliente(self.creador)
+
+    def solicitar(self, **datos):
+        with self.captureOnCommitCallbacks() as al_confirmar:
+            respuesta = self.api.post(
+                '/api/adjustments/export/', {'asincrono': True, 'estado': ['BORRADOR'], **datos}, format='json'
+            )
+        # La tarea se encola al confirmar; las pruebas la ejecutan directamente
+        self.assertEqual(len(al_confirmar), 1)
+        return respuesta
+
+    def test_solicitud_responde_202(self):
+        respuesta = self.solicitar(formato='csv')
+
+        self.assertEqual(respuesta.status_code, 202)
+        ejecucion = ReportExecution.objects.get()
+        self.assertEqual(respuesta['Location'], f'/api/adjustments/export/{ejecucion.pk}/')
+        self.assertEqual((ejecucion.estado, ejecucion.formato), ('PENDIENTE', 'CSV'))
+        self.assertEqual(ejecucion.parametros['estado'], ['BORRADOR'])
+
+    def test_exportar_csv_y_descargar(self):
+        ejecucion = ReportExecution.objects.get(pk=self.solicitar(formato='csv').data['id'])
+        descarga = f'/api/adjustments/export/{ejecucion.pk}/descargar/'
+        self.assertEqual(self.api.get(descarga).status_code, 409)
+
+        exportar_ajustes(ejecucion.pk)
+
+        ejecucion.refresh_from_db()
+        self.assertEqual((ejecucion.estado, ejecucion.registros_procesados), ('COMPLETADO', 3))
+        self.assertTrue(ejecucion.archivo_resultado.name.startswith('reportes/'))
+        self.assertTrue(ejecucion.archivo_resultado.name.endswith('.csv'))
+
+        respuesta = self.api.get(descarga)
+        self.assertEqual(respuesta.status_code, 200)
+        filas = list(csv.reader(StringIO(b''.join(respuesta.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(len(filas), 4)
+
+    def test_exportar_excel(self):
+        ejecucion = ReportExecution.objects.get(pk=self.solicitar(formato='excel').data['id'])
+
+        exportar_ajustes(ejecucion.pk)
+
+        ejecucion.refresh_from_db()
+        self.assertEqual(ejecucion.estado, 'COMPLETADO')
+        with ejecucion.archivo_resultado.open('rb') as archivo:
+            hoja = load_workbook(archivo).active
+            self.assertEqual(hoja.max_row, 4)
+
+    def test_error_se_registra(self):
+        ejecucion = ReportExecution.objects.get(pk=self.solicitar(formato='csv').data['id'])
+        ReportExecution.objects.filter(pk=ejecucion.pk).update(parametros={'formato': 'desconocido'})
+
+        with self.assertLogs('adjustments.tareas', 'ERROR'):
+            exportar_ajustes(ejecucion.pk)
+
+        ejecucion.refresh_from_db()
+        self.assertEqual(ejecucion.estado, 'ERROR')
+        self.assertEqual(self.api.get(f'/api/adjustments/export/{ejecucion.pk}/descargar/').status_code, 409)
+
+
+class PaginacionCursorTests(RegistrosTestMixin, TestCase):
+    """Paginación keyset de /api/registros/?paginacion=cursor"""
+
+    URL = '/api/registros/?paginacion=cursor&page_size=10'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.registros = cls.crear_registros(25)
+        # Varias filas con el mismo created_at: el id desempata
+        RegistroAjuste.objects.filter(pk__in=[r.pk for r in cls.registros[8:14]]).update(
+            created_at=cls.registros[8].created_at
+        )
+
+    def orden_esperado(self):
+        return list(RegistroAjuste.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def recorrer(self, url):
+        paginas = []
+        while url:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            paginas.append([fila['id'] for fila in respuesta.json()['registros']])
+            url = respuesta.json()['next']
+        return paginas
+
+    def test_recorrido_completo(self):
+        paginas = self.recorrer(self.URL)
+        self.assertEqual([len(pagina) for pagina in paginas], [10, 10, 5])
+        self.assertEqual(sum(paginas, []), self.orden_esperado())
+
+    def test_limite_exacto_de_pagina(self):
+        paginas = self.recorrer('/api/registros/?paginacion=cursor&page_size=5')
+        self.assertEqual([len(pagina) for pagina in paginas], [5] * 5)
+        self.assertEqual(sum(paginas, []), self.orden_esperado())
+
+    def test_anterior(self):
+        primera = self.client.get(self.URL).json()
+        self.assertIsNone(primera['previous'])
+        segunda = self.client.get(primera['next']).json()
+        regreso = self.client.get(segunda['previous']).json()
+        self.assertEqual(
+            [fila['id'] for fila in regreso['registros']],
+            [fila['id'] for fila in primera['registros']]
+        )
+
+    def test_cursor_estable_con_inserciones(self):
+        primera = self.client.get(self.URL).json()
+        segunda = [fila['id'] for fila in self.client.get(primera['next']).json()['registros']]
+
+        # Las filas nuevas quedan antes del cursor y no desplazan las páginas siguientes
+        self.crear_registros(3)
+        self.assertEqual([fila['id'] for fila in self.client.get(primera['next']).json()['registros']], segunda)
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/registros/?cursor=no-es-un-cursor').status_code, 404)
+
+    def test_total(self):
+        sin_total = self.client.get(self.URL).json()
+        self.assertIsNone(sin_total['total'])
+        self.assertNotIn('total_aproximado', sin_total)
+
+        exacto = self.client.get(self.URL + '&total=exacto').json()
+        self.assertEqual(exacto['total'], 25)
+        self.assertIs(exacto['total_aproximado'], False)
+
+        aproximado = self.client.get(self.URL + '&total=aproximado').json()
+        if connection.vendor == 'postgresql':
+            self.assertIs(aproximado['total_aproximado'], True)
+        else:
+            # Sin estimación del planificador el total se cuenta
+            self.assertEqual(aproximado['total'], 25)
+            self.assertIs(aproximado['total_aproximado'], False)
+
+
+class BusquedaRegistrosTests(RegistrosTestMixin, TestCase):
+    """Parámetro search de /api/registros/ (adjustments.search)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.registros = cls.crear_registros(12)
+
+    def buscar(self, texto):
+        respuesta = self.client.get('/api/registros/', {'search': texto, 'page_size': 100})
+        self.assertEqual(respuesta.status_code, 200)
+        return {fila['id'] for fila in respuesta.json()['registros']}
+
+    def test_prefijo_de_palabra(self):
+        esperados = {r.pk for r in self.registros if r.asesor_que_ajusto == 'María González'}
+        self.assertEqual(self.buscar('gonz'), esperados)
+        self.assertEqual(self.buscar('maria gonzalez'), esperados)
+
+    def test_subcadena_de_identificador(self):
+        # 'TA-0' está dentro de 'CTA-000-2024' pero no al inicio de una palabra
+        self.assertEqual(self.buscar('TA-0'), {r.pk for r in self.registros})
+        self.assertEqual(self.buscar('CTA-003'), {r.pk for r in self.registros if r.id_cuenta == 'CTA-003-2024'})
+
+    def test_termino_corto(self):
+        self.assertEqual(self.buscar('AS-0011'), {self.registros[11].pk})
+        self.assertEqual(self.buscar('11'), {self.registros[11].pk})
+
+
+class EstadisticasRegistrosTests(RegistrosTestMixin, TestCase):
+    """GET /api/registros/stats/"""
+
+    URL = '/api/registros/stats/'
+
+    @classmethod
+    def setUpTestData(cls):
+        # María: 0 y 3, Juan: 1 y 4, Ana: 2, 5 y el adicional
+        cls.registros = cls.crear_registros(6)
+        cls.crear_registros(1, asesor_que_ajusto='Ana Ruiz', id_acuerdo_servicio='AS-EXTRA')
+        RegistroAjuste.objects.filter(pk=cls.registros[5].pk).update(
+            created_at=timezone.now() - timedelta(days=45)
+        )
+
+    def stats(self, **parametros):
+        respuesta = self.client.get(self.URL, parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def test_resumen(self):
+        data = self.stats()
+
+        valores = list(RegistroAjuste.objects.values_list('valor_ajustado', flat=True))
+        self.assertEqual(data['total_registros'], 7)
+        self.assertEqual(Decimal(str(data['total_valor'])), sum(valores))
+        self.assertEqual(Decimal(str(data['valor_minimo'])), min(valores))
+        self.assertEqual(Decimal(str(data['valor_maximo'])), max(valores))
+        self.assertEqual(data['registros_ultimo_mes'], 6)
+        self.assertEqual(data['asesores_activos'], 3)
+
+    def test_sin_resultados(self):
+        data = self.stats(search='inexistente')
+
+        self.assertEqual(data['total_registros'], 0)
+        self.assertEqual((data['total_valor'], data['promedio_valor']), (0, 0))
+        self.assertIsNone(data['valor_minimo'])
+        self.assertIsNone(data['valor_maximo'])
+        self.assertEqual((data['por_asesor'], data['por_dia']), ([], []))
+        self.assertEqual((data['registros_ultimo_mes'], data['asesores_activos']), (0, 0))
+
+    def test_desgloses_ordenados(self):
+        data = self.stats()
+
+        self.assertEqual(
+            [(fila['asesor'], fila['total_registros']) for fila in data['por_asesor']],
+            [('Ana Ruiz', 3), ('Juan Pérez', 2), ('María González', 2)]
+        )
+        fechas = [fila['fecha'] for fila in data['por_dia']]
+        self.assertEqual(fechas, sorted(fechas, reverse=True))
+        self.assertEqual(data['por_dia'][0], {
+            'fecha': date.today().isoformat(), 'total_registros': 2,
+            'total_valor': float(self.registros[0].valor_ajustado * 2),
+        })
+
+    def test_limite_de_los_desgloses(self):
+        for limite, esperado in (('1', 1), ('0', 1), ('2', 2), ('9999', 3), ('abc', 3)):
+            with self.subTest(limite=limite):
+                self.assertEqual(len(self.stats(limite=limite)['por_asesor']), esperado)
+
+    def test_filtros(self):
+        data = self.stats(fecha_desde=(date.today() - timedelta(days=1)).isoformat())
+        self.assertEqual(data['total_registros'], 3)
+        self.assertEqual(len(data['por_dia']), 2)
+
+        data = self.stats(search='AS-0004')
+        self.assertEqual(data['total_registros'], 1)
+        self.assertEqual(data['por_asesor'], [
+            {'asesor': 'Juan Pérez', 'total_registros': 1, 'total_valor': float(self.registros[4].valor_ajustado)}
+        ])
+
+        self.assertEqual(self.stats(asesor='maría')['total_registros'], 2)
+
+
+class NumeracionTests(AjustesTestMixin, TestCase):
+    """Asignación de numero_ajuste (adjustments.numeracion)"""
+
+    def test_numeros_unicos_y_crecientes(self):
+        numeros = [self.crear_ajuste().numero_ajuste for _ in range(5)]
+        self.assertEqual(len(set(numeros)), 5)
+        self.assertEqual(numeros, sorted(numeros))
+        self.assertTrue(all(numero.startswith('AJ') and len(numero) == 10 for numero in numeros))
+
+    def test_continua_despues_del_mayor_existente(self):
+        migracion = importlib.import_module('adjustments.migrations.0009_contador_numeracion')
+
+        self.crear_ajuste()
+        AjusteFinanciero.objects.create(
+            numero_ajuste='AJ00000950', fecha_ajuste=timezone.now(), fecha_valor=date.today(),
+            tipo_ajuste=self.tipo, cuenta_debito=self.cuenta_debito, cuenta_credito=self.cuenta_credito,
+            monto=Decimal('-1.00'), concepto='Importado', descripcion='-', justificacion='-',
+            usuario_creador=self.creador,
+        )
+        self.assertEqual(migracion.ultimo_valor_existente(AjusteFinanciero, 'default'), 950)
+
+
+class ExportacionAjustesTests(AjustesTestMixin, TestCase):
+    """POST /api/adjustments/export/ en CSV y Excel"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # 03:30 UTC es 22:30 del día anterior en America/Bogota
+        cls.ajuste = cls.crear_ajuste(fecha_ajuste=datetime(2025, 1, 15, 3, 30, tzinfo=dt_timezone.utc))
+
+    def exportar(self, formato):
+        respuesta = self.cliente(self.creador).post('/api/adjustments/export/', {'formato': formato}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        return b''.join(respuesta.streaming_content)
+
+    def test_csv_en_hora_local(self):
+        filas = list(csv.reader(self.exportar('csv').decode('utf-8-sig').splitlines()))
+        self.assertEqual(filas[1][0], self.ajuste.numero_ajuste)
+        self.assertEqual(filas[1][1], '2025-01-14 22:30:00')
+
+    def test_excel_en_hora_local(self):
+        hoja = load_workbook(BytesIO(self.exportar('excel'))).active
+        filas = list(hoja.iter_rows(values_only=True))
+        self.assertEqual(filas[1][0], self.ajuste.numero_ajuste)
+        self.assertEqual(filas[1][1], datetime(2025, 1, 14, 22, 30))
+
+
+class VerificacionesTests(TestCase):
+    """Verificaciones de sistema de adjustments.checks"""
+
+    def test_cache_local(self):
+        from .checks import cache_compartida
+
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        with self.settings(CACHES=locmem):
+            self.assertEqual([aviso.id for aviso in cache_compartida(None)], ['adjustments.W001'])
+        with self.settings(CACHES=redis):
+            self.assertEqual(cache_compartida(None), [])
+
+
+class DimensionesRegistroTests(RegistrosTestMixin, TestCase):
+    """Tablas de dimensión de asesores y cuentas mantenidas por las señales"""
+
+    def setUp(self):
+        self.hoy = date.today()
+        self.reciente, self.anterior = self.crear_registros(2, asesor_que_ajusto='Ana Ruiz', id_cuenta='CTA-001')
+        RegistroAjuste.objects.filter(pk=self.anterior.pk).update(fecha_ajuste=self.hoy - timedelta(days=10))
+        self.reciente.fecha_ajuste = self.hoy
+        self.reciente.save()
+
+    def dimension(self, modelo=DimensionAsesor, **filtro):
+        return modelo.objects.filter(**(filtro or {'nombre': 'Ana Ruiz'})).first()
+
+    def test_alta(self):
+        self.assertEqual(self.dimension().total_registros, 2)
+        self.assertEqual(self.dimension().ultima_fecha_ajuste, self.hoy)
+        self.assertEqual(self.dimension(DimensionCuenta, id_cuenta='CTA-001').total_registros, 2)
+
+    def test_eliminar_el_mas_reciente(self):
+        self.reciente.delete()
+        self.assertEqual(self.dimension().total_registros, 1)
+        self.assertEqual(self.dimension().ultima_fecha_ajuste, self.hoy - timedelta(days=10))
+
+        RegistroAjuste.objects.get(pk=self.anterior.pk).delete()
+        self.assertIsNone(self.dimension())
+
+    def test_fecha_que_retrocede(self):
+        self.reciente.fecha_ajuste = self.hoy - timedelta(days=20)
+        self.reciente.save()
+        self.assertEqual(self.dimension().ultima_fecha_ajuste, self.hoy - timedelta(days=10))
+
+    def test_cambio_de_clave(self):
+        self.reciente.asesor_que_ajusto = 'Juan Pérez'
+        self.reciente.save()
+        self.assertEqual(self.dimension().total_registros, 1)
+        self.assertEqual(self.dimension().ultima_fecha_ajuste, self.hoy - timedelta(days=10))
+        self.assertEqual(self.dimension(nombre='Juan Pérez').ultima_fecha_ajuste, self.hoy)
+
+
+class ReglasValidacionTests(AjustesTestMixin, TestCase):
+    """Los serializers y la importación masiva aplican las mismas reglas"""
+
+    REGISTRO = {
+        'id_cuenta': 'CTA-001-2024',
+        'id_acuerdo_servicio': 'AS-0001',
+        'id_cargo_facturable': 'CF-1',
+        'fecha_ajuste': '2025-01-15',
+        'asesor_que_ajusto': 'María González',
+        'valor_ajustado': '-150.00',
+        'justificacion': 'Diferencia detectada en la facturación del cliente',
+    }
+
+    def errores_serializer(self, serializer):
+        if serializer.is_valid():
+            return None
+        return {campo: [str(mensaje) for mensaje in mensajes] for campo, mensajes in serializer.errors.items()}
+
+    def test_registro_mismos_mensajes_en_api_e_importacion(self):
+        manana = (date.today() + timedelta(days=1)).isoformat()
+        casos = [
+            {},
+            {'fecha_ajuste': manana},
+            {'valor_ajustado': '25.00'},
+            {'valor_ajustado': '-20000000'},
+            {'justificacion': 'Corta'},
+            {'justificacion': 'Ajuste de prueba del cierre'},
+            {'valor_ajustado': '-150000', 'justificacion': 'Diferencia en factura'},
+        ]
+        contexto = ImportadorRegistros(self.creador).contexto()
+        for cambios in casos:
+            with self.subTest(cambios=cambios):
+                datos = {**self.REGISTRO, **cambios}
+                _, errores_importacion = validacion.validar_registro(datos, contexto)
+                self.assertEqual(errores_importacion is None, not cambios)
+                self.assertEqual(self.errores_serializer(RegistroAjusteSerializer(data=datos)), errores_importacion)
+
+    def test_ajuste_mismo_primer_mensaje_en_api_e_importacion(self):
+        inactiva = CuentaContable.objects.create(
+            codigo='3305', nombre='Inactiva', tipo_cuenta='PATRIMONIO', activo=False
+        )
+        tipo_inactivo = TipoAjuste.objects.create(nombre='CREDITO', activo=False)
+        catalogos.invalidar()
+        casos = [
+            (self.tipo, self.cuenta_debito, self.cuenta_credito),
+            (self.tipo, self.cuenta_debito, self.cuenta_debito),
+            (self.tipo, inactiva, self.cuenta_credito),
+            (self.tipo, self.cuenta_debito, inactiva),
+            (tipo_inactivo, self.cuenta_debito, self.cuenta_credito),
+            (tipo_inactivo, inactiva, inactiva),
+        ]
+        contexto = ImportadorAjustes(self.creador).contexto()
+        for tipo, debito, credito in casos:
+            with self.subTest(tipo=tipo.nombre, debito=debito.codigo, credito=credito.codigo):
+                serializer = AjusteFinancieroCreateUpdateSerializer(data={
+                    'fecha_ajuste': '2025-01-15T10:00:00', 'fecha_valor': '2025-01-15',
+                    'tipo_ajuste': tipo.pk, 'cuenta_debito': debito.pk, 'cuenta_credito': credito.pk,
+                    'monto': '-10.00', 'concepto': 'Ajuste', 'descripcion': 'Descripción',
+                    'justificacion': 'Justificación del ajuste',
+                })
+                _, errores_importacion = validacion.validar_ajuste({
+                    'fecha_ajuste': '2025-01-15 10:00', 'fecha_valor': '2025-01-15',
+                    'tipo_ajuste': tipo.nombre, 'cuenta_debito': debito.codigo, 'cuenta_credito': credito.codigo,
+                    'monto': '-10.00', 'concepto': 'Ajuste', 'descripcion': 'Descripción',
+                    'justificacion': 'Justificación del ajuste',
+                }, contexto)
+                errores = self.errores_serializer(serializer)
+                if errores_importacion is None:
+                    self.assertIsNone(errores)
+                else:
+                    primero = next(iter(errores_importacion.values()))[0]
+                    self.assertEqual(errores, {'non_field_errors': [primero]})
+
+
+class LoteRegistrosTests(TestCase):
+    """POST /api/registros/lote/"""
+
+    URL = '/api/registros/lote/'
+
+    def registro(self, indice, **campos):
+        datos = {
+            'id_cuenta': 'CTA-010-2024',
+            'id_acuerdo_servicio': f'AS-{indice:04d}',
+            'id_cargo_facturable': 'CF-1',
+            'fecha_ajuste': date.today().isoformat(),
+            'asesor_que_ajusto': 'Ana Ruiz',
+            'valor_ajustado': '-120.00',
+            'justificacion': 'Diferencia detectada en la facturación del cliente',
+        }
+        datos.update(campos)
+        return datos
+
+    def test_crea_los_validos_y_reporta_los_invalidos(self):
+        items = [self.registro(0), self.registro(1, valor_ajustado='5.00'), self.registro(2)]
+        respuesta = self.client.post(self.URL, items, content_type='application/json')
+
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data['creados'], 2)
+        self.assertCountEqual(respuesta.data['ids'], RegistroAjuste.objects.values_list('pk', flat=True))
+        self.assertEqual([error['indice'] for error in respuesta.data['errores']], [1])
+        self.assertIn('valor_ajustado', respuesta.data['errores'][0]['errores'])
+        self.assertEqual(DimensionAsesor.objects.get(nombre='Ana Ruiz').total_registros, 2)
+        self.assertEqual(DimensionCuenta.objects.get(id_cuenta='CTA-010-2024').total_registros, 2)
+
+    def test_atomico_no_inserta_si_hay_errores(self):
+        respuesta = self.client.post(self.URL, {
+            'atomico': True,
+            'registros': [self.registro(0), self.registro(1, justificacion='Corta')],
+        }, content_type='application/json')
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['creados'], 0)
+        self.assertFalse(RegistroAjuste.objects.exists())
+        self.assertFalse(DimensionAsesor.objects.exists())
+
+    @override_settings(ADJUSTMENTS_SETTINGS={'MAX_BATCH_SIZE': 2})
+    def test_limite_del_lote(self):
+        items = [self.registro(i) for i in range(3)]
+        respuesta = self.client.post(self.URL, items, content_type='application/json')
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(RegistroAjuste.objects.exists())
+
+    def test_lista_vacia(self):
+        respuesta = self.client.post(self.URL, [], content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class ExportacionRegistrosTests(RegistrosTestMixin, TestCase):
+    """GET /api/registros/exportar/ en streaming"""
+
+    URL = '/api/registros/exportar/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.crear_registros(6)
+
+    def contenido(self, respuesta):
+        self.assertTrue(respuesta.streaming)
+        return b''.join(respuesta.streaming_content).decode('utf-8')
+
+    def test_csv_con_los_filtros_del_listado(self):
+        respuesta = self.client.get(self.URL, {'asesor': 'Juan'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        filas = list(csv.reader(StringIO(self.contenido(respuesta))))
+        self.assertEqual(filas[0][:3], ['id', 'id_cuenta', 'id_acuerdo_servicio'])
+        esperados = RegistroAjuste.objects.filter(asesor_que_ajusto='Juan Pérez').order_by('-created_at')
+        self.assertEqual([int(fila[0]) for fila in filas[1:]], [registro.pk for registro in esperados])
+        self.assertEqual(filas[1][6], str(esperados[0].valor_ajustado))
+
+    def test_ndjson(self):
+        respuesta = self.client.get(self.URL, {'formato': 'ndjson'})
+
+        self.assertEqual(respuesta['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lineas = [json.loads(linea) for linea in self.contenido(respuesta).splitlines()]
+        self.assertEqual(len(lineas), 6)
+        primero = RegistroAjuste.objects.order_by('-created_at').first()
+        self.assertEqual(lineas[0]['id'], primero.pk)
+        self.assertEqual(lineas[0]['asesor_que_ajusto'], primero.asesor_que_ajusto)
+        self.assertEqual(lineas[0]['fecha_ajuste'], primero.fecha_ajuste.isoformat())
+
+    def test_formato_no_soportado(self):
+        self.assertEqual(self.client.get(self.URL, {'formato': 'xml'}).status_code, 400)
+
+    def test_sin_resultados(self):
+        # CSV: solo encabezados; NDJSON: cuerpo vacío
+        respuesta = self.client.get(self.URL, {'asesor': 'Nadie'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            list(csv.reader(StringIO(self.contenido(respuesta)))),
+            [RegistroAjusteViewSet.CAMPOS_EXPORTACION]
+        )
+
+        respuesta = self.client.get(self.URL, {'asesor': 'Nadie', 'formato': 'ndjson'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.contenido(respuesta), '')
+
+    def test_varios_bloques(self):
+        # Cursor de 2 filas y bloques de 2 filas: 6 registros salen en 3 bloques
+        esperados = list(RegistroAjuste.objects.order_by('-created_at').values_list('pk', flat=True))
+        with mock.patch('adjustments.frontend_views.CHUNK_SIZE', 2), \
+                mock.patch('adjustments.frontend_views.generar_csv',
+                           partial(exports.generar_csv, filas_por_bloque=2)), \
+                mock.patch('adjustments.frontend_views.generar_ndjson',
+                           partial(exports.generar_ndjson, filas_por_bloque=2)):
+            bloques_csv = list(self.client.get(self.URL).streaming_content)
+            bloques_ndjson = list(self.client.get(self.URL, {'formato': 'ndjson'}).streaming_content)
+
+        # Encabezados y tres bloques de filas
+        self.assertEqual(len(bloques_csv), 4)
+        filas = list(csv.reader(StringIO(b''.join(bloques_csv).decode('utf-8'))))
+        self.assertEqual([int(fila[0]) for fila in filas[1:]], esperados)
+
+        self.assertEqual(len(bloques_ndjson), 3)
+        for bloque in bloques_ndjson:
+            self.assertEqual(len(bloque.decode('utf-8').splitlines()), 2)
+        lineas = b''.join(bloques_ndjson).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(linea)['id'] for linea in lineas], esperados)
+
+
+class LecturaRapidaRegistrosTests(RegistrosTestMixin, TestCase):
+    """RegistroAjusteLecturaRapida produce el mismo JSON que RegistroAjusteSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.crear_registros(4)
+        cls.crear_registros(1, valor_ajustado=Decimal('-250000.5'), id_acuerdo_servicio='AS-ALTO')
+        RegistroAjuste.objects.filter(id_acuerdo_servicio='AS-0002').update(
+            created_at=timezone.now() - timedelta(days=45)
+        )
+
+    def renderizar(self, datos):
+        return JSONRenderer().render(datos)
+
+    def esperado(self, queryset):
+        return RegistroAjusteSerializer(queryset, many=True).data
+
+    def test_listado_identico_byte_a_byte(self):
+        respuesta = self.client.get('/api/registros/', {'page_size': 100})
+
+        self.assertEqual(
+            self.renderizar(respuesta.data['registros']),
+            self.renderizar(self.esperado(RegistroAjuste.objects.order_by('-created_at')))
+        )
+
+    def test_detalle_identico_byte_a_byte(self):
+        registro = RegistroAjuste.objects.get(id_acuerdo_servicio='AS-ALTO')
+        respuesta = self.client.get(f'/api/registros/{registro.pk}/')
+
+        self.assertEqual(
+            self.renderizar(respuesta.data),
+            self.renderizar(RegistroAjusteSerializer(registro).data)
+        )
+        self.assertTrue(respuesta.data['_metadata']['requires_approval'])
+
+    def test_campos_seleccionados(self):
+        respuesta = self.client.get('/api/registros/', {'fields': 'id,valor_ajustado_display,edad_registro'})
+
+        completos = self.esperado(RegistroAjuste.objects.order_by('-created_at')[:10])
+        self.assertEqual(
+            self.renderizar(respuesta.data['registros']),
+            self.renderizar([
+                {campo: fila[campo] for campo in ('id', 'valor_ajustado_display', 'edad_registro')}
+                for fila in completos
+            ])
+        )
+
+
+class CambioEstadoVersionTests(AjustesTestMixin, TestCase):
+    """cambiar_estado con compare-and-swap sobre AjusteFinanciero.version"""
+
+    def setUp(self):
+        super().setUp()
+        self.ajuste = self.crear_ajuste()
+        self.url = f'/api/adjustments/{self.ajuste.pk}/cambiar_estado/'
+        self.api = self.cliente(self.creador)
+
+    def test_cambio_incrementa_la_version(self):
+        respuesta = self.api.post(self.url, {'nuevo_estado': 'PENDIENTE', 'version': 1}, format='json')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['version'], 2)
+        self.ajuste.refresh_from_db()
+        self.assertEqual((self.ajuste.estado, self.ajuste.version), ('PENDIENTE', 2))
+        self.assertEqual(HistorialAjuste.objects.filter(ajuste=self.ajuste).count(), 1)
+
+    def test_version_desactualizada_responde_409(self):
+        self.api.post(self.url, {'nuevo_estado': 'PENDIENTE'}, format='json')
+        historial = HistorialAjuste.objects.filter(ajuste=self.ajuste).count()
+
+        respuesta = self.api.post(self.url, {'nuevo_estado': 'RECHAZADO', 'version': 1}, format='json')
+
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.data['estado_actual'], 'PENDIENTE')
+        self.assertEqual(respuesta.data['version'], 2)
+        self.assertEqual(HistorialAjuste.objects.filter(ajuste=self.ajuste).count(), historial)
+
+    def test_cambio_concurrente_entre_lectura_y_escritura(self):
+        validar = CambiarEstadoAjusteSerializer.validate_nuevo_estado
+
+        def otro_usuario_cambia(serializer, valor):
+            # Otra petición confirma su cambio después de que esta leyó el ajuste
+            AjusteFinanciero.objects.filter(pk=self.ajuste.pk).update(
+                estado='PENDIENTE', version=F('version') + 1
+            )
+            return validar(serializer, valor)
+
+        with mock.patch.object(CambiarEstadoAjusteSerializer, 'validate_nuevo_estado', otro_usuario_cambia):
+            respuesta = self.api.post(self.url, {'nuevo_estado': 'PENDIENTE'}, format='json')
+
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.data['version'], 2)
+        self.assertFalse(HistorialAjuste.objects.filter(ajuste=self.ajuste).exists())
+
+    def test_edicion_con_version(self):
+        respuesta = self.api.patch(
+            f'/api/adjustments/{self.ajuste.pk}/', {'concepto': 'Nuevo concepto', 'version': 1}, format='json'
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['version'], 2)
+        self.ajuste.refresh_from_db()
+        self.assertEqual((self.ajuste.concepto, self.ajuste.version), ('Nuevo concepto', 2))
+
+        respuesta = self.api.patch(
+            f'/api/adjustments/{self.ajuste.pk}/', {'concepto': 'Otro', 'version': 1}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 409)
+
+    def test_edicion_no_deshace_un_cambio_de_estado_concurrente(self):
+        validar = AjusteFinancieroCreateUpdateSerializer.validate
+
+        def cambio_de_estado_concurrente(serializer, datos):
+            # cambiar_estado confirma después de que el PATCH leyó el ajuste
+            self.assertEqual(
+                self.api.post(self.url, {'nuevo_estado': 'PENDIENTE'}, format='json').status_code, 200
+            )
+            return validar(serializer, datos)
+
+        with mock.patch.object(AjusteFinancieroCreateUpdateSerializer, 'validate', cambio_de_estado_concurrente):
+            respuesta = self.api.patch(f'/api/adjustments/{self.ajuste.pk}/', {'concepto': 'Editado'}, format='json')
+
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.data['estado_actual'], 'PENDIENTE')
+        self.ajuste.refresh_from_db()
+        self.assertEqual(
+            (self.ajuste.estado, self.ajuste.concepto, self.ajuste.version), ('PENDIENTE', 'Ajuste de prueba', 2)
+        )
+
+    def test_save_incrementa_la_version(self):
+        self.ajuste.concepto = 'Desde el admin'
+        self.ajuste.save(update_fields=['concepto'])
+        self.ajuste.refresh_from_db()
+        self.assertEqual(self.ajuste.version, 2)
+
+    def test_guardar_con_version_no_pisa_otra_escritura(self):
+        primera = AjusteFinanciero.objects.get(pk=self.ajuste.pk)
+        segunda = AjusteFinanciero.objects.get(pk=self.ajuste.pk)
+
+        primera.estado = 'PENDIENTE'
+        self.assertTrue(primera.guardar_con_version(['estado']))
+        segunda.concepto = 'Otro concepto'
+        self.assertFalse(segunda.guardar_con_version(['concepto']))
+
+        self.ajuste.refresh_from_db()
+        self.assertEqual((self.ajuste.estado, self.ajuste.concepto, self.ajuste.version),
+                         ('PENDIENTE', 'Ajuste de prueba', 2))
+
+
+class ColaAprobacionTests(AjustesTestMixin, TestCase):
+    """reclamar_pendientes / liberar_pendientes (adjustments.cola_aprobacion)"""
+
+    RECLAMAR = '/api/adjustments/reclamar_pendientes/'
+    LIBERAR = '/api/adjustments/liberar_pendientes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.aprobador = User.objects.create_superuser('aprobador', password='x')
+        cls.segundo = User.objects.create_superuser('segundo', password='x')
+        ahora = timezone.now()
+        cls.pendientes = {}
+        for dias, prioridad in ((4, 'BAJA'), (3, 'MEDIA'), (2, 'URGENTE'), (1, 'ALTA')):
+            ajuste = cls.crear_ajuste(estado='PENDIENTE', prioridad=prioridad)
+            AjusteFinanciero.objects.filter(pk=ajuste.pk).update(created_at=ahora - timedelta(days=dias))
+            cls.pendientes[prioridad] = ajuste.pk
+        cls.borrador = cls.crear_ajuste()
+
+    def reclamar(self, usuario, cantidad=10):
+        respuesta = self.cliente(usuario).post(self.RECLAMAR, {'cantidad': cantidad}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        return [ajuste['id'] for ajuste in respuesta.data['ajustes']]
+
+    def ids(self, *prioridades):
+        return [self.pendientes[prioridad] for prioridad in prioridades]
+
+    def test_orden_por_prioridad_y_antiguedad(self):
+        self.assertEqual(self.reclamar(self.aprobador, 2), self.ids('URGENTE', 'ALTA'))
+        # Las reservas vigentes se renuevan y conservan su lugar en la cola
+        self.assertEqual(self.reclamar(self.aprobador), self.ids('URGENTE', 'ALTA', 'MEDIA', 'BAJA'))
+
+    def test_otro_aprobador_no_recibe_los_reservados(self):
+        self.reclamar(self.aprobador, 2)
+
+        self.assertEqual(self.reclamar(self.segundo), self.ids('MEDIA', 'BAJA'))
+        self.assertEqual(self.reclamar(self.aprobador), self.ids('URGENTE', 'ALTA'))
+
+    def test_reserva_vencida_vuelve_a_la_cola(self):
+        self.reclamar(self.aprobador, 2)
+        AjusteFinanciero.objects.filter(reclamado_por=self.aprobador).update(
+            reclamado_hasta=timezone.now() - timedelta(minutes=1)
+        )
+
+        self.assertEqual(self.reclamar(self.segundo, 1), self.ids('URGENTE'))
+
+    def test_liberar(self):
+        self.reclamar(self.aprobador, 2)
+
+        respuesta = self.cliente(self.aprobador).post(
+            self.LIBERAR, {'ajuste_ids': self.ids('ALTA')}, format='json'
+        )
+        self.assertEqual(respuesta.data['liberados'], 1)
+        self.assertEqual(self.reclamar(self.segundo, 1), self.ids('ALTA'))
+
+        respuesta = self.cliente(self.aprobador).post(self.LIBERAR, {}, format='json')
+        self.assertEqual(respuesta.data['liberados'], 1)
+        self.assertEqual(self.reclamar(self.segundo, 1), self.ids('URGENTE'))
+
+    def test_resolver_quita_la_reserva(self):
+        self.reclamar(self.aprobador, 1)
+        respuesta = self.cliente(self.aprobador).post(
+            f"/api/adjustments/{self.pendientes['URGENTE']}/cambiar_estado/",
+            {'nuevo_estado': 'APROBADO'}, format='json'
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+        ajuste = AjusteFinanciero.objects.get(pk=self.pendientes['URGENTE'])
+        self.assertIsNone(ajuste.reclamado_por)
+        self.assertNotIn(ajuste.pk, self.reclamar(self.segundo))
+
+    def test_solo_aprobadores(self):
+        respuesta = self.cliente(self.creador).post(self.RECLAMAR, {'cantidad': 1}, format='json')
+
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertFalse(AjusteFinanciero.objects.filter(reclamado_por__isnull=False).exists())
+
+    @override_settings(ADJUSTMENTS_SETTINGS={'APPROVAL_CLAIM_MAX': 2})
+    def test_cantidad_maxima(self):
+        respuesta = self.cliente(self.aprobador).post(self.RECLAMAR, {'cantidad': 3}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class BlobsAdjuntosTests(AjustesTestMixin, MediaTemporalMixin, TestCase):
+    """Adjuntos deduplicados por SHA-256 (BlobAdjunto) y limpiar_blobs_adjuntos"""
+
+    CONTENIDO = b'%PDF-1.4 soporte firmado'
+
+    def setUp(self):
+        super().setUp()
+        self.api = self.cliente(self.creador)
+        self.ajustes = [self.crear_ajuste() for _ in range(3)]
+        for ajuste in self.ajustes:
+            self.assertEqual(self.subir(self.api, ajuste, self.CONTENIDO).status_code, 201)
+        self.blob = BlobAdjunto.objects.get()
+        self.storage = self.blob.archivo.storage
+
+    def referencias(self):
+        self.blob.refresh_from_db()
+        return self.blob.referencias
+
+    def limpiar(self, *argumentos):
+        salida = StringIO()
+        call_command('limpiar_blobs_adjuntos', *argumentos, stdout=salida)
+        return salida.getvalue()
+
+    def test_mismo_contenido_un_solo_blob(self):
+        self.assertEqual(self.blob.sha256, hashlib.sha256(self.CONTENIDO).hexdigest())
+        self.assertEqual(self.referencias(), 3)
+        self.assertEqual(set(ArchivoAdjunto.objects.values_list('archivo', flat=True)), {self.blob.archivo.name})
+        with self.storage.open(self.blob.archivo.name) as archivo:
+            self.assertEqual(archivo.read(), self.CONTENIDO)
+
+        self.subir(self.api, self.ajustes[0], b'otro contenido')
+        self.assertEqual(BlobAdjunto.objects.count(), 2)
+
+    def test_eliminar_descuenta_referencias(self):
+        ArchivoAdjunto.objects.filter(ajuste=self.ajustes[0]).get().delete()
+        self.assertEqual(self.referencias(), 2)
+
+        # En cascada con el ajuste
+        self.ajustes[1].delete()
+        self.assertEqual(self.referencias(), 1)
+
+        # Eliminación en lote (sin señales por fila)
+        self.cliente(self.creador).post(
+            '/api/adjustments/bulk-delete/', {'ajuste_ids': [self.ajustes[2].pk]}, format='json'
+        )
+        self.assertEqual(self.referencias(), 0)
+
+    def test_limpiar_blobs_sin_referencias(self):
+        self.assertIn('0 blobs', self.limpiar())
+
+        AjusteFinanciero.objects.filter(pk__in=[ajuste.pk for ajuste in self.ajustes]).delete()
+        self.assertEqual(self.referencias(), 0)
+
+        self.assertIn('Se eliminarían 1 blobs', self.limpiar('--dry-run'))
+        self.assertTrue(self.storage.exists(self.blob.archivo.name))
+
+        with self.captureOnCommitCallbacks() as al_confirmar:
+            self.assertIn('Eliminados 1 blobs', self.limpiar())
+        self.assertFalse(BlobAdjunto.objects.exists())
+        # El archivo se borra solo cuando la transacción confirma
+        self.assertTrue(self.storage.exists(self.blob.archivo.name))
+        for funcion in al_confirmar:
+            funcion()
+        self.assertFalse(self.storage.exists(self.blob.archivo.name))
+
+    def test_vincular_adjuntos_sin_blob(self):
+        ajuste = self.ajustes[0]
+        anteriores = []
+        for contenido in (b'contrato escaneado', b'contrato escaneado', self.CONTENIDO):
+            adjunto = ArchivoAdjunto.objects.create(
+                ajuste=ajuste, nombre='antiguo.pdf', archivo=ContentFile(contenido, 'antiguo.pdf'),
+                tamaño=len(contenido), tipo_contenido='application/pdf', usuario_subida=self.creador
+            )
+            anteriores.append(adjunto.archivo.name)
+
+        self.assertIn('Se vincularían 3 adjuntos', self.limpiar('--vincular', '--dry-run'))
+        self.assertEqual(ArchivoAdjunto.objects.filter(blob__isnull=True).count(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIn('Vinculados 3 adjuntos', self.limpiar('--vincular'))
+
+        self.assertFalse(ArchivoAdjunto.objects.filter(blob__isnull=True).exists())
+        self.assertEqual(self.referencias(), 4)
+        nuevo = BlobAdjunto.objects.get(sha256=hashlib.sha256(b'contrato escaneado').hexdigest())
+        self.assertEqual(nuevo.referencias, 2)
+        self.assertEqual(ArchivoAdjunto.objects.filter(blob=nuevo, archivo=nuevo.archivo.name).count(), 2)
+        self.assertFalse(any(self.storage.exists(nombre) for nombre in anteriores))
+
+    def test_limpiar_archivos_huerfanos(self):
+        huerfano = self.storage.save(f'{BlobAdjunto.DIRECTORIO}/ab/cd/interrumpido', ContentFile(b'parcial'))
+
+        self.assertIn('0 archivos huérfanos', self.limpiar('--huerfanos'))
+        self.assertIn('Se eliminarían 1 archivos huérfanos', self.limpiar('--huerfanos', '--horas', '0', '--dry-run'))
+        self.assertTrue(self.storage.exists(huerfano))
+
+        self.limpiar('--huerfanos', '--horas', '0')
+        self.assertFalse(self.storage.exists(huerfano))
+        self.assertTrue(self.storage.exists(self.blob.archivo.name))
+
+
+class CambioEstadoLoteTests(AjustesTestMixin, TestCase):
+    """POST /api/adjustments/cambiar_estado_lote/"""
+
+    URL = '/api/adjustments/cambiar_estado_lote/'
+
+    def setUp(self):
+        super().setUp()
+        self.pendientes = [self.crear_ajuste(estado='PENDIENTE') for _ in range(2)]
+        self.borrador = self.crear_ajuste()
+        self.ajeno = self.crear_ajuste(self.otro, estado='PENDIENTE')
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+
+    def cambiar(self, usuario, ids, nuevo_estado, **datos):
+        respuesta = self.cliente(usuario).post(
+            self.URL, {'ajuste_ids': ids, 'nuevo_estado': nuevo_estado, **datos}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def test_mezcla_de_validos_invalidos_y_no_visibles(self):
+        ids = [ajuste.pk for ajuste in self.pendientes] + [self.borrador.pk, self.ajeno.pk, 999999]
+        data = self.cambiar(self.creador, ids, 'APROBADO', comentario='Revisado en lote')
+
+        self.assertEqual((data['actualizados'], data['rechazados']), (2, 3))
+        resultados = {fila['id']: fila for fila in data['resultados']}
+        self.assertTrue(resultados[self.pendientes[0].pk]['actualizado'])
+        self.assertEqual(resultados[self.borrador.pk]['estado'], 'BORRADOR')
+        self.assertEqual(resultados[self.ajeno.pk]['error'], 'Ajuste no encontrado')
+        self.assertEqual(resultados[999999]['error'], 'Ajuste no encontrado')
+
+        self.assertEqual(AjusteFinanciero.objects.get(pk=self.ajeno.pk).estado, 'PENDIENTE')
+        self.assertEqual(AjusteFinanciero.objects.get(pk=self.borrador.pk).version, 1)
+        historial = HistorialAjuste.objects.order_by('ajuste_id')
+        self.assertEqual(
+            list(historial.values_list('ajuste_id', 'estado_anterior', 'estado_nuevo', 'usuario', 'comentario')),
+            [(ajuste.pk, 'PENDIENTE', 'APROBADO', self.creador.pk, 'Revisado en lote') for ajuste in self.pendientes]
+        )
+
+    def test_campos_version_reserva_y_participantes(self):
+        AjusteFinanciero.objects.filter(pk=self.pendientes[0].pk).update(
+            reclamado_por=self.admin, reclamado_hasta=timezone.now() + timedelta(minutes=10)
+        )
+        ids = [ajuste.pk for ajuste in self.pendientes]
+
+        self.cambiar(self.admin, ids, 'APROBADO')
+        for ajuste in AjusteFinanciero.objects.filter(pk__in=ids):
+            self.assertEqual((ajuste.estado, ajuste.version), ('APROBADO', 2))
+            self.assertEqual(ajuste.usuario_aprobador, self.admin)
+            self.assertIsNotNone(ajuste.fecha_aprobacion)
+            self.assertIsNone(ajuste.reclamado_por)
+            self.assertIsNone(ajuste.reclamado_hasta)
+
+        self.cambiar(self.admin, ids, 'PROCESADO')
+        for ajuste in AjusteFinanciero.objects.filter(pk__in=ids):
+            self.assertEqual((ajuste.version, ajuste.usuario_procesador), (3, self.admin))
+            self.assertIsNotNone(ajuste.fecha_procesamiento)
+
+        for rol in ('APROBADOR', 'PROCESADOR'):
+            self.assertCountEqual(
+                ParticipanteAjuste.objects.filter(usuario=self.admin, rol=rol).values_list('ajuste_id', flat=True), ids
+            )
+
+
+class ImportacionTests(AjustesTestMixin, TestCase):
+    """POST /api/adjustments/import/ y /api/registros/importar/ (adjustments.importacion)"""
+
+    ENCABEZADOS_AJUSTE = [
+        'Fecha Ajuste', 'Fecha Valor', 'Tipo Ajuste', 'Cuenta Débito', 'Cuenta Crédito',
+        'Monto', 'Concepto', 'Descripción', 'Justificación', 'Prioridad',
+    ]
+    ENCABEZADOS_REGISTRO = [
+        'ID Cuenta', 'ID Acuerdo Servicio', 'ID Cargo Facturable', 'Fecha Ajuste',
+        'Asesor que Ajustó', 'Valor Ajustado', 'Justificación',
+    ]
+
+    def ajuste(self, monto='-25.50', debito='1105', **campos):
+        fila = {
+            'Fecha Ajuste': '15/01/2025 10:30', 'Fecha Valor': '2025-01-15', 'Tipo Ajuste': 'Débito',
+            'Cuenta Débito': debito, 'Cuenta Crédito': '2205 - Proveedores', 'Monto': monto,
+            'Concepto': 'Ajuste importado', 'Descripción': 'Diferencia de cierre',
+            'Justificación': 'Conciliación bancaria de enero', 'Prioridad': 'Alta',
+        }
+        fila.update(campos)
+        return [fila[columna] for columna in self.ENCABEZADOS_AJUSTE]
+
+    def csv(self, encabezados, filas, nombre='ajustes.csv'):
+        contenido = StringIO()
+        escritor = csv.writer(contenido)
+        escritor.writerow(encabezados)
+        escritor.writerows(filas)
+        return SimpleUploadedFile(nombre, contenido.getvalue().encode('utf-8-sig'), 'text/csv')
+
+    def xlsx(self, encabezados, filas, nombre='registros.xlsx'):
+        libro = Workbook()
+        libro.active.append(encabezados)
+        for fila in filas:
+            libro.active.append(fila)
+        contenido = BytesIO()
+        libro.save(contenido)
+        return SimpleUploadedFile(nombre, contenido.getvalue())
+
+    def importar_ajustes(self, archivo):
+        return self.cliente(self.creador).post('/api/adjustments/import/', {'archivo': archivo}, format='multipart')
+
+    def test_ajustes_desde_csv(self):
+        filas = [
+            self.ajuste(),
+            self.ajuste(monto='30'),
+            [''] * len(self.ENCABEZADOS_AJUSTE),
+            self.ajuste(debito='9999'),
+            self.ajuste(monto='-40'),
+        ]
+        with self.settings(ADJUSTMENTS_SETTINGS={'IMPORT_MAX_ERRORS': 1, 'IMPORT_PROCESSES': 1}):
+            respuesta = self.importar_ajustes(self.csv(self.ENCABEZADOS_AJUSTE, filas))
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((respuesta.data['total_filas'], respuesta.data['creados']), (4, 2))
+        self.assertEqual(respuesta.data['rechazados'], 2)
+        # La fila 1 es el encabezado y la fila vacía no cuenta pero conserva su número
+        self.assertEqual(respuesta.data['errores'], [
+            {'fila': 3, 'errores': {'monto': ['El valor del ajuste debe ser negativo']}},
+        ])
+        self.assertEqual(respuesta.data['errores_omitidos'], 1)
+
+        ajustes = list(AjusteFinanciero.objects.order_by('numero_ajuste'))
+        self.assertEqual([ajuste.monto for ajuste in ajustes], [Decimal('-25.50'), Decimal('-40.00')])
+        self.assertEqual(ajustes[0].cuenta_debito, self.cuenta_debito)
+        self.assertEqual(ajustes[0].cuenta_credito, self.cuenta_credito)
+        self.assertEqual((ajustes[0].tipo_ajuste, ajustes[0].prioridad), (self.tipo, 'ALTA'))
+        self.assertEqual(
+            timezone.localtime(ajustes[0].fecha_ajuste).replace(tzinfo=None), datetime(2025, 1, 15, 10, 30)
+        )
+
+        self.assertCountEqual(
+            ParticipanteAjuste.objects.filter(usuario=self.creador, rol='CREADOR').values_list('ajuste_id', flat=True),
+            [ajuste.pk for ajuste in ajustes]
+        )
+
+        # Números reservados en bloque: consecutivos y sin repetirse con los siguientes
+        numeros = [int(ajuste.numero_ajuste[2:]) for ajuste in ajustes]
+        self.assertEqual(numeros[1], numeros[0] + 1)
+        self.assertGreater(int(self.crear_ajuste().numero_ajuste[2:]), numeros[1])
+
+    def test_columna_obligatoria_faltante(self):
+        encabezados = self.ENCABEZADOS_AJUSTE[:-2] + ['Prioridad']
+        respuesta = self.importar_ajustes(self.csv(encabezados, [self.ajuste()[:-2] + ['Alta']]))
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('justificacion', respuesta.data['error'])
+        self.assertFalse(AjusteFinanciero.objects.exists())
+
+    def test_registros_desde_xlsx(self):
+        hoy = date.today()
+        filas = [
+            ['CTA-001', 'AS-1', 'CF-1', hoy, 'Ana Ruiz', -150.5, 'Diferencia detectada en la factura'],
+            ['CTA-001', 'AS-2', 'CF-1', hoy - timedelta(days=3), 'Ana Ruiz', -80, 'Diferencia detectada en la factura'],
+            ['CTA-002', 'AS-3', 'CF-1', hoy, 'Juan Pérez', 80, 'Diferencia detectada en la factura'],
+        ]
+        respuesta = self.client.post(
+            '/api/registros/importar/', {'archivo': self.xlsx(self.ENCABEZADOS_REGISTRO, filas)}
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((respuesta.json()['creados'], respuesta.json()['rechazados']), (2, 1))
+        self.assertEqual([error['fila'] for error in respuesta.json()['errores']], [4])
+        self.assertEqual(
+            set(RegistroAjuste.objects.values_list('valor_ajustado', flat=True)),
+            {Decimal('-150.50'), Decimal('-80.00')}
+        )
+
+        asesor = DimensionAsesor.objects.get(nombre='Ana Ruiz')
+        self.assertEqual((asesor.total_registros, asesor.ultima_fecha_ajuste), (2, hoy))
+        self.assertEqual(DimensionCuenta.objects.get(id_cuenta='CTA-001').total_registros, 2)
+        self.assertFalse(DimensionAsesor.objects.filter(nombre='Juan Pérez').exists())
+
+    def test_registros_columna_faltante(self):
+        respuesta = self.client.post(
+            '/api/registros/importar/', {'archivo': self.xlsx(self.ENCABEZADOS_REGISTRO[:-1], [])}
+        )
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class ImportacionParalelaTests(TestCase):
+    """Validación en un ProcessPoolExecutor (Importador._validar_en_paralelo)"""
+
+    def archivo(self):
+        contenido = StringIO()
+        escritor = csv.writer(contenido)
+        escritor.writerow(validacion.COLUMNAS_REGISTRO)
+        for i in range(20):
+            # Una fila inválida cada cuatro y una vacía en medio
+            valor = '15.00' if i % 4 == 3 else f'-{100 + i}.00'
+            escritor.writerow([
+                f'CTA-{i % 3}', f'AS-{i}', 'CF-1', date.today().isoformat(), 'Ana Ruiz', valor,
+                'Diferencia detectada en la factura',
+            ])
+            if i == 9:
+                escritor.writerow([''] * len(validacion.COLUMNAS_REGISTRO))
+        return BytesIO(contenido.getvalue().encode('utf-8'))
+
+    def importar(self, procesos):
+        importador = ImportadorRegistros(None, tamano_lote=4, procesos=procesos)
+        with mock.patch('adjustments.importacion.TAMANO_BLOQUE', 3):
+            return importador.importar(leer_csv(self.archivo(), validacion.COLUMNAS_REGISTRO))
+
+    def test_mismo_resultado_que_un_proceso(self):
+        secuencial = self.importar(1)
+        with mock.patch('adjustments.importacion.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool:
+            paralelo = self.importar(2)
+
+        self.assertEqual(pool.call_args.kwargs['max_workers'], 2)
+        self.assertEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+        for clave in ('total_filas', 'creados', 'rechazados', 'errores'):
+            self.assertEqual(paralelo[clave], secuencial[clave], clave)
+        self.assertEqual((paralelo['total_filas'], paralelo['creados']), (20, 15))
+        self.assertEqual([error['fila'] for error in paralelo['errores']], [5, 9, 14, 18, 22])
+
+        # Las filas se insertan en el orden del archivo en ambas ejecuciones
+        acuerdos = list(RegistroAjuste.objects.order_by('pk').values_list('id_acuerdo_servicio', flat=True))
+        self.assertEqual(acuerdos[:15], acuerdos[15:])
+        self.assertEqual(acuerdos[:3], ['AS-0', 'AS-1', 'AS-2'])
+
+    def test_un_solo_bloque_no_crea_procesos(self):
+        with mock.patch('adjustments.importacion.ProcessPoolExecutor') as pool:
+            importador = ImportadorRegistros(None, procesos=4)
+            resultado = importador.importar(leer_csv(self.archivo(), validacion.COLUMNAS_REGISTRO))
+        pool.assert_not_called()
+        self.assertEqual(resultado['creados'], 15)
+
+
+class ParticionamientoTests(TestCase):
+    """adjustments.partitioning y sus comandos (solo actúan en PostgreSQL)"""
+
+    def test_sumar_meses(self):
+        self.assertEqual(partitioning.sumar_meses(date(2025, 1, 31), 1), date(2025, 2, 1))
+        self.assertEqual(partitioning.sumar_meses(date(2025, 11, 15), 2), date(2026, 1, 1))
+        self.assertEqual(partitioning.sumar_meses(date(2025, 12, 1), 13), date(2027, 1, 1))
+        self.assertEqual(partitioning.sumar_meses(date(2025, 1, 10), -1), date(2024, 12, 1))
+        self.assertEqual(partitioning.sumar_meses(date(2025, 3, 10), 0), date(2025, 3, 1))
+
+    def test_inicio_de_mes_y_nombre(self):
+        self.assertEqual(partitioning.inicio_de_mes(date(2025, 10, 17)), date(2025, 10, 1))
+        self.assertEqual(
+            partitioning.nombre_particion(date(2025, 3, 1)), 'adjustments_registroajuste_p2025_03'
+        )
+        self.assertEqual(partitioning.nombre_particion(date(2025, 12, 1), 'tabla'), 'tabla_p2025_12')
+
+    @skipIf(connection.vendor == 'postgresql', 'Los comandos solo son inocuos fuera de PostgreSQL')
+    def test_comandos_sin_efecto_fuera_de_postgresql(self):
+        comandos = [
+            ('particionar_registros',),
+            ('crear_particiones', '--meses', '2'),
+            ('desvincular_particiones', '--antes-de', '2024-01', '--eliminar'),
+        ]
+        RegistroAjuste.objects.create(
+            id_cuenta='CTA-1', id_acuerdo_servicio='AS-1', id_cargo_facturable='CF-1',
+            fecha_ajuste=date(2023, 5, 1), asesor_que_ajusto='Ana Ruiz', valor_ajustado=Decimal('-10.00'),
+            justificacion='Diferencia detectada en la factura',
+        )
+        for comando in comandos:
+            with self.subTest(comando=comando[0]):
+                salida = StringIO()
+                call_command(*comando, stdout=salida)
+                self.assertIn('solo aplica a PostgreSQL', salida.getvalue())
+        self.assertEqual(RegistroAjuste.objects.count(), 1)
+        self.assertEqual(partitioning.crear_particiones(connection), [])
+        with self.assertRaises(ValueError):
+            partitioning.convertir_a_particionada(connection)
@@ -6,11 +6,16 @@ from rest_framework.routers import DefaultRouter
 from . import views
 
 router = DefaultRouter()
+# Catálogos (registrados antes de la ruta vacía de ajustes)
+router.register(r'tipos', views.TipoAjusteViewSet, basename='tipo-ajuste')
+router.register(r'cuentas', views.CuentaContableViewSet, basename='cuenta-contable')
 router.register(r'', views.AjusteFinancieroViewSet, basename='ajuste')
 
 urlpatterns = [
     # Additional custom endpoints
     path('export/', views.ExportAjustesView.as_view(), name='export_ajustes'),
+    path('export/<int:pk>/', views.EstadoExportacionView.as_view(), name='estado_exportacion'),
+    path('export/<int:pk>/descargar/', views.DescargarExportacionView.as_view(), name='descargar_exportacion'),
     path('import/', views.ImportAjustesView.as_view(), name='import_ajustes'),
     path('bulk-delete/', views.BulkDeleteView.as_view(), name='bulk_delete'),
     
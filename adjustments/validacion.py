@@ -0,0 +1,354 @@
+"""
+Reglas de validación puras de AjusteFinanciero y RegistroAjuste.
+
+Las reglas de negocio (regla_*) son la única definición: las usan
+AjusteFinancieroCreateUpdateSerializer y RegistroAjusteSerializer y las
+funciones validar_ajuste / validar_registro de la importación masiva. Los
+límites de los modelos (monto negativo, mínimo) se repiten aquí porque la
+importación no pasa por los validadores de los campos.
+
+Nada depende de la base de datos ni de settings: los catálogos, choices,
+fecha actual y límites llegan como argumentos o en un `contexto`
+precalculado, de modo que las funciones se pueden ejecutar en procesos
+hijos de un ProcessPoolExecutor.
+
+Este módulo no importa modelos: los procesos hijos (spawn) lo cargan sin
+inicializar Django.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+# Formatos aceptados además de ISO 8601
+FORMATOS_FECHA = ('%d/%m/%Y',)
+FORMATOS_FECHA_HORA = ('%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S')
+
+MONTO_MAXIMO = Decimal('-0.01')
+MONTO_MINIMO = Decimal('-999999999999.99')
+
+# Columnas de cada modelo en el archivo
+COLUMNAS_AJUSTE = (
+    'fecha_ajuste', 'fecha_valor', 'tipo_ajuste', 'cuenta_debito', 'cuenta_credito',
+    'monto', 'concepto', 'descripcion', 'justificacion',
+)
+COLUMNAS_AJUSTE_OPCIONALES = (
+    'moneda', 'prioridad', 'observaciones', 'fecha_vencimiento',
+    'numero_documento_origen', 'referencia_externa', 'centro_costo',
+)
+COLUMNAS_REGISTRO = (
+    'id_cuenta', 'id_acuerdo_servicio', 'id_cargo_facturable', 'fecha_ajuste',
+    'asesor_que_ajusto', 'valor_ajustado', 'justificacion',
+)
+
+PALABRAS_PROHIBIDAS = ('test', 'prueba', 'xxxx', 'aaaa')
+
+# Función de validación y contexto de cada proceso hijo (ver iniciar_proceso)
+_validar = None
+_contexto = None
+
+
+def texto(valor):
+    """Valor leído del archivo como texto sin espacios ('' si está vacío)"""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _interpretar(valor, iso, formatos):
+    """Interpretar una fecha en ISO 8601 o en alguno de los formatos dados"""
+    try:
+        return iso(valor)
+    except ValueError:
+        pass
+    for formato in formatos:
+        try:
+            return datetime.strptime(valor, formato)
+        except ValueError:
+            continue
+    raise ValueError(valor)
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    fecha = _interpretar(texto(valor), date.fromisoformat, FORMATOS_FECHA)
+    return fecha.date() if isinstance(fecha, datetime) else fecha
+
+
+def _fecha_hora(valor, zona):
+    if isinstance(valor, datetime):
+        fecha = valor
+    elif isinstance(valor, date):
+        fecha = datetime(valor.year, valor.month, valor.day)
+    else:
+        fecha = _interpretar(texto(valor), datetime.fromisoformat, FORMATOS_FECHA_HORA + FORMATOS_FECHA)
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=zona)
+    return fecha
+
+
+def _decimal(valor):
+    """Decimal con dos decimales; InvalidOperation si no es un número finito"""
+    numero = Decimal(valor)
+    if not numero.is_finite():
+        raise InvalidOperation
+    return numero.quantize(Decimal('0.01'))
+
+
+def _agregar(errores, campo, mensaje):
+    errores.setdefault(campo, []).append(mensaje)
+
+
+def _obligatorias(valores, columnas, errores):
+    for columna in columnas:
+        if not valores[columna]:
+            _agregar(errores, columna, 'Este campo es requerido.')
+
+
+def _longitudes(valores, longitudes, errores):
+    for columna, longitud in longitudes.items():
+        if len(valores[columna]) > longitud:
+            _agregar(errores, columna, f'No puede tener más de {longitud} caracteres.')
+
+
+def _catalogo(catalogo, valor, errores, campo, etiqueta):
+    """Resolver una clave contra un catálogo precargado y retornar (id, activo)"""
+    encontrado = catalogo.get(valor)
+    if encontrado is None and ' - ' in valor:
+        # Formato de la exportación: "codigo - nombre"
+        encontrado = catalogo.get(valor.split(' - ', 1)[0])
+    if encontrado is None:
+        _agregar(errores, campo, f'{etiqueta} "{valor}" no existe.')
+    return encontrado
+
+
+# =============================================================================
+# REGLAS DE NEGOCIO (compartidas con los serializers)
+# =============================================================================
+
+def regla_clasificacion(tipo, debito, credito):
+    """
+    Reglas de tipo de ajuste y cuentas de un AjusteFinanciero.
+
+    Args:
+        tipo, debito, credito: (id, activo) de cada catálogo, o None si no
+            se indicó
+
+    Returns:
+        list: (campo, mensaje) en orden de prioridad; vacía si es válido
+    """
+    errores = []
+    if debito and credito and debito[0] == credito[0]:
+        errores.append(('non_field_errors', 'La cuenta de débito y crédito no pueden ser la misma.'))
+    if debito and not debito[1]:
+        errores.append(('cuenta_debito', 'La cuenta de débito seleccionada no está activa.'))
+    if credito and not credito[1]:
+        errores.append(('cuenta_credito', 'La cuenta de crédito seleccionada no está activa.'))
+    if tipo and not tipo[1]:
+        errores.append(('tipo_ajuste', 'El tipo de ajuste seleccionado no está activo.'))
+    return errores
+
+
+def regla_fecha_registro(fecha, hoy):
+    """Mensaje de error de la fecha de un RegistroAjuste (None si es válida)"""
+    if fecha > hoy:
+        return 'La fecha del ajuste no puede ser futura.'
+    return None
+
+
+def regla_valor_registro(valor, valor_maximo):
+    """Mensaje de error del valor de un RegistroAjuste (None si es válido)"""
+    if valor >= 0:
+        return 'El valor del ajuste debe ser negativo (representa una deducción).'
+    if abs(valor) > valor_maximo:
+        return f"El valor absoluto del ajuste no puede exceder ${valor_maximo:,.2f}"
+    if valor < MONTO_MINIMO:
+        return 'El valor excede el límite mínimo permitido'
+    return None
+
+
+def regla_justificacion(justificacion):
+    """Mensaje de error de la justificación de un RegistroAjuste (None si es válida)"""
+    if len(justificacion.strip()) < 10:
+        return 'La justificación debe tener al menos 10 caracteres.'
+    if any(palabra in justificacion.lower() for palabra in PALABRAS_PROHIBIDAS):
+        return 'La justificación no puede contener texto de prueba.'
+    return None
+
+
+def regla_justificacion_alto_valor(valor, justificacion):
+    """Los ajustes de alto valor requieren una justificación detallada"""
+    if valor is not None and abs(valor) >= 100000 and len(justificacion.strip()) < 50:
+        return 'Ajustes de alto valor requieren justificación detallada (mínimo 50 caracteres).'
+    return None
+
+
+# =============================================================================
+# VALIDACIÓN DE FILAS DE LA IMPORTACIÓN
+# =============================================================================
+
+def validar_ajuste(fila, contexto):
+    """
+    Validar una fila y convertirla en campos de AjusteFinanciero.
+
+    Args:
+        fila (dict): Columna normalizada -> valor leído
+        contexto (dict): 'tipos' y 'cuentas' ({clave: (id, activo)}),
+            'prioridades' ({código o etiqueta en mayúsculas: código}),
+            'longitudes' ({columna: max_length}) y 'zona' (tzinfo)
+
+    Returns:
+        tuple: (datos, errores); datos es None si la fila tiene errores
+    """
+    errores = {}
+    valores = {columna: texto(fila.get(columna)) for columna in COLUMNAS_AJUSTE + COLUMNAS_AJUSTE_OPCIONALES}
+    _obligatorias(valores, COLUMNAS_AJUSTE, errores)
+    _longitudes(valores, contexto['longitudes'], errores)
+
+    datos = {
+        columna: valores[columna]
+        for columna in ('concepto', 'descripcion', 'justificacion', 'observaciones',
+                        'numero_documento_origen', 'referencia_externa', 'centro_costo')
+    }
+    datos['moneda'] = valores['moneda'].upper() or 'COP'
+
+    if valores['fecha_ajuste']:
+        try:
+            datos['fecha_ajuste'] = _fecha_hora(fila['fecha_ajuste'], contexto['zona'])
+        except ValueError:
+            _agregar(errores, 'fecha_ajuste', 'Fecha y hora inválida.')
+
+    for columna in ('fecha_valor', 'fecha_vencimiento'):
+        if valores[columna]:
+            try:
+                datos[columna] = _fecha(fila[columna])
+            except ValueError:
+                _agregar(errores, columna, 'Fecha inválida.')
+
+    if valores['monto']:
+        try:
+            monto = _decimal(valores['monto'])
+        except InvalidOperation:
+            _agregar(errores, 'monto', 'Monto inválido.')
+        else:
+            if monto > MONTO_MAXIMO:
+                _agregar(errores, 'monto', 'El valor del ajuste debe ser negativo')
+            elif monto < MONTO_MINIMO:
+                _agregar(errores, 'monto', 'El valor excede el límite mínimo permitido')
+            datos['monto'] = monto
+
+    prioridad = valores['prioridad'].upper() or 'MEDIA'
+    datos['prioridad'] = contexto['prioridades'].get(prioridad)
+    if datos['prioridad'] is None:
+        _agregar(errores, 'prioridad', f'"{valores["prioridad"]}" no es una prioridad válida.')
+
+    clasificacion = {}
+    if valores['tipo_ajuste']:
+        clasificacion['tipo_ajuste'] = _catalogo(
+            contexto['tipos'], valores['tipo_ajuste'].upper(), errores, 'tipo_ajuste', 'El tipo de ajuste'
+        )
+    for columna, etiqueta in (('cuenta_debito', 'La cuenta de débito'), ('cuenta_credito', 'La cuenta de crédito')):
+        if valores[columna]:
+            clasificacion[columna] = _catalogo(contexto['cuentas'], valores[columna], errores, columna, etiqueta)
+
+    for columna, encontrado in clasificacion.items():
+        if encontrado:
+            datos[f'{columna}_id'] = encontrado[0]
+    for campo, mensaje in regla_clasificacion(
+        clasificacion.get('tipo_ajuste'), clasificacion.get('cuenta_debito'), clasificacion.get('cuenta_credito')
+    ):
+        _agregar(errores, campo, mensaje)
+
+    if errores:
+        return None, errores
+    return datos, None
+
+
+def validar_registro(fila, contexto):
+    """
+    Validar una fila y convertirla en campos de RegistroAjuste.
+
+    Args:
+        fila (dict): Columna normalizada -> valor leído
+        contexto (dict): 'hoy' (date), 'valor_maximo' (MAX_ADJUSTMENT_VALUE)
+            y 'longitudes' ({columna: max_length})
+
+    Returns:
+        tuple: (datos, errores); datos es None si la fila tiene errores
+    """
+    errores = {}
+    valores = {columna: texto(fila.get(columna)) for columna in COLUMNAS_REGISTRO}
+    _obligatorias(valores, COLUMNAS_REGISTRO, errores)
+    _longitudes(valores, contexto['longitudes'], errores)
+
+    datos = {
+        columna: valores[columna]
+        for columna in ('id_cuenta', 'id_acuerdo_servicio', 'id_cargo_facturable', 'asesor_que_ajusto')
+    }
+
+    if valores['fecha_ajuste']:
+        try:
+            datos['fecha_ajuste'] = _fecha(fila['fecha_ajuste'])
+        except ValueError:
+            _agregar(errores, 'fecha_ajuste', 'Fecha inválida.')
+        else:
+            mensaje = regla_fecha_registro(datos['fecha_ajuste'], contexto['hoy'])
+            if mensaje:
+                _agregar(errores, 'fecha_ajuste', mensaje)
+
+    valor = None
+    if valores['valor_ajustado']:
+        try:
+            valor = _decimal(valores['valor_ajustado'])
+        except InvalidOperation:
+            _agregar(errores, 'valor_ajustado', 'El valor debe ser un número válido.')
+        else:
+            mensaje = regla_valor_registro(valor, contexto['valor_maximo'])
+            if mensaje:
+                _agregar(errores, 'valor_ajustado', mensaje)
+            datos['valor_ajustado'] = valor
+
+    justificacion = valores['justificacion']
+    if justificacion:
+        mensaje = regla_justificacion(justificacion) or regla_justificacion_alto_valor(valor, justificacion)
+        if mensaje:
+            _agregar(errores, 'justificacion', mensaje)
+        datos['justificacion'] = justificacion
+
+    if errores:
+        return None, errores
+    return datos, None
+
+
+def validar_filas(validar, bloque, contexto):
+    """
+    Validar un bloque de filas numeradas.
+
+    Args:
+        validar (callable): validar_ajuste o validar_registro
+        bloque (list): Tuplas (número de fila, fila)
+        contexto (dict): Contexto de la función de validación
+
+    Returns:
+        list: Tuplas (número de fila, datos, errores)
+    """
+    resultado = []
+    for numero, fila in bloque:
+        datos, errores = validar(fila, contexto)
+        resultado.append((numero, datos, errores))
+    return resultado
+
+
+def iniciar_proceso(validar, contexto):
+    """Inicializador de los procesos hijos: recibir el contexto una sola vez"""
+    global _validar, _contexto
+    _validar, _contexto = validar, contexto
+
+
+def validar_en_proceso(bloque):
+    """Validar un bloque en un proceso hijo (después de iniciar_proceso)"""
+    return validar_filas(_validar, bloque, _contexto)
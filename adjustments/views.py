@@ -1,7 +1,9 @@
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.urls import reverse
+from django.http import FileResponse, StreamingHttpResponse
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q, Count, Sum
+from django.db.models import Count, Sum, Prefetch, F
 from django.db import transaction
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
@@ -11,22 +13,34 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 import django_filters
-import csv
-import openpyxl
+from django_filters.utils import translate_validation
+import logging
+import os
 from datetime import datetime
-from io import BytesIO
 
 from .models import (
-    TipoAjuste, CuentaContable, AjusteFinanciero,
-    HistorialAjuste, ArchivoAdjunto, ComentarioAjuste
+    TipoAjuste, CuentaContable, AjusteFinanciero, ParticipanteAjuste,
+    HistorialAjuste, ArchivoAdjunto, BlobAdjunto, ComentarioAjuste
 )
+from .conditional import ConditionalGetMixin
+from .campos import CamposDispersosMixin
+from .exports import CHUNK_SIZE, CONTENT_TYPE_XLSX, escribir_xlsx, generar_csv
+from .importacion import ImportadorAjustes, leer_csv, leer_xlsx
+from .adjuntos import instalar_hash, respuesta_descarga
+from .cola_aprobacion import reclamar, liberar
+from .tareas import PLANTILLA_EXPORTACION, encolar, exportar_ajustes, recuperar_exportaciones
 from .serializers import (
     TipoAjusteSerializer, CuentaContableSerializer,
     AjusteFinancieroListSerializer, AjusteFinancieroDetailSerializer,
     AjusteFinancieroCreateUpdateSerializer, CambiarEstadoAjusteSerializer,
+    CambiarEstadoLoteSerializer, ReclamarPendientesSerializer, LiberarPendientesSerializer,
     HistorialAjusteSerializer, ArchivoAdjuntoSerializer,
-    ComentarioAjusteSerializer, ExportarAjustesSerializer
+    ComentarioAjusteSerializer, ExportarAjustesSerializer, EjecucionExportacionSerializer,
+    ConflictoVersion
 )
+from analytics.models import ReportTemplate, ReportExecution
+
+logger = logging.getLogger(__name__)
 
 class AjusteFinancieroFilter(django_filters.FilterSet):
     """Filtros para AjusteFinanciero"""
@@ -45,8 +59,8 @@ class AjusteFinancieroFilter(django_filters.FilterSet):
             'moneda', 'usuario_creador', 'centro_costo'
         ]
 
-class TipoAjusteViewSet(viewsets.ModelViewSet):
-    """ViewSet para TipoAjuste"""
+class TipoAjusteViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet para TipoAjuste (solo lectura; el catálogo se administra en el admin)"""
     queryset = TipoAjuste.objects.all()
     serializer_class = TipoAjusteSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -56,8 +70,8 @@ class TipoAjusteViewSet(viewsets.ModelViewSet):
     ordering = ['nombre']
     filterset_fields = ['activo']
 
-class CuentaContableViewSet(viewsets.ModelViewSet):
-    """ViewSet para CuentaContable"""
+class CuentaContableViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet para CuentaContable (solo lectura; el catálogo se administra en el admin)"""
     queryset = CuentaContable.objects.all()
     serializer_class = CuentaContableSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -67,12 +81,25 @@ class CuentaContableViewSet(viewsets.ModelViewSet):
     ordering = ['codigo']
     filterset_fields = ['tipo_cuenta', 'activo']
 
-class AjusteFinancieroViewSet(viewsets.ModelViewSet):
-    """ViewSet principal para AjusteFinanciero"""
-    queryset = AjusteFinanciero.objects.select_related(
-        'tipo_ajuste', 'cuenta_debito', 'cuenta_credito',
+class AjusteFinancieroViewSet(CamposDispersosMixin, viewsets.ModelViewSet):
+    """
+    ViewSet principal para AjusteFinanciero.
+    
+    Cada acción arma su propio plan de consulta (get_queryset): el listado
+    solo une las relaciones de AjusteFinancieroListSerializer y acepta
+    ?fields= / ?omit=; el detalle precarga historial, archivos y comentarios
+    junto con sus usuarios para evitar consultas N+1.
+    """
+    queryset = AjusteFinanciero.objects.all()
+    
+    # Relaciones que usa AjusteFinancieroDetailSerializer (los catálogos salen
+    # de la caché en memoria, ver adjustments.catalogos)
+    RELACIONES_DETALLE = [
         'usuario_creador', 'usuario_aprobador', 'usuario_procesador'
-    ).prefetch_related('historial', 'archivos', 'comentarios')
+    ]
+    
+    # Acciones que responden con AjusteFinancieroDetailSerializer
+    ACCIONES_DETALLE = ['retrieve', 'mis_ajustes', 'pendientes_aprobacion', 'reclamar_pendientes']
     
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -97,8 +124,8 @@ class AjusteFinancieroViewSet(viewsets.ModelViewSet):
             return AjusteFinancieroDetailSerializer
     
     def get_queryset(self):
-        """Personalizar queryset según permisos del usuario"""
-        queryset = super().get_queryset()
+        """Personalizar queryset según la acción y los permisos del usuario"""
+        queryset = self.optimizar_queryset(super().get_queryset())
         user = self.request.user
         
         # Los administradores ven todos los ajustes
@@ -106,54 +133,201 @@ class AjusteFinancieroViewSet(viewsets.ModelViewSet):
             return queryset
         
         # Los usuarios normales solo ven los ajustes que crearon o donde están involucrados
-        return queryset.filter(
-            Q(usuario_creador=user) |
-            Q(usuario_aprobador=user) |
-            Q(usuario_procesador=user)
-        )
+        # (índice de participantes en lugar de un OR sobre tres columnas)
+        return queryset.filter(id__in=ParticipanteAjuste.ajustes_visibles(user))
+    
+    def optimizar_queryset(self, queryset):
+        """
+        Plan de consulta según la acción.
+        
+        - list: sin cambios; la proyección de CamposDispersosMixin agrega
+          solo las relaciones y columnas de AjusteFinancieroListSerializer
+        - detalle: une las relaciones directas y precarga historial, archivos
+          y comentarios con su usuario en una consulta por relación
+        - resto (escrituras y acciones sobre un ajuste): sin uniones
+        """
+        if self.action in self.ACCIONES_DETALLE:
+            return queryset.select_related(*self.RELACIONES_DETALLE).prefetch_related(
+                Prefetch('historial', queryset=HistorialAjuste.objects.select_related('usuario')),
+                Prefetch('archivos', queryset=ArchivoAdjunto.objects.select_related('usuario_subida')),
+                Prefetch('comentarios', queryset=ComentarioAjuste.objects.select_related('usuario')),
+            )
+        
+        return queryset
+    
+    def update(self, request, *args, **kwargs):
+        """PUT/PATCH con compare-and-swap sobre la versión (409 si el ajuste cambió)"""
+        try:
+            return super().update(request, *args, **kwargs)
+        except ConflictoVersion as conflicto:
+            return self._conflicto_version(conflicto.ajuste)
     
     @action(detail=True, methods=['post'])
     def cambiar_estado(self, request, pk=None):
-        """Cambiar el estado de un ajuste"""
+        """
+        Cambiar el estado de un ajuste.
+        
+        Sin bloqueos: la transición se valida sobre la versión leída y se
+        guarda con compare-and-swap (AjusteFinanciero.guardar_con_version).
+        Si otro usuario cambió el ajuste entre la lectura y la escritura, o
+        si la petición trae una "version" distinta a la actual, se responde
+        409 sin registrar historial.
+        """
         ajuste = self.get_object()
         serializer = CambiarEstadoAjusteSerializer(
             data=request.data,
             context={'ajuste': ajuste, 'request': request}
         )
         
-        if serializer.is_valid():
-            nuevo_estado = serializer.validated_data['nuevo_estado']
-            comentario = serializer.validated_data.get('comentario', '')
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        version = serializer.validated_data.get('version', ajuste.version)
+        if version != ajuste.version:
+            return self._conflicto_version(ajuste)
+        
+        nuevo_estado = serializer.validated_data['nuevo_estado']
+        comentario = serializer.validated_data.get('comentario', '')
+        
+        # Actualizar estado y fechas
+        estado_anterior = ajuste.estado
+        ajuste.estado = nuevo_estado
+        campos = ['estado']
+        
+        if nuevo_estado == 'APROBADO' and estado_anterior != 'APROBADO':
+            ajuste.usuario_aprobador = request.user
+            ajuste.fecha_aprobacion = timezone.now()
+            campos += ['usuario_aprobador', 'fecha_aprobacion']
+        elif nuevo_estado == 'PROCESADO' and estado_anterior != 'PROCESADO':
+            ajuste.usuario_procesador = request.user
+            ajuste.fecha_procesamiento = timezone.now()
+            campos += ['usuario_procesador', 'fecha_procesamiento']
+        
+        # Al salir de PENDIENTE el ajuste deja la cola de aprobación
+        if estado_anterior == 'PENDIENTE':
+            ajuste.reclamado_por = None
+            ajuste.reclamado_hasta = None
+            campos += ['reclamado_por', 'reclamado_hasta']
+        
+        with transaction.atomic():
+            if not ajuste.guardar_con_version(campos):
+                return self._conflicto_version(ajuste)
             
-            with transaction.atomic():
-                # Guardar historial
-                HistorialAjuste.objects.create(
-                    ajuste=ajuste,
-                    estado_anterior=ajuste.estado,
-                    estado_nuevo=nuevo_estado,
-                    usuario=request.user,
-                    comentario=comentario
+            # Guardar historial
+            HistorialAjuste.objects.create(
+                ajuste=ajuste,
+                estado_anterior=estado_anterior,
+                estado_nuevo=nuevo_estado,
+                usuario=request.user,
+                comentario=comentario
+            )
+        
+        return Response({
+            'message': f'Estado cambiado a {nuevo_estado} exitosamente',
+            'nuevo_estado': nuevo_estado,
+            'version': ajuste.version
+        })
+    
+    def _conflicto_version(self, ajuste):
+        """Respuesta 409 con el estado y la versión vigentes del ajuste"""
+        actual = AjusteFinanciero.objects.filter(pk=ajuste.pk).values('estado', 'version').first()
+        return Response({
+            'error': 'El ajuste fue modificado por otro usuario. Recargue e intente de nuevo.',
+            'estado_actual': actual and actual['estado'],
+            'version': actual and actual['version'],
+        }, status=status.HTTP_409_CONFLICT)
+    
+    @action(detail=False, methods=['post'])
+    def cambiar_estado_lote(self, request):
+        """
+        Cambiar el estado de varios ajustes en una sola transacción.
+        
+        Recibe {"ajuste_ids": [...], "nuevo_estado": ..., "comentario": ...}.
+        La tabla de transiciones de CambiarEstadoAjusteSerializer se aplica en
+        SQL (estado IN estados de origen) sobre las filas bloqueadas, el
+        historial se inserta con bulk_create y el estado, el aprobador o
+        procesador y sus fechas se escriben con un único UPDATE (que también
+        incrementa la versión de cada ajuste). Los ajustes
+        que no existen, no son visibles o no admiten la transición se
+        reportan sin detener el resto.
+        """
+        serializer = CambiarEstadoLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        ajuste_ids = serializer.validated_data['ajuste_ids']
+        nuevo_estado = serializer.validated_data['nuevo_estado']
+        comentario = serializer.validated_data.get('comentario', '')
+        origenes = CambiarEstadoAjusteSerializer.estados_origen(nuevo_estado)
+        ahora = timezone.now()
+        
+        cambios = {'estado': nuevo_estado, 'updated_at': ahora, 'version': F('version') + 1}
+        if nuevo_estado == 'APROBADO':
+            cambios.update(usuario_aprobador=request.user, fecha_aprobacion=ahora)
+        elif nuevo_estado == 'PROCESADO':
+            cambios.update(usuario_procesador=request.user, fecha_procesamiento=ahora)
+        if 'PENDIENTE' in origenes:
+            cambios.update(reclamado_por=None, reclamado_hasta=None)
+        
+        with transaction.atomic():
+            # Visibilidad de get_queryset; filas bloqueadas hasta el UPDATE
+            filas = {
+                fila[0]: fila[1:]
+                for fila in self.get_queryset().select_for_update().filter(id__in=ajuste_ids).values_list(
+                    'id', 'estado', 'usuario_creador_id', 'usuario_aprobador_id', 'usuario_procesador_id'
                 )
-                
-                # Actualizar estado y fechas
-                estado_anterior = ajuste.estado
-                ajuste.estado = nuevo_estado
-                
-                if nuevo_estado == 'APROBADO' and estado_anterior != 'APROBADO':
-                    ajuste.usuario_aprobador = request.user
-                    ajuste.fecha_aprobacion = timezone.now()
-                elif nuevo_estado == 'PROCESADO' and estado_anterior != 'PROCESADO':
-                    ajuste.usuario_procesador = request.user
-                    ajuste.fecha_procesamiento = timezone.now()
-                
-                ajuste.save()
+            }
+            validos = [pk for pk in ajuste_ids if pk in filas and filas[pk][0] in origenes]
             
-            return Response({
-                'message': f'Estado cambiado a {nuevo_estado} exitosamente',
-                'nuevo_estado': nuevo_estado
-            })
+            if validos:
+                HistorialAjuste.objects.bulk_create([
+                    HistorialAjuste(
+                        ajuste_id=pk,
+                        estado_anterior=filas[pk][0],
+                        estado_nuevo=nuevo_estado,
+                        usuario=request.user,
+                        comentario=comentario
+                    )
+                    for pk in validos
+                ])
+                AjusteFinanciero.objects.filter(id__in=validos, estado__in=origenes).update(**cambios)
+                
+                # update() no emite post_save: sincronizar aprobador/procesador
+                if 'usuario_aprobador' in cambios or 'usuario_procesador' in cambios:
+                    ParticipanteAjuste.sincronizar([
+                        AjusteFinanciero(
+                            id=pk,
+                            usuario_creador_id=filas[pk][1],
+                            usuario_aprobador_id=request.user.pk if nuevo_estado == 'APROBADO' else filas[pk][2],
+                            usuario_procesador_id=request.user.pk if nuevo_estado == 'PROCESADO' else filas[pk][3],
+                        )
+                        for pk in validos
+                    ])
+        
+        resultados = []
+        for pk in ajuste_ids:
+            if pk not in filas:
+                resultados.append({'id': pk, 'actualizado': False, 'error': 'Ajuste no encontrado'})
+            elif filas[pk][0] not in origenes:
+                resultados.append({
+                    'id': pk,
+                    'actualizado': False,
+                    'estado': filas[pk][0],
+                    'error': f"No es posible cambiar de {filas[pk][0]} a {nuevo_estado}."
+                })
+            else:
+                resultados.append({'id': pk, 'actualizado': True, 'estado_anterior': filas[pk][0]})
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(
+            f"Cambio de estado en lote a {nuevo_estado} por {request.user.username}: "
+            f"{len(validos)} de {len(ajuste_ids)} ajustes"
+        )
+        
+        return Response({
+            'nuevo_estado': nuevo_estado,
+            'actualizados': len(validos),
+            'rechazados': len(ajuste_ids) - len(validos),
+            'resultados': resultados,
+        })
     
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def subir_archivo(self, request, pk=None):
@@ -167,6 +341,8 @@ class AjusteFinancieroViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Calcular el SHA-256 mientras se recibe el archivo (antes de leer request.data)
+        instalar_hash(request)
         serializer = ArchivoAdjuntoSerializer(
             data=request.data,
             context={'request': request}
@@ -178,6 +354,30 @@ class AjusteFinancieroViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(
+        detail=True, methods=['get'],
+        url_path=r'archivos/(?P<archivo_id>[0-9]+)/descargar', url_name='descargar-archivo'
+    )
+    def descargar_archivo(self, request, pk=None, archivo_id=None):
+        """
+        Descargar un archivo adjunto del ajuste.
+        
+        El acceso sigue la visibilidad del ajuste (get_object); la transferencia
+        la hace el proxy (X-Accel-Redirect / X-Sendfile) o un FileResponse con
+        soporte de Range (ver adjustments.adjuntos).
+        """
+        ajuste = self.get_object()
+        adjunto = get_object_or_404(ArchivoAdjunto.objects.select_related('blob'), pk=archivo_id, ajuste=ajuste)
+        
+        try:
+            return respuesta_descarga(request, adjunto)
+        except FileNotFoundError:
+            logger.error(f"Archivo adjunto {adjunto.pk} sin contenido en el almacenamiento: {adjunto.archivo.name}")
+            return Response(
+                {'error': 'El archivo no está disponible'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
     @action(detail=True, methods=['post'])
     def agregar_comentario(self, request, pk=None):
         """Agregar comentario a un ajuste"""
@@ -197,7 +397,7 @@ class AjusteFinancieroViewSet(viewsets.ModelViewSet):
     def historial(self, request, pk=None):
         """Obtener historial de cambios de un ajuste"""
         ajuste = self.get_object()
-        historial = ajuste.historial.all()
+        historial = ajuste.historial.select_related('usuario')
         serializer = HistorialAjusteSerializer(historial, many=True)
         return Response(serializer.data)
     
@@ -240,6 +440,48 @@ class AjusteFinancieroViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(filtered_queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def reclamar_pendientes(self, request):
+        """
+        Reservar los siguientes ajustes pendientes para el aprobador actual.
+        
+        Recibe {"cantidad": N} y responde los ajustes reservados en orden de
+        atención (prioridad y antigüedad) con el fin de la reserva. Otros
+        aprobadores no los reciben mientras la reserva esté vigente.
+        """
+        if not request.user.has_perm('adjustments.can_approve'):
+            return Response(
+                {'error': 'No tiene permisos para ver ajustes pendientes'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = ReclamarPendientesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        ids, hasta = reclamar(
+            request.user,
+            serializer.validated_data['cantidad'],
+            queryset=self.get_queryset().order_by()
+        )
+        
+        ajustes = {ajuste.pk: ajuste for ajuste in self.get_queryset().filter(id__in=ids)}
+        data = self.get_serializer([ajustes[pk] for pk in ids if pk in ajustes], many=True).data
+        
+        return Response({
+            'reclamado_hasta': hasta,
+            'cantidad': len(ids),
+            'ajustes': data,
+        })
+    
+    @action(detail=False, methods=['post'])
+    def liberar_pendientes(self, request):
+        """Devolver a la cola los ajustes reservados por el usuario actual"""
+        serializer = LiberarPendientesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        liberados = liberar(request.user, serializer.validated_data.get('ajuste_ids'))
+        return Response({'liberados': liberados})
+
 class ExportAjustesView(APIView):
     """Vista para exportar ajustes en diferentes formatos"""
     permission_classes = [permissions.IsAuthenticated]
@@ -249,110 +491,183 @@ class ExportAjustesView(APIView):
         
         if serializer.is_valid():
             formato = serializer.validated_data['formato']
-            fecha_inicio = serializer.validated_data.get('fecha_inicio')
-            fecha_fin = serializer.validated_data.get('fecha_fin')
-            estados = serializer.validated_data.get('estado', [])
-            tipos_ajuste = serializer.validated_data.get('tipo_ajuste', [])
             
-            # Construir queryset
-            queryset = AjusteFinanciero.objects.select_related(
-                'tipo_ajuste', 'cuenta_debito', 'cuenta_credito', 'usuario_creador'
-            )
+            if formato == 'pdf':
+                return self._export_pdf(None)
+            if serializer.validated_data.get('asincrono'):
+                return self._export_asincrono(request, serializer.validated_data)
             
-            # Aplicar filtros
-            if fecha_inicio:
-                queryset = queryset.filter(fecha_ajuste__gte=fecha_inicio)
-            if fecha_fin:
-                queryset = queryset.filter(fecha_ajuste__lte=fecha_fin)
-            if estados:
-                queryset = queryset.filter(estado__in=estados)
-            if tipos_ajuste:
-                queryset = queryset.filter(tipo_ajuste__in=tipos_ajuste)
+            queryset = self.construir_queryset(serializer.validated_data)
             
             # Generar archivo según formato
             if formato == 'csv':
                 return self._export_csv(queryset)
             elif formato == 'excel':
                 return self._export_excel(queryset)
-            elif formato == 'pdf':
-                return self._export_pdf(queryset)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @staticmethod
+    def construir_queryset(datos):
+        """Construir el queryset a exportar a partir de los datos validados"""
+        fecha_inicio = datos.get('fecha_inicio')
+        fecha_fin = datos.get('fecha_fin')
+        estados = datos.get('estado', [])
+        tipos_ajuste = datos.get('tipo_ajuste', [])
+        
+        queryset = AjusteFinanciero.objects.all()
+        
+        # Aplicar filtros
+        if fecha_inicio:
+            queryset = queryset.filter(fecha_ajuste__gte=fecha_inicio)
+        if fecha_fin:
+            queryset = queryset.filter(fecha_ajuste__lte=fecha_fin)
+        if estados:
+            queryset = queryset.filter(estado__in=estados)
+        if tipos_ajuste:
+            queryset = queryset.filter(tipo_ajuste__in=tipos_ajuste)
+        
+        return queryset
+    
+    # Encabezados de las exportaciones
+    ENCABEZADOS = [
+        'Número Ajuste', 'Fecha Ajuste', 'Fecha Valor', 'Tipo Ajuste',
+        'Cuenta Débito', 'Cuenta Crédito', 'Monto', 'Moneda',
+        'Concepto', 'Estado', 'Prioridad', 'Usuario Creador'
+    ]
+    
+    # Columnas leídas con values_list (sin instanciar modelos)
+    COLUMNAS = [
+        'numero_ajuste', 'fecha_ajuste', 'fecha_valor', 'tipo_ajuste__nombre',
+        'cuenta_debito__codigo', 'cuenta_debito__nombre',
+        'cuenta_credito__codigo', 'cuenta_credito__nombre',
+        'monto', 'moneda', 'concepto', 'estado', 'prioridad',
+        'usuario_creador__first_name', 'usuario_creador__last_name', 'usuario_creador__username',
+    ]
+    
+    @classmethod
+    def filas(cls, queryset):
+        """
+        Iterar las filas a exportar con un cursor del servidor.
+        
+        Las etiquetas de los choices se resuelven con diccionarios en memoria.
+        La fecha del ajuste se entrega en la zona horaria local (TIME_ZONE),
+        la misma para CSV y Excel.
+        
+        Yields:
+            tuple: Valores sin formatear en el orden de ENCABEZADOS
+        """
+        zona = timezone.get_current_timezone()
+        tipos = dict(TipoAjuste.TIPO_CHOICES)
+        estados = dict(AjusteFinanciero.ESTADO_CHOICES)
+        prioridades = dict(AjusteFinanciero.PRIORIDAD_CHOICES)
+        
+        filas = queryset.values_list(*cls.COLUMNAS).iterator(chunk_size=CHUNK_SIZE)
+        for (numero, fecha_ajuste, fecha_valor, tipo, debito_codigo, debito_nombre,
+             credito_codigo, credito_nombre, monto, moneda, concepto, estado, prioridad,
+             nombre, apellido, username) in filas:
+            yield (
+                numero,
+                timezone.localtime(fecha_ajuste, zona),
+                fecha_valor,
+                tipos.get(tipo, tipo),
+                f"{debito_codigo} - {debito_nombre}",
+                f"{credito_codigo} - {credito_nombre}",
+                monto,
+                moneda,
+                concepto,
+                estados.get(estado, estado),
+                prioridades.get(prioridad, prioridad),
+                f"{nombre} {apellido}".strip() or username,
+            )
+    
+    @classmethod
+    def filas_csv(cls, queryset):
+        """Filas formateadas como texto para el CSV"""
+        for fila in cls.filas(queryset):
+            yield (
+                fila[0],
+                fila[1].strftime('%Y-%m-%d %H:%M:%S'),
+                fila[2].strftime('%Y-%m-%d'),
+                *fila[3:6],
+                str(fila[6]),
+                *fila[7:],
+            )
+    
+    @classmethod
+    def filas_excel(cls, queryset):
+        """Filas con los tipos nativos de Excel"""
+        for fila in cls.filas(queryset):
+            yield (
+                fila[0],
+                # Excel no admite zonas horarias: la hora local de filas() sin tzinfo
+                fila[1].replace(tzinfo=None),
+                *fila[2:6],
+                float(fila[6]),
+                *fila[7:],
+            )
+    
     def _export_csv(self, queryset):
-        """Exportar a CSV"""
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        """Exportar a CSV en streaming (memoria constante)"""
+        response = StreamingHttpResponse(
+            generar_csv(self.ENCABEZADOS, self.filas_csv(queryset)),
+            content_type='text/csv; charset=utf-8'
+        )
         response['Content-Disposition'] = f'attachment; filename="ajustes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
         
-        writer = csv.writer(response)
-        
-        # Encabezados
-        writer.writerow([
-            'Número Ajuste', 'Fecha Ajuste', 'Fecha Valor', 'Tipo Ajuste',
-            'Cuenta Débito', 'Cuenta Crédito', 'Monto', 'Moneda',
-            'Concepto', 'Estado', 'Prioridad', 'Usuario Creador'
-        ])
-        
-        # Datos
-        for ajuste in queryset:
-            writer.writerow([
-                ajuste.numero_ajuste,
-                ajuste.fecha_ajuste.strftime('%Y-%m-%d %H:%M:%S'),
-                ajuste.fecha_valor.strftime('%Y-%m-%d'),
-                ajuste.tipo_ajuste.get_nombre_display(),
-                f"{ajuste.cuenta_debito.codigo} - {ajuste.cuenta_debito.nombre}",
-                f"{ajuste.cuenta_credito.codigo} - {ajuste.cuenta_credito.nombre}",
-                str(ajuste.monto),
-                ajuste.moneda,
-                ajuste.concepto,
-                ajuste.get_estado_display(),
-                ajuste.get_prioridad_display(),
-                ajuste.usuario_creador.get_full_name() or ajuste.usuario_creador.username
-            ])
-        
         return response
     
     def _export_excel(self, queryset):
-        """Exportar a Excel"""
-        output = BytesIO()
-        workbook = openpyxl.Workbook()
-        worksheet = workbook.active
-        worksheet.title = "Ajustes Financieros"
-        
-        # Encabezados
-        headers = [
-            'Número Ajuste', 'Fecha Ajuste', 'Fecha Valor', 'Tipo Ajuste',
-            'Cuenta Débito', 'Cuenta Crédito', 'Monto', 'Moneda',
-            'Concepto', 'Estado', 'Prioridad', 'Usuario Creador'
-        ]
+        """Exportar a Excel con un libro de solo escritura (memoria constante)"""
+        archivo = escribir_xlsx(self.ENCABEZADOS, self.filas_excel(queryset), titulo="Ajustes Financieros")
+        
+        return FileResponse(
+            archivo,
+            as_attachment=True,
+            filename=f'ajustes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx',
+            content_type=CONTENT_TYPE_XLSX
+        )
+    
+    def _export_asincrono(self, request, datos):
+        """
+        Registrar la exportación como ReportExecution y generarla en segundo plano.
+        
+        Returns:
+            Response: 202 con la ejecución; el cliente consulta su estado
+        """
+        plantilla = ReportTemplate.objects.filter(nombre=PLANTILLA_EXPORTACION).first()
+        if plantilla is None:
+            plantilla = ReportTemplate.objects.create(
+                nombre=PLANTILLA_EXPORTACION,
+                descripcion='Exportación de ajustes financieros generada en segundo plano',
+                tipo_reporte='DETALLADO',
+                formato_default='EXCEL',
+                usuario_creador=request.user,
+            )
         
-        for col, header in enumerate(headers, 1):
-            worksheet.cell(row=1, column=col, value=header)
-        
-        # Datos
-        for row, ajuste in enumerate(queryset, 2):
-            worksheet.cell(row=row, column=1, value=ajuste.numero_ajuste)
-            worksheet.cell(row=row, column=2, value=ajuste.fecha_ajuste)
-            worksheet.cell(row=row, column=3, value=ajuste.fecha_valor)
-            worksheet.cell(row=row, column=4, value=ajuste.tipo_ajuste.get_nombre_display())
-            worksheet.cell(row=row, column=5, value=f"{ajuste.cuenta_debito.codigo} - {ajuste.cuenta_debito.nombre}")
-            worksheet.cell(row=row, column=6, value=f"{ajuste.cuenta_credito.codigo} - {ajuste.cuenta_credito.nombre}")
-            worksheet.cell(row=row, column=7, value=float(ajuste.monto))
-            worksheet.cell(row=row, column=8, value=ajuste.moneda)
-            worksheet.cell(row=row, column=9, value=ajuste.concepto)
-            worksheet.cell(row=row, column=10, value=ajuste.get_estado_display())
-            worksheet.cell(row=row, column=11, value=ajuste.get_prioridad_display())
-            worksheet.cell(row=row, column=12, value=ajuste.usuario_creador.get_full_name() or ajuste.usuario_creador.username)
-        
-        workbook.save(output)
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        # Parámetros en JSON, válidos de nuevo para ExportarAjustesSerializer
+        parametros = {
+            'formato': datos['formato'],
+            'estado': sorted(datos.get('estado', [])),
+            'tipo_ajuste': [tipo.pk for tipo in datos.get('tipo_ajuste', [])],
+        }
+        for campo in ('fecha_inicio', 'fecha_fin'):
+            if datos.get(campo):
+                parametros[campo] = datos[campo].isoformat()
+        
+        ejecucion = ReportExecution.objects.create(
+            plantilla=plantilla,
+            usuario=request.user,
+            formato=datos['formato'].upper(),
+            parametros=parametros,
         )
-        response['Content-Disposition'] = f'attachment; filename="ajustes_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
+        encolar(exportar_ajustes, ejecucion.pk)
         
+        response = Response(
+            EjecucionExportacionSerializer(ejecucion, context={'request': request}).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+        response['Location'] = reverse('estado_exportacion', args=[ejecucion.pk])
         return response
     
     def _export_pdf(self, queryset):
@@ -364,8 +679,53 @@ class ExportAjustesView(APIView):
             status=status.HTTP_501_NOT_IMPLEMENTED
         )
 
+class EstadoExportacionView(APIView):
+    """Consultar el estado y el progreso de una exportación en segundo plano"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        ejecucion = obtener_ejecucion_exportacion(request.user, pk)
+        return Response(EjecucionExportacionSerializer(ejecucion, context={'request': request}).data)
+
+class DescargarExportacionView(APIView):
+    """Descargar el archivo de una exportación completada"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        ejecucion = obtener_ejecucion_exportacion(request.user, pk)
+        
+        if ejecucion.estado != 'COMPLETADO' or not ejecucion.archivo_resultado:
+            return Response(
+                {'error': f'La exportación no está lista (estado: {ejecucion.get_estado_display()})'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return FileResponse(
+            ejecucion.archivo_resultado.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(ejecucion.archivo_resultado.name),
+        )
+
+def obtener_ejecucion_exportacion(usuario, pk):
+    """Obtener una ejecución de exportación visible para el usuario (o 404)"""
+    ejecuciones = ReportExecution.objects.filter(plantilla__nombre=PLANTILLA_EXPORTACION)
+    if not usuario.is_superuser:
+        ejecuciones = ejecuciones.filter(usuario=usuario)
+    ejecucion = get_object_or_404(ejecuciones, pk=pk)
+    
+    # Una ejecución huérfana (worker reiniciado) no debe quedar esperando para siempre
+    if ejecucion.estado in ('PENDIENTE', 'PROCESANDO') and recuperar_exportaciones(ejecuciones.filter(pk=pk)):
+        ejecucion.refresh_from_db()
+    return ejecucion
+
 class ImportAjustesView(APIView):
-    """Vista para importar ajustes desde archivo"""
+    """
+    Vista para importar ajustes desde archivo.
+    
+    Las filas válidas se crean en lotes y las inválidas se reportan con su
+    número de fila (ver adjustments.importacion). Para archivos que no caben
+    en el timeout de la petición use el comando importar_ajustes.
+    """
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
@@ -401,43 +761,133 @@ class ImportAjustesView(APIView):
     
     def _import_csv(self, archivo, usuario):
         """Importar desde CSV"""
-        # Implementación básica - se puede expandir según necesidades
-        return {'message': 'Importación CSV no implementada aún'}
+        return ImportadorAjustes(usuario).importar(leer_csv(archivo, ImportadorAjustes.COLUMNAS_OBLIGATORIAS))
     
     def _import_excel(self, archivo, usuario):
         """Importar desde Excel"""
-        # Implementación básica - se puede expandir según necesidades
-        return {'message': 'Importación Excel no implementada aún'}
+        return ImportadorAjustes(usuario).importar(leer_xlsx(archivo, ImportadorAjustes.COLUMNAS_OBLIGATORIAS))
 
 class BulkDeleteView(APIView):
-    """Vista para eliminación en lote"""
+    """
+    Vista para eliminación en lote.
+    
+    Acepta {"ajuste_ids": [...]} (sin límite de tamaño) o {"filtro": {...}} con
+    los parámetros de AjusteFinancieroFilter. Si algún ajuste no es editable
+    no se elimina nada y se reportan los ajustes que lo impiden. La eliminación
+    se hace por lotes de BULK_DELETE_CHUNK ajustes, cada uno en su propia
+    transacción corta, borrando las tablas relacionadas con DELETE directos
+    (sin cargar historial, archivos ni comentarios en memoria).
+    
+    Ambos modos se limitan a los ajustes visibles para el usuario (los
+    mismos de AjusteFinancieroViewSet); los demás ids se ignoran.
+    """
     permission_classes = [permissions.IsAuthenticated]
     
+    # Tablas que dependen de AjusteFinanciero (on_delete=CASCADE)
+    RELACIONADOS = (HistorialAjuste, ArchivoAdjunto, ComentarioAjuste, ParticipanteAjuste)
+    
+    # Ajustes no editables incluidos en el error
+    MAX_REPORTADOS = 100
+    
     def post(self, request):
         ajuste_ids = request.data.get('ajuste_ids', [])
-        
-        if not ajuste_ids:
+        filtro = request.data.get('filtro')
+        tamano = getattr(settings, 'ADJUSTMENTS_SETTINGS', {}).get('BULK_DELETE_CHUNK', 1000)
+        self.visibles = self._visibles(request.user)
+        
+        if filtro:
+            filterset = AjusteFinancieroFilter(data=filtro, queryset=self.visibles)
+            if not filterset.is_valid():
+                raise translate_validation(filterset.errors)
+            queryset = filterset.qs.order_by()
+            no_editables = self._no_editables(queryset)
+            lotes = self._lotes_por_filtro(queryset, tamano)
+        elif ajuste_ids:
+            try:
+                ajuste_ids = sorted({int(pk) for pk in ajuste_ids})
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': 'ajuste_ids debe ser una lista de IDs numéricos'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            lotes = [ajuste_ids[i:i + tamano] for i in range(0, len(ajuste_ids), tamano)]
+            no_editables = []
+            for lote in lotes:
+                no_editables += self._no_editables(self.visibles.filter(id__in=lote))
+                if len(no_editables) >= self.MAX_REPORTADOS:
+                    break
+        else:
             return Response(
-                {'error': 'Debe proporcionar al menos un ID de ajuste'},
+                {'error': 'Debe proporcionar al menos un ID de ajuste o un filtro'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Validar que el usuario pueda eliminar estos ajustes
-        ajustes = AjusteFinanciero.objects.filter(id__in=ajuste_ids)
-        
         # Verificar permisos
-        for ajuste in ajustes:
-            if not ajuste.puede_ser_editado:
-                return Response(
-                    {'error': f'El ajuste {ajuste.numero_ajuste} no puede ser eliminado en su estado actual'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        if no_editables:
+            return Response({
+                'error': 'Hay ajustes que no pueden ser eliminados en su estado actual',
+                'no_editables': no_editables[:self.MAX_REPORTADOS],
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         # Eliminar ajustes
-        eliminados = ajustes.count()
-        ajustes.delete()
+        eliminados = sum(self._eliminar_lote(lote) for lote in lotes)
+        logger.info(f"Eliminación en lote de {eliminados} ajustes por {request.user.username}")
         
         return Response({
             'message': f'Se eliminaron {eliminados} ajustes exitosamente',
             'eliminados': eliminados
         })
+    
+    def _visibles(self, user):
+        """Ajustes que el usuario puede eliminar (todos para los administradores)"""
+        if user.is_superuser:
+            return AjusteFinanciero.objects.all()
+        return AjusteFinanciero.objects.filter(id__in=ParticipanteAjuste.ajustes_visibles(user))
+    
+    def _no_editables(self, queryset):
+        """Ajustes del queryset que no son editables (una consulta, con límite)"""
+        return list(
+            queryset.exclude(estado__in=AjusteFinanciero.ESTADOS_EDITABLES)
+            .order_by('id')
+            .values('id', 'numero_ajuste', 'estado')[:self.MAX_REPORTADOS]
+        )
+    
+    def _lotes_por_filtro(self, queryset, tamano):
+        """IDs del filtro por lotes, paginando por id (keyset)"""
+        ultimo = 0
+        while True:
+            lote = list(
+                queryset.filter(id__gt=ultimo).order_by('id').values_list('id', flat=True)[:tamano]
+            )
+            if not lote:
+                return
+            yield lote
+            ultimo = lote[-1]
+    
+    def _eliminar_lote(self, ids):
+        """
+        Eliminar un lote de ajustes y sus filas relacionadas.
+        
+        Los ajustes se bloquean y se vuelve a comprobar su estado dentro de la
+        transacción, por si cambiaron después de la verificación inicial.
+        
+        Returns:
+            int: Ajustes eliminados
+        """
+        with transaction.atomic():
+            ids = list(
+                self.visibles.select_for_update()
+                .filter(id__in=ids, estado__in=AjusteFinanciero.ESTADOS_EDITABLES)
+                .values_list('id', flat=True)
+            )
+            if not ids:
+                return 0
+            
+            # _raw_delete no emite post_delete: descontar las referencias a los blobs
+            BlobAdjunto.descontar(ArchivoAdjunto.objects.filter(ajuste_id__in=ids))
+            
+            for modelo in self.RELACIONADOS:
+                consulta = modelo.objects.filter(ajuste_id__in=ids)
+                consulta._raw_delete(consulta.db)
+            consulta = AjusteFinanciero.objects.filter(id__in=ids)
+            return consulta._raw_delete(consulta.db)
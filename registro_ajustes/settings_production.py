@@ -421,6 +421,21 @@ ADJUSTMENTS_SETTINGS = {
     'REQUIRE_APPROVAL_ABOVE': config('REQUIRE_APPROVAL_ABOVE', default=100000, cast=int),
     'AUTO_APPROVE_BELOW': config('AUTO_APPROVE_BELOW', default=10000, cast=int),
     'NOTIFICATION_EMAILS': config('NOTIFICATION_EMAILS', default='').split(','),
+    'MAX_BATCH_SIZE': config('MAX_BATCH_SIZE', default=1000, cast=int),
+    'PARTITION_MONTHS_AHEAD': config('PARTITION_MONTHS_AHEAD', default=3, cast=int),
+    'NUMERO_AJUSTE_BLOQUE': config('NUMERO_AJUSTE_BLOQUE', default=20, cast=int),
+    'EXPORT_WORKERS': config('EXPORT_WORKERS', default=2, cast=int),
+    'EXPORT_TIMEOUT_MINUTES': config('EXPORT_TIMEOUT_MINUTES', default=60, cast=int),
+    'IMPORT_BATCH_SIZE': config('IMPORT_BATCH_SIZE', default=2000, cast=int),
+    'IMPORT_MAX_ERRORS': config('IMPORT_MAX_ERRORS', default=1000, cast=int),
+    'IMPORT_PROCESSES': config('IMPORT_PROCESSES', default=os.cpu_count() or 1, cast=int),
+    'BULK_DELETE_CHUNK': config('BULK_DELETE_CHUNK', default=1000, cast=int),
+    'APPROVAL_LEASE_MINUTES': config('APPROVAL_LEASE_MINUTES', default=15, cast=int),
+    'APPROVAL_CLAIM_MAX': config('APPROVAL_CLAIM_MAX', default=50, cast=int),
+    'CATALOG_CACHE_CHECK_SECONDS': config('CATALOG_CACHE_CHECK_SECONDS', default=5, cast=int),
+    # '' (FileResponse), 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache)
+    'ATTACHMENT_SENDFILE': config('ATTACHMENT_SENDFILE', default=''),
+    'ATTACHMENT_ACCEL_PREFIX': config('ATTACHMENT_ACCEL_PREFIX', default='/protected-media/'),
 }
 
 # =============================================================================